@@ -0,0 +1,66 @@
+"""
+Measure the CPU time spent by the parent process while a pipeline runs.
+
+Creates a throw-away project with a json_multi dataset and runs a pipeline whose node only waits (simulating I/O or work
+done elsewhere), so nearly all the CPU time used by the parent is scheduling overhead.
+
+Usage: python benchmarks/parent_cpu.py [num_items] [item_seconds] [workers]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+num_items = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+item_seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 0.01
+workers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+
+# Build the benchmark project (the configuration is read when canonada is imported)
+project = tempfile.mkdtemp(prefix="canonada_bench_")
+os.chdir(project)
+os.makedirs("config")
+os.makedirs("data/items")
+with open("canonada.toml", "w") as f:
+    f.write('[logging]\nlevel = "ERROR"\nshow_progress = false\n')
+with open("config/catalog.toml", "w") as f:
+    f.write('[items]\ntype = "canonada.json_multi"\nkeys = []\npath = "data/items"\n')
+with open("config/parameters.toml", "w") as f:
+    f.write(f"item_seconds = {item_seconds}\n")
+for i in range(num_items):
+    with open(f"data/items/item_{i}.json", "w") as f:
+        json.dump({"id": i}, f)
+
+sys.path.insert(0, src_path)
+from canonada.pipeline import Node, Pipeline  # noqa: E402
+
+
+def wait(item: dict, seconds: float) -> None:
+    time.sleep(seconds)
+
+
+pipe = Pipeline("parent_cpu_bench", [
+    Node(func=wait, input=["items", "params:item_seconds"], output=["_"], name="wait"),
+], max_workers=workers)
+
+print(f"{num_items} items, {item_seconds * 1000:.0f} ms per item, {workers} workers")
+print(f"{'mode':<16}{'wall (s)':>10}{'parent CPU (s)':>16}")
+for mode, use_processes in [("multithreading", False), ("multiprocessing", True)]:
+    pipe.multiprocessing = use_processes
+    process_start = time.process_time()
+    main_thread_start = time.thread_time()
+    wall_start = time.perf_counter()
+
+    pipe.run()
+
+    wall = time.perf_counter() - wall_start
+    if use_processes:
+        # The CPU time of the worker processes is not included
+        parent_cpu = time.process_time() - process_start
+    else:
+        # The worker threads share the process, only count the scheduling (main) thread
+        parent_cpu = time.thread_time() - main_thread_start
+    print(f"{mode:<16}{wall:>10.2f}{parent_cpu:>16.2f}")
@@ -4,6 +4,7 @@ Canonada
 A data science framework that helps you build production-ready streaming pipelines for data processing in Python
 """
 
+from . import cache as cache
 from . import catalog as catalog
 from . import exceptions as exceptions
 from . import pipeline as pipeline
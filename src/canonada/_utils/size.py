@@ -0,0 +1,32 @@
+import re
+
+_UNITS = {
+    "": 1, "B": 1,
+    "KB": 10**3, "MB": 10**6, "GB": 10**9, "TB": 10**12,
+    "KIB": 2**10, "MIB": 2**20, "GIB": 2**30, "TIB": 2**40,
+}
+
+
+def parse_size(size: int|str) -> int:
+    """
+    Parse a size in bytes given as an integer or a string with a unit (e.g. "512MB", "8GB", "1.5GiB").
+
+    Args:
+        size (int|str): The size to parse
+
+    Returns:
+        int: The size in bytes
+    """
+
+    if isinstance(size, int):
+        value = size
+    else:
+        match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([a-zA-Z]*)\s*", size)
+        if match is None or match.group(2).upper() not in _UNITS:
+            raise ValueError(f"Invalid size '{size}'. Use a number of bytes or a number with a unit (e.g. '8GB').")
+        value = int(float(match.group(1)) * _UNITS[match.group(2).upper()])
+
+    if value < 1:
+        raise ValueError(f"Invalid size '{size}'. Must be greater than 0.")
+
+    return value
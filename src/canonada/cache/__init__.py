@@ -0,0 +1,6 @@
+"""
+Cache node results on disk to skip recomputing nodes whose code and inputs did not change.
+"""
+
+from ._core import Cache as Cache
+from ._core import fingerprint_function as fingerprint_function
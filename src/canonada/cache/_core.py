@@ -0,0 +1,272 @@
+import hashlib
+import inspect
+import marshal
+import os
+import pickle
+import sqlite3
+import sys
+import sysconfig
+import threading
+import time
+from types import CodeType
+from typing import Any, Callable
+
+from .._config import config
+from .._logger import logger as log
+
+
+def _code_bytes(code: CodeType) -> bytes:
+    """
+    Serialize the instructions, constants and names of a code object, leaving out line numbers so moving a function
+    does not change its fingerprint
+    """
+
+    consts = [_code_bytes(c) if isinstance(c, CodeType) else c for c in code.co_consts]
+    return code.co_code + marshal.dumps((consts, code.co_names, code.co_varnames))
+
+# Installed packages and the standard library, whose functions are not fingerprinted when referenced
+_LIBRARY_PATHS = tuple({os.path.abspath(path) for name, path in sysconfig.get_paths().items() if name in ("stdlib", "platstdlib", "purelib", "platlib")})
+
+def _global_names(code: CodeType) -> list[str]:
+    """
+    Get the names a code object and the functions nested in it look up, in order
+    """
+
+    names = list(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            names.extend(_global_names(const))
+
+    return names
+
+def _is_constant(value: Any) -> bool:
+    """
+    Check whether a value is an immutable constant (numbers, strings, bytes, None and tuples or frozensets of them).
+    Mutable globals are left out of fingerprints, nodes may use them as state.
+    """
+
+    if isinstance(value, (tuple, frozenset)):
+        return all(_is_constant(item) for item in value)
+    return value is None or isinstance(value, (bool, int, float, complex, str, bytes))
+
+def _is_library(func: Callable) -> bool:
+    """
+    Check whether a function belongs to an installed package or the standard library
+    """
+
+    file = getattr(sys.modules.get(getattr(func, "__module__", None) or ""), "__file__", None)
+    return file is not None and os.path.abspath(file).startswith(_LIBRARY_PATHS)
+
+def fingerprint_function(func: Callable, _seen: set[int]|None = None) -> bytes:
+    """
+    Get a hash of the code of a function: its source (or bytecode if the source is not available), default arguments,
+    the values it closes over and the globals it references (functions of the project and immutable constants, not
+    modules nor installed packages). Changing any of them changes the fingerprint.
+
+    Args:
+        func (callable): The function to fingerprint
+
+    Returns:
+        bytes: The hash of the function
+    """
+
+    seen = _seen if _seen is not None else set()
+    seen.add(id(func))
+
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', '')}".encode())
+    try:
+        h.update(inspect.getsource(func).encode())
+    except (OSError, TypeError):
+        pass
+    # The source of a lambda is its whole line, also hash the bytecode
+    code = getattr(func, "__code__", None)
+    h.update(_code_bytes(code) if code is not None else repr(func).encode())
+
+    # Values the function depends on besides its code
+    values = list(getattr(func, "__defaults__", None) or ()) + [cell.cell_contents for cell in getattr(func, "__closure__", None) or ()]
+    for value in values:
+        if callable(value) and hasattr(value, "__code__"):
+            if id(value) not in seen: # Recursive functions close over themselves
+                h.update(fingerprint_function(value, seen))
+            continue
+        try:
+            h.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            h.update(repr(value).encode()) # Not serializable, may change between runs
+
+    # Globals the function looks up (names missing from the globals are builtins or attributes)
+    global_values = getattr(func, "__globals__", {})
+    for name in dict.fromkeys(_global_names(code)) if code is not None else ():
+        if name not in global_values:
+            continue
+        value = global_values[name]
+        if callable(value) and hasattr(value, "__code__"):
+            if id(value) not in seen and not _is_library(value):
+                h.update(name.encode())
+                h.update(fingerprint_function(value, seen))
+        elif _is_constant(value):
+            h.update(name.encode())
+            h.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+    return h.digest()
+
+class Cache():
+    """
+    On-disk content-addressed cache. Values are pickled to files named after their key and indexed in a SQLite database.
+    When the cache grows above `max_size` the least recently used entries are evicted.
+
+    The location and size are configured in the `[cache]` section of canonada.toml (`path` and `max_size` in bytes).
+    """
+
+    def __init__(self, path: str|None = None, max_size: int|None = None) -> None:
+        """
+        Open (or create) a cache.
+
+        Args:
+            path (str, optional): Directory of the cache. Defaults to the configured path or "data/.cache".
+            max_size (int, optional): Maximum size of the cached values in bytes. Defaults to the configured size or 1 GiB.
+        """
+
+        self.path: str = path if path is not None else config.get("cache", {}).get("path", "data/.cache")
+        self.max_size: int = max_size if max_size is not None else config.get("cache", {}).get("max_size", 1 << 30)
+        os.makedirs(os.path.join(self.path, "objects"), exist_ok=True)
+
+        self._db = sqlite3.connect(os.path.join(self.path, "index.sqlite"), timeout=60, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, node TEXT, size INTEGER, created REAL, last_access REAL, hits INTEGER)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        # Running total size of the entries, so puts do not sum the whole index
+        self._db.execute("CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN "
+                         "UPDATE counters SET value = value + NEW.size WHERE name = 'size'; END")
+        self._db.execute("CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN "
+                         "UPDATE counters SET value = value + NEW.size - OLD.size WHERE name = 'size'; END")
+        self._db.execute("CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN "
+                         "UPDATE counters SET value = value - OLD.size WHERE name = 'size'; END")
+        self._db.execute("INSERT OR IGNORE INTO counters SELECT 'size', COALESCE(SUM(size), 0) FROM entries")
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.path, "objects", key[:2], f"{key}.pkl")
+
+    def _count(self, name: str) -> None:
+        self._db.execute("INSERT INTO counters VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1", (name,))
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        """
+        Get a value from the cache
+
+        Args:
+            key (str): The key of the value
+
+        Returns:
+            tuple[bool, any]: Whether the key was found and the cached value (None if not found)
+        """
+
+        found = self._db.execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone() is not None
+        if found:
+            try:
+                with open(self._file(key), "rb") as f:
+                    value = pickle.load(f)
+            except Exception as e:
+                log.warning(f"Discarding unreadable cache entry {key}: {e}")
+                self._remove(key)
+                found = False
+
+        if not found:
+            self._count("misses")
+            return False, None
+
+        self._db.execute("UPDATE entries SET last_access = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+        self._count("hits")
+        return True, value
+
+    def put(self, key: str, value: Any, node: str = "") -> None:
+        """
+        Add a value to the cache. Values that can not be pickled are not cached.
+
+        Args:
+            key (str): The key of the value
+            value (any): The value to cache
+            node (str, optional): Name of the node that produced the value. Defaults to "".
+        """
+
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            log.debug(f"Not caching the outputs of node {node}: {e}")
+            return
+
+        # Write to a temporary file first so readers never see partial values
+        file = self._file(key)
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        tmp_file = f"{file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(data)
+        os.replace(tmp_file, file)
+
+        now = time.time()
+        self._db.execute("INSERT INTO entries VALUES (?, ?, ?, ?, ?, 0) ON CONFLICT(key) DO UPDATE SET node = excluded.node, "
+                         "size = excluded.size, created = excluded.created, last_access = excluded.last_access, hits = 0",
+                         (key, node, len(data), now, now))
+        self._evict()
+
+    def _evict(self) -> None:
+        """
+        Remove the least recently used entries until the cache fits in `max_size`
+        """
+
+        total = self._db.execute("SELECT value FROM counters WHERE name = 'size'").fetchone()[0]
+        while total > self.max_size:
+            oldest = self._db.execute("SELECT key, size FROM entries ORDER BY last_access LIMIT 64").fetchall()
+            if len(oldest) == 0:
+                break
+            for key, size in oldest:
+                if total <= self.max_size:
+                    break
+                self._remove(key)
+                total -= size
+                self._count("evictions")
+
+    def _remove(self, key: str) -> None:
+        self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        try:
+            os.remove(self._file(key))
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get the cache statistics
+
+        Returns:
+            dict[str, int]: Number of entries, total size and maximum size in bytes, and number of hits, misses and evictions
+        """
+
+        entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        counters = dict(self._db.execute("SELECT name, value FROM counters").fetchall())
+
+        return {
+            "entries": entries,
+            "size": counters.get("size", 0),
+            "max_size": self.max_size,
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "evictions": counters.get("evictions", 0),
+        }
+
+    def clear(self) -> None:
+        """
+        Remove every entry and reset the statistics
+        """
+
+        for (key,) in self._db.execute("SELECT key FROM entries").fetchall():
+            self._remove(key)
+        self._db.execute("DELETE FROM counters WHERE name != 'size'") # The size is back to 0
+
+    def close(self) -> None:
+        """
+        Close the index database
+        """
+
+        self._db.close()
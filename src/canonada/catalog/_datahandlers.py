@@ -1,4 +1,7 @@
+import asyncio
 import csv
+import glob
+import io
 import json
 import os
 import sys
@@ -31,6 +34,19 @@ else:
         def release(self):
             fcntl.flock(self.file, fcntl.LOCK_UN)
 
+def _acquire_lock(file) -> FileLock:
+    """
+    Lock an open file, waiting while another process holds the lock
+    """
+
+    lock = FileLock(file)
+    while True:
+        try:
+            lock.acquire()
+            return lock
+        except (BlockingIOError, OSError):
+            time.sleep(0.1)  # Wait if the file is already open
+            log.debug("Waiting for file lock")
 
 class Datahandler():
     """
@@ -81,9 +97,36 @@ class Datahandler():
     def __iter__(self) -> Generator[tuple[Any, dict], Any, None]:
         for key, file in self.index.items():
             yield key, self._load(file)
+
+    def iter_keys(self) -> Generator[str|tuple, Any, None]:
+        """
+        Iterate over the keys of the dataset without loading any data. Items can be loaded afterwards with `datahandler[key]`.
+        """
+
+        yield from self.index.keys()
+
+    def sorted_keys(self) -> bool:
+        """
+        Whether `iter_keys` yields the keys in ascending order. Lets pipelines joining datasets merge their keys as they are
+        streamed instead of indexing them in memory. Returns False by default.
+        """
+        return False
     
     def __getitem__(self, key: str|tuple) -> Any:
         return self._load(self.index[key])
+
+    def nbytes(self, key: str|tuple) -> int|None:
+        """
+        Get the size in bytes of the stored item (e.g. its file size), used to estimate the memory needed to process it.
+        Returns the size of the indexed file by default, or None if unknown.
+
+        Args:
+            key (str|tuple): The key of the item.
+        """
+        location = self.index.get(key)
+        if isinstance(location, (str, Path)) and os.path.isfile(location):
+            return os.path.getsize(location)
+        return None
     
     def _load(self, file: Path) -> Any:
         """
@@ -103,6 +146,57 @@ class Datahandler():
         """
         raise NotImplementedError("Datahandler must implement the 'save' method.")
 
+    async def aload(self, key: str|tuple) -> Any:
+        """
+        Load an item asynchronously (used by pipelines in asyncio mode). Runs `datahandler[key]` in a thread by default,
+        datahandlers with native async I/O can override it.
+
+        Args:
+            key (str|tuple): The key of the item to load.
+        """
+        return await asyncio.to_thread(self.__getitem__, key)
+
+    async def asave(self, kwargs: dict) -> None:
+        """
+        Save data asynchronously (used by pipelines in asyncio mode). Runs `save` in a thread by default, datahandlers with
+        native async I/O can override it.
+
+        Args:
+            kwargs (dict): The data to save.
+        """
+        await asyncio.to_thread(self.save, kwargs)
+
+    def as_loaded(self, data: Any) -> Any:
+        """
+        Convert data given in the format accepted by `save` to the format it would have once saved and loaded again. Used
+        to pass datasets in memory between pipelines. Returns the data unchanged by default.
+
+        Args:
+            data (any): The data in the format accepted by `save`.
+        """
+        return data
+
+    def set_shard(self, index: int, count: int) -> None:
+        """
+        Called on the output datahandlers of a sharded pipeline run, one of `count` independent runs processing disjoint
+        slices of the master items. Datahandlers saving every item to one shared file should save to a file per shard
+        instead, merged into the dataset by `merge_shards`. Does nothing by default (e.g. one file per item).
+
+        Args:
+            index (int): The shard of the run (from 0 to count - 1).
+            count (int): The number of shards.
+        """
+        pass
+
+    def merge_shards(self) -> int:
+        """
+        Merge the files saved by sharded runs (see `set_shard`) into the dataset. Does nothing by default.
+
+        Returns:
+            int: The number of merged shard files.
+        """
+        return 0
+
 def check_datahandler(datahandler: Datahandler) -> bool:
     """
     Check if a given datahandler class implements the minimum required methods.
@@ -145,6 +239,10 @@ def check_datahandler(datahandler: Datahandler) -> bool:
         log.warning("Datahandler has no '__iter__' method")
         return False
 
+    if not callable(getattr(datahandler, "iter_keys", None)):
+        log.warning("Datahandler has no 'iter_keys' method")
+        return False
+
     if not callable(getattr(datahandler, "__getitem__", None)):
         log.warning("Datahandler has no '__getitem__' method")
         return False
@@ -200,6 +298,7 @@ class JsonMulti(Datahandler):
                 # Strip preceding path and extension
                 filename = file.stem
                 self.index[filename] = file
+            self.index = dict(sorted(self.index.items())) # Filenames are streamed in order
         else:
             for file in files:
                 keys_values = []
@@ -236,6 +335,10 @@ class JsonMulti(Datahandler):
                 log.error(f"Error loading file '{file}': {e}")
                 return {}
 
+    def sorted_keys(self) -> bool:
+        # Filename keys are sorted, values of the key fields may not be comparable
+        return len(self.keys) == 0
+
     def save(self, kwargs:dict) -> None:
         """
         Save data to a json file. Files are saved in the root path of the dataset.
@@ -262,6 +365,12 @@ class JsonMulti(Datahandler):
         with open(os.path.join(self.path, f"{kwargs['filename']}.json"), "w") as f:
             json.dump(kwargs["data"], f)
 
+    def as_loaded(self, data: Any) -> Any:
+        # Only the data is loaded back, not the filename
+        if isinstance(data, dict) and "filename" in data and "data" in data:
+            return data["data"]
+        return data
+
 class CSVRows(Datahandler):
     """
     Loads and indexes a CSV file by rows. The first row is considered the header.
@@ -283,6 +392,7 @@ class CSVRows(Datahandler):
         if "path" not in kwargs:
             raise ValueError("No path provided for csv_datahandler.")
         self.path = kwargs["path"]
+        self.shard_path: str|None = None # File saved to by a sharded run
 
         # Load the headers
         if "headers" in kwargs:
@@ -323,6 +433,14 @@ class CSVRows(Datahandler):
     
     def __getitem__(self, key) -> Any:
         return self.index[key]
+
+    async def aload(self, key) -> Any:
+        # Rows are already in memory
+        return self.index[key]
+
+    def sorted_keys(self) -> bool:
+        # Row numbers are in order
+        return len(self.keys) == 0
     
     def _load(self, file) -> dict:
         with open(file, 'r') as f:
@@ -341,20 +459,59 @@ class CSVRows(Datahandler):
         if "path" not in self.kwargs:
             raise ValueError("No path provided for csv_rows.")
 
-        with open(self.kwargs["path"], 'a') as f:
-            lock = FileLock(f)
-            while True:
-                try:
-                    lock.acquire()
-                    break  # Lock acquired
-                except (BlockingIOError, OSError):
-                    time.sleep(0.1)  # Wait if the file is already open
-                    log.debug("Waiting for file lock")
-
+        with open(self.shard_path or self.kwargs["path"], 'a') as f:
+            lock = _acquire_lock(f)
             writer = csv.DictWriter(f, fieldnames=self.headers)
+            # Shard files start with the header, like the dataset file
+            if self.shard_path is not None and os.fstat(f.fileno()).st_size == 0:
+                writer.writeheader()
             writer.writerow(kwargs)
             lock.release()
 
+    def as_loaded(self, data: Any) -> Any:
+        # Write the row and read it back, values are loaded as strings
+        buffer = io.StringIO()
+        csv.DictWriter(buffer, fieldnames=self.headers).writerow(data)
+        buffer.seek(0)
+        return next(csv.DictReader(buffer, fieldnames=self.headers, skipinitialspace=True))
+
+    def _shard_file(self, shard: str) -> str:
+        root, ext = os.path.splitext(self.kwargs["path"])
+        return f"{root}.shard-{shard}{ext}"
+
+    def set_shard(self, index: int, count: int) -> None:
+        """
+        Save the rows of a sharded run to a file of its own next to the dataset file (e.g. `data.shard-0-of-4.csv`), so the
+        shards do not contend on the lock of the dataset file.
+        """
+
+        self.shard_path = self._shard_file(f"{index}-of-{count}")
+
+    def merge_shards(self) -> int:
+        """
+        Append the rows of the shard files to the dataset file and remove them.
+
+        Returns:
+            int: The number of merged shard files.
+        """
+
+        root, ext = os.path.splitext(self.kwargs["path"])
+        shard_files = sorted(glob.glob(f"{glob.escape(root)}.shard-*-of-*{glob.escape(ext)}"))
+        if len(shard_files) == 0:
+            return 0
+
+        with open(self.kwargs["path"], 'a') as f:
+            lock = _acquire_lock(f)
+            for shard_file in shard_files:
+                with open(shard_file, 'r') as shard:
+                    reader = csv.DictReader(shard, skipinitialspace=True)
+                    writer = csv.DictWriter(f, fieldnames=self.headers or reader.fieldnames or [])
+                    writer.writerows(reader)
+                os.remove(shard_file)
+            lock.release()
+
+        return len(shard_files)
+
 
 # Register of all built in datasets
 available_datahandlers = {
@@ -8,9 +8,11 @@ from graphviz import Digraph # type: ignore
 from ._version import __version__
 from ._config import config
 from ._logger import logger as log
+from .cache import Cache
+from .catalog import get as catalog_get
 from .catalog import ls as catalog_ls
 from .catalog import params as catalog_params
-from .pipeline import Pipeline
+from .pipeline import Pipeline, run_worker
 from .system import System
 
 
@@ -67,7 +69,7 @@ def cli_core() -> None:
         
         case "catalog":
             if len(args) < 3:
-                log.error("No command provided. Options are 'list' and 'params'")
+                log.error("No command provided. Options are 'list', 'params' and 'merge'")
                 print_usage()
                 raise ValueError("No command provided")
 
@@ -82,8 +84,18 @@ def cli_core() -> None:
                     params = catalog_params()
                     print(params)
 
+                case "merge":
+                    # Merge the files saved by sharded runs into the datasets
+                    if len(args) < 4:
+                        log.error("No dataset name provided")
+                        print_usage()
+                        raise ValueError("No dataset name provided")
+                    for dataset in args[3:]:
+                        merged = catalog_get(dataset).merge_shards()
+                        print(f"{dataset}: merged {merged} shard files")
+
                 case _:
-                    log.error("Command not recognized. Options are 'list' and 'params'")
+                    log.error("Command not recognized. Options are 'list', 'params' and 'merge'")
                     print_usage()
 
         case "registry":
@@ -120,31 +132,71 @@ def cli_core() -> None:
                     print_usage()       
             
         case "run":
-            if len(args) < 4:
+            # Split names from options
+            names, options = parse_options(args[3:], {"--chunksize", "--to-outputs", "--from-nodes", "--listen", "--shard"}, flags={"--resume"})
+            resume = "--resume" in options
+            if len(args) < 4 or len(names) == 0:
                 log.error("No pipeline(s) or system(s) name provided")
                 print_usage()
                 raise ValueError("No pipeline(s) or system(s) name provided")
+
+            chunksize: int|str|None = None
+            if "--chunksize" in options:
+                value = options["--chunksize"]
+                if value != "auto" and (not value.isdigit() or int(value) < 1):
+                    raise ValueError(f"Invalid chunksize '{value}'. Must be a positive integer or 'auto'.")
+                chunksize = value if value == "auto" else int(value)
+
+            # Partial execution (pipelines only)
+            to_outputs = [o.strip() for o in options["--to-outputs"].split(",") if o.strip()] if "--to-outputs" in options else None
+            from_nodes = [n.strip() for n in options["--from-nodes"].split(",") if n.strip()] if "--from-nodes" in options else None
+            if (to_outputs is not None or from_nodes is not None) and args[2] != "pipelines":
+                raise ValueError("--to-outputs and --from-nodes are only supported when running pipelines")
+
+            # Distributed execution (pipelines only)
+            listen = options.get("--listen")
+            if listen is not None and args[2] != "pipelines":
+                raise ValueError("--listen is only supported when running pipelines")
+
+            # Sharded execution (pipelines only), given as index/count
+            shard: tuple[int, int]|None = None
+            if "--shard" in options:
+                index, _, count = options["--shard"].partition("/")
+                if not index.isdigit() or not count.isdigit() or int(index) >= int(count):
+                    raise ValueError(f"Invalid shard '{options['--shard']}'. Must be i/N with 0 <= i < N.")
+                shard = (int(index), int(count))
+                if args[2] != "pipelines":
+                    raise ValueError("--shard is only supported when running pipelines")
             
             # Run requested pipeline(s) or system(s)
             match args[2]:
                 case "pipelines":
-                    for pipeline in args[3:]:
+                    for pipeline in names:
                         ran = False
                         for p in Pipeline.registry:
                             if p.name == pipeline:
-                                p()
+                                if chunksize is not None:
+                                    p.chunksize = chunksize
+                                if to_outputs is not None:
+                                    p.to_outputs = to_outputs
+                                if from_nodes is not None:
+                                    p.from_nodes = from_nodes
+                                p.run(resume=resume, listen=listen, shard=shard)
                                 ran = True
                                 break
                         if not ran:
                             log.error(f"Pipeline {pipeline} not found")
 
                 case "systems":
-                    for system in args[3:]:
+                    for system in names:
                         ran = False
                         for s in System.registry:
                             ran = False
                             if s.name == system:
-                                s()
+                                if chunksize is not None:
+                                    for p in s.pipeline:
+                                        p.chunksize = chunksize
+                                s.run(resume=resume)
                                 ran = True
                                 break
                         if not ran:
@@ -193,6 +245,49 @@ def cli_core() -> None:
                     print_usage()
                     raise ValueError("Command not recognized")
 
+        case "cache":
+            if len(args) < 3:
+                log.error("No command provided. Options are 'stats' and 'clear'")
+                print_usage()
+                raise ValueError("No command provided")
+
+            match args[2]:
+                case "stats":
+                    # Show the node result cache statistics
+                    cache = Cache()
+                    stats = cache.stats()
+                    cache.close()
+                    print(f"Path: {cache.path}")
+                    print(f"Entries: {stats['entries']}")
+                    print(f"Size: {stats['size'] / 2**20:.1f} MiB / {stats['max_size'] / 2**20:.1f} MiB")
+                    lookups = stats["hits"] + stats["misses"]
+                    hit_rate = f" ({100 * stats['hits'] / lookups:.1f}% hit rate)" if lookups > 0 else ""
+                    print(f"Hits: {stats['hits']}, misses: {stats['misses']}{hit_rate}")
+                    print(f"Evictions: {stats['evictions']}")
+
+                case "clear":
+                    # Remove every cached node result
+                    cache = Cache()
+                    cache.clear()
+                    cache.close()
+                    print("Cache cleared")
+
+                case _:
+                    log.error("Command not recognized. Options are 'stats' and 'clear'")
+                    print_usage()
+
+        case "worker":
+            # Process the items of a pipeline run by a coordinator (canonada run pipelines <name> --listen host:port)
+            _, options = parse_options(args[2:], {"--connect", "--processes"})
+            if "--connect" not in options:
+                log.error("No coordinator address provided")
+                print_usage()
+                raise ValueError("No coordinator address provided")
+            processes = options.get("--processes", str(os.cpu_count() or 1))
+            if not processes.isdigit() or int(processes) < 1:
+                raise ValueError(f"Invalid number of processes '{processes}'. Must be a positive integer.")
+            run_worker(options["--connect"], int(processes))
+
         case "version":
             # Print the version of the package
             print(f"Canonada version: {__version__}")
@@ -203,6 +298,44 @@ def cli_core() -> None:
             raise ValueError("Command not recognized")
 
 
+def parse_options(args: list[str], valid_options: set[str], flags: set[str] = set()) -> tuple[list[str], dict[str, str]]:
+    """
+    Split command line arguments into positional arguments and `--option value` pairs
+
+    Args:
+        args (list[str]): The arguments to parse
+        valid_options (set[str]): The accepted options (including the leading `--`)
+        flags (set[str], optional): The accepted options that take no value. Present flags are set to "true".
+
+    Returns:
+        tuple[list[str], dict[str, str]]: The positional arguments and a dictionary of options
+    """
+
+    positional: list[str] = []
+    options: dict[str, str] = {}
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg.startswith("--"):
+            option, _, value = arg.partition("=")
+            if option in flags:
+                options[option] = "true"
+                i += 1
+                continue
+            if option not in valid_options:
+                raise ValueError(f"Unknown option '{option}'")
+            if value == "":
+                if i + 1 >= len(args):
+                    raise ValueError(f"No value provided for option '{option}'")
+                i += 1
+                value = args[i]
+            options[option] = value
+        else:
+            positional.append(arg)
+        i += 1
+
+    return positional, options
+
 def create_new_project(name: str) -> None:
     """
     Build the directory structure and files for a new project
@@ -272,9 +405,15 @@ Usage: canonada <command> <args>
 Commands:
     new <project_name> - Create a new project
     catalog [list/params] - List all available datasets or get the project parameters
+    catalog merge <dataset(s)> - Merge the files saved by sharded runs into the datasets
     registry [pipelines/systems] - List all available pipelines or systems
-    run [pipelines/systems] <name(s)> - Run a pipeline or system
+    run [pipelines/systems] <name(s)> [--chunksize <n|auto>] [--resume] - Run a pipeline or system (--resume skips the items finished by the last interrupted run of pipelines with checkpoint=True)
+        [--to-outputs <a,b>] [--from-nodes <n>] - Only run the nodes needed for some outputs or downstream of some nodes (pipelines only)
+        [--listen <host:port>] - Distribute the items to the workers connecting to this address (pipelines only)
+        [--shard <i/N>] - Only run the items of shard i (0 <= i < N), for N independent runs (pipelines only)
+    worker --connect <host:port> [--processes <n>] - Process the items of a pipeline run distributed by a coordinator
     view [pipelines/systems] <name(s)> - View a pipeline or system
+    cache [stats/clear] - Show the node result cache statistics or clear the cache
     version - Print the version of Canonada
     
 """)
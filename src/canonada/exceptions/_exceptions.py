@@ -8,6 +8,10 @@ class SkipItem(Exception):
         self.message: str = message
         self.master_key: tuple = master_key
 
+    def __reduce__(self):
+        # Keep the message and master key when sent between processes
+        return (self.__class__, (self.master_key, self.message))
+
     def __str__(self) -> str:
         return f"Item '{self.master_key}' requested to skip its execution: {self.message}"
 
@@ -21,5 +25,9 @@ class StopPipeline(Exception):
         self.message: str = message
         self.master_key: tuple = master_key
 
+    def __reduce__(self):
+        # Keep the message and master key when sent between processes
+        return (self.__class__, (self.master_key, self.message))
+
     def __str__(self) -> str:
         return f"Item '{self.master_key}' requested to stop the pipeline execution: {self.message}"
\ No newline at end of file
@@ -3,4 +3,6 @@ Manage pipelines and nodes
 """
 
 from ._core import Node as Node
-from ._core import Pipeline as Pipeline
\ No newline at end of file
+from ._core import Pipeline as Pipeline
+from ._core import Reducer as Reducer
+from ._distributed import run_worker as run_worker
\ No newline at end of file
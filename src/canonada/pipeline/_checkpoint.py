@@ -0,0 +1,106 @@
+import json
+import os
+import time
+from typing import Any, Iterable
+
+from .._config import config
+
+
+def encode_key(master_key: Any) -> str:
+    """
+    Encode a master key as a single line of the checkpoint journal
+    """
+
+    return json.dumps(master_key, default=repr, separators=(",", ":"))
+
+class _Checkpoint():
+    """
+    Append-only journal of the master keys processed successfully by a pipeline, used to resume interrupted runs.
+    Keys are buffered and written in batches, so checkpointing does not slow down the pipeline.
+    """
+
+    def __init__(self, pipeline_name: str, resume: bool, flush_size: int = 1000, flush_interval: float = 1.0) -> None:
+        """
+        Open the journal of a pipeline.
+
+        Args:
+            pipeline_name (str): Name of the pipeline
+            resume (bool): Keep the keys journaled by a previous run (to skip them). Otherwise the journal is emptied.
+            flush_size (int, optional): Number of buffered keys that triggers a write. Defaults to 1000.
+            flush_interval (float, optional): Maximum time in seconds a key is buffered. Defaults to 1.0.
+        """
+
+        directory = config.get("checkpoint", {}).get("path", "data/.checkpoints")
+        os.makedirs(directory, exist_ok=True)
+        self.path: str = os.path.join(directory, f"{pipeline_name}.journal")
+        self.flush_size: int = flush_size
+        self.flush_interval: float = flush_interval
+        self.done: set[str] = self._read() if resume else set()
+        self._buffer: list[str] = []
+        self._last_flush: float = time.monotonic()
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+
+    def _read(self) -> set[str]:
+        """
+        Read the keys journaled by a previous run. A last line without a line break was interrupted and is ignored.
+        """
+
+        if not os.path.isfile(self.path):
+            return set()
+        with open(self.path, encoding="utf-8") as f:
+            lines = f.read().split("\n")
+
+        return set(lines[:-1]) # The last element is empty or incomplete
+
+    def pending(self, master_keys: Iterable) -> Iterable:
+        """
+        Filter out the master keys journaled by a previous run
+
+        Args:
+            master_keys (iterable): The master keys
+
+        Returns:
+            iterable: The master keys still to be processed
+        """
+
+        if len(self.done) == 0:
+            return master_keys
+        return (key for key in master_keys if encode_key(key) not in self.done)
+
+    def add(self, master_keys: Iterable) -> None:
+        """
+        Journal master keys processed successfully. Written once enough keys are buffered or enough time has passed.
+
+        Args:
+            master_keys (iterable): The master keys
+        """
+
+        self._buffer.extend(encode_key(key) for key in master_keys)
+        if len(self._buffer) >= self.flush_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Write the buffered keys to disk
+        """
+
+        if len(self._buffer) > 0:
+            self._file.write("".join(f"{key}\n" for key in self._buffer))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._buffer.clear()
+        self._last_flush = time.monotonic()
+
+    def close(self, completed: bool) -> None:
+        """
+        Close the journal
+
+        Args:
+            completed (bool): Whether every master key was processed successfully. The journal is removed, so the next run
+              starts from the beginning.
+        """
+
+        self.flush()
+        self._file.close()
+        if completed:
+            os.remove(self.path)
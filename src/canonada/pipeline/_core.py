@@ -1,63 +1,100 @@
-import copy
+import asyncio
+import contextlib
+import functools
+import hashlib
+import inspect
 import io
 import multiprocessing
+import os
 import threading
+import time
 import traceback
-from typing import Any, Callable
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator
 
 from .._config import config
 from .._logger import logger as log
 from .._utils.progressbar import ProgressBar
+from .._utils.size import parse_size
+from ..cache import Cache, fingerprint_function
 from ..catalog import Datahandler
 from ..catalog import get as catalog_get
 from ..catalog import ls as catalog_ls
 from ..catalog import params as catalog_params
 from ..exceptions import SkipItem, StopPipeline
+from ._checkpoint import _Checkpoint
+from ._distributed import _Coordinator
+from ._inputs import COPY_POLICIES, fingerprint, prepare_batch, prepare_input, split_batch
+from ._join import JOIN_TYPES, MISSING_POLICIES, _Join
+from ._sharding import shard_of
+from ._workers import _Autoscaler, _Chunker, _ChunkTimeout, _MemoryBudget, _Prefetcher, _ProcessPool, _ThreadPool, _Watchdog, peak_rss, reset_peak_rss, rss
 
 
-class _ThreadReturn(threading.Thread):
+# Per worker (thread or process) runtime state
+_worker_state = threading.local()
+
+def _local_state() -> dict[str, Any]:
     """
-    Custom Thread object that allows a value return on .join
+    Get the runtime state of the current worker (thread or process). State inherited from a parent process is discarded.
     """
 
-    def __init__(self, group=None, target=None, name=None,
-                 args=(), kwargs={}, Verbose=None):
-        threading.Thread.__init__(self, group, target, name, args, kwargs)
-        self._return = None
+    if getattr(_worker_state, "pid", None) != os.getpid():
+        _worker_state.pid = os.getpid()
+        _worker_state.data = {}
+
+    return _worker_state.data
+
+def _share_state(data: dict[str, Any]) -> None:
+    """
+    Make the current thread use the runtime state of another worker. Used by the threads running independent nodes.
+    """
 
-    def run(self):
-        if self._target is not None:
-            self._return = self._target(*self._args, **self._kwargs)
+    _worker_state.pid = os.getpid()
+    _worker_state.data = data
+    _worker_state.node_thread = True
 
-    def join(self, *args):
-        super().join(*args)
-        return self._return
+# Process pools running the nodes placed on "process" executors, shared by all the worker threads of a pipeline
+_process_executors: dict[str, tuple[int, ProcessPoolExecutor]] = {}
+_process_executors_lock = threading.Lock()
 
-class _ProcessReturn(multiprocessing.Process):
+def _call_in_process(node_name: str, func: Callable, setup: Callable|None, node_inputs: list) -> Any:
     """
-    Custom Process object that allows a value to return on .join
+    Call a node function in a process of a node process pool. The node setup runs once per pool process.
     """
 
-    def __init__(self, group=None, target=None, name=None, args=(), kwargs={}, daemon=None):
-        self._q = multiprocessing.Queue(maxsize=1)  # For result or exception
-        super().__init__(group=group, target=target, name=name, args=args, kwargs=kwargs, daemon=daemon)
+    if setup is not None:
+        state = _local_state()
+        key = f"node_setup:{node_name}"
+        if key not in state:
+            state[key] = setup()
+        node_inputs = [state[key]] + node_inputs
 
-    def run(self):
-        if self._target is not None:
-            result = self._target(*self._args, **self._kwargs)
-        else:
-            result = None
-        self._q.put(result, block=True)
+    output_data = func(*node_inputs)
+    if inspect.iscoroutine(output_data):
+        output_data = asyncio.run(output_data)
 
-    def join(self, *args):
-        super().join(*args)
-        if self.is_alive():
-            return None  
-        
-        # Process has finished
-        if not self._q.empty():
-            return self._q.get_nowait()
-        return None
+    return output_data
+
+# Where nodes can be placed to run
+EXECUTORS = ("inline", "thread", "process")
+# How the master items of a pipeline are processed
+MODES = ("process", "thread", "asyncio")
+
+class _ChunkResult():
+    """
+    Combined status of a pass of the pipeline over a chunk of master items
+    """
+
+    def __init__(self) -> None:
+        self.processed: int = 0 # Number of items processed
+        self.elapsed: float = 0.0 # Seconds spent processing the chunk
+        self.error: Exception|None = None # Error that should stop the pipeline (if any)
+        self.failed: list = [] # Master keys of the items that failed (with a tolerated error)
+        self.peak_memory: int|None = None # Peak memory used by the worker process while processing the chunk, in bytes
+        self.partials: dict[str, Any] = {} # Partial aggregates of the reducer nodes over the items processed successfully
+        self.prefetch_hits: int = 0 # Items whose inputs were prefetched before they were needed
+        self.prefetch_misses: int = 0 # Items whose inputs were still loading when needed
+        self.prefetch_stall: float = 0.0 # Seconds waited for the inputs of the missed items
 
 class Node():
     """
@@ -74,7 +111,9 @@ class Node():
 
         return cls.registry
 
-    def __init__(self, name:str, input:list[str], output:list[str], func:Callable, description:str="") -> None:
+    def __init__(self, name:str, input:list[str], output:list[str], func:Callable, description:str="", copy_inputs:str|None=None,
+                 batch_size:int|None=None, setup:Callable|None=None, teardown:Callable|None=None, executor:str|None=None,
+                 cache:bool|None=None, timeout:float|None=None) -> None:
         """
         Instantiate a new node.
 
@@ -84,6 +123,27 @@ class Node():
             output (list[str]): The list of output arguments to the node given as strings.
             func (callable): The function to be executed by the node.
             description (str, optional): A description of the node. Defaults to "".
+            copy_inputs (str, optional): How inputs are passed to the node: "deep" (deep copy), "none" (by reference) or
+              "readonly" (read-only containers and arrays, modifying them raises an error). Defaults to None (use the
+              pipeline policy).
+            batch_size (int, optional): Call the node once for up to `batch_size` master items. Each (non parameter) input is
+              passed as a list with one value per item, or as a stacked NumPy array if all the values are arrays of the same
+              shape. Each output must be a sequence (or array) with one value per item. Defaults to None (one item per call).
+            setup (callable, optional): Function called once per worker (thread or process) before the node first runs. Its
+              return value (e.g. a loaded model) is passed as the first argument of every call to `func` on that worker.
+              Defaults to None.
+            teardown (callable, optional): Function called with the value returned by `setup` when the worker finishes.
+              Defaults to None.
+            executor (str, optional): Where the node runs: "inline" (in the worker handling the item), "thread" (on a thread
+              pool of the worker, e.g. for blocking I/O) or "process" (on a process pool, e.g. for CPU heavy pure Python code
+              in a multithreaded pipeline). Inputs and outputs of "process" nodes are pickled, unless the worker already is a
+              separate process, in which case the node runs inline. Teardowns are not called in the process pool. Defaults
+              to None (inline, or on the thread pool when running independent nodes with `parallel_nodes`).
+            cache (bool, optional): Cache the outputs of the node on disk, keyed by its code and inputs (including the
+              parameters it uses). Defaults to None (use the pipeline setting).
+            timeout (float, optional): Maximum seconds a call of the node may take. The worker running a call that exceeds
+              it is stopped and replaced, and the item fails. In asyncio mode only coroutine functions are interrupted.
+              Defaults to None (no limit).
         """
         
         self.name:str = name
@@ -91,18 +151,43 @@ class Node():
         self.input: list = input
         self.output: list = output
         self.func: Callable = func
-
-        # Check that the node name is unique and not empty
+        self.copy_inputs: str|None = copy_inputs
+        self.batch_size: int|None = batch_size
+        self.setup: Callable|None = setup
+        self.teardown: Callable|None = teardown
+        self.executor: str|None = executor
+        self.cache: bool|None = cache
+        self.timeout: float|None = timeout
+
+        # Check that the node name is not empty
         if self.name == "":
             raise ValueError("Node name cannot be empty")
-        if self.name in [node.name for node in Node.registry]:
-            raise ValueError(f"Node name '{self.name}' is not unique")
 
         assert len(set(input)) == len(input), "Input list contains duplicates"
         assert len(set(output)) == len(output), "Output list contains duplicates"
         assert callable(self.func), "Function is not callable"
+        assert self.setup is None or callable(self.setup), "Setup function is not callable"
+        assert self.teardown is None or callable(self.teardown), "Teardown function is not callable"
+        assert self.teardown is None or self.setup is not None, "Teardown function requires a setup function"
+        if self.copy_inputs is not None and self.copy_inputs not in COPY_POLICIES:
+            raise ValueError(f"Invalid copy_inputs '{self.copy_inputs}'. Options are {COPY_POLICIES}")
+        if self.executor is not None and self.executor not in EXECUTORS:
+            raise ValueError(f"Invalid executor '{self.executor}'. Options are {EXECUTORS}")
+        if self.batch_size is not None and (not isinstance(self.batch_size, int) or self.batch_size < 1):
+            raise ValueError(f"Invalid batch_size '{self.batch_size}'. Must be a positive integer or None.")
+        if self.timeout is not None and self.timeout <= 0:
+            raise ValueError(f"Invalid timeout '{self.timeout}'. Must be a positive number of seconds or None.")
+
+        self._register()
+
+    def _register(self) -> None:
+        """
+        Add the node to the registry. The node name must be unique.
+        """
+
+        if self.name in [node.name for node in Node.registry]:
+            raise ValueError(f"Node name '{self.name}' is not unique")
 
-        # Register the node
         Node.registry.append(self)
     
     def __repr__(self) -> str:
@@ -116,7 +201,99 @@ class Node():
             repr_buffer.write(f"\n\tdescription: {self.description}")
 
         return repr_buffer.getvalue()
-    
+
+class Reducer(Node):
+    """
+    Node aggregating its inputs across all the master items of a pipeline run (e.g. the maximum of a dataset). Each worker
+    accumulates the items it processes successfully into a partial aggregate, and the partial aggregates are combined
+    once every item is processed. The finalized outputs are saved (if in the catalog) and passed to the nodes reading
+    them, which run once at the end of the run.
+    """
+
+    def __init__(self, name:str, input:list[str], output:list[str], init:Callable, accumulate:Callable, combine:Callable,
+                 finalize:Callable|None=None, description:str="") -> None:
+        """
+        Instantiate a new reducer node.
+
+        Args:
+            name (str): The name of the node.
+            input (list[str]): The list of input arguments of `accumulate`, given as strings. Read once per master item.
+            output (list[str]): The list of outputs of `finalize`, given as strings.
+            init (callable): Function returning an empty partial aggregate.
+            accumulate (callable): Function adding the inputs of an item to a partial aggregate, called as
+              `accumulate(partial, *inputs)`. Returns the updated partial aggregate.
+            combine (callable): Function merging two partial aggregates into one. Must not depend on the order of the items.
+            finalize (callable, optional): Function computing the outputs from the combined aggregate. Defaults to None (the
+              aggregate is the output).
+            description (str, optional): A description of the node. Defaults to "".
+        """
+
+        super().__init__(name=name, input=input, output=output, func=accumulate, description=description)
+        self.init: Callable = init
+        self.accumulate: Callable = accumulate
+        self.combine: Callable = combine
+        self.finalize: Callable|None = finalize
+
+        assert callable(self.init), "Init function is not callable"
+        assert callable(self.combine), "Combine function is not callable"
+        assert self.finalize is None or callable(self.finalize), "Finalize function is not callable"
+
+def _is_identity(func: Callable) -> bool:
+    """
+    Check whether a function just returns its only argument (e.g. `lambda x: x`)
+    """
+
+    code = getattr(func, "__code__", None)
+    return code is not None and code.co_argcount == 1 and code.co_code == _IDENTITY_CODE and not inspect.iscoroutinefunction(func)
+
+_IDENTITY_CODE = (lambda x: x).__code__.co_code
+
+class _Chain():
+    """
+    Call a sequence of single output functions, passing the output of each function to the next one
+    """
+
+    def __init__(self, funcs: list[Callable]) -> None:
+        self.funcs = funcs
+
+    def __call__(self, *args: Any) -> Any:
+        value = self.funcs[0](*args)
+        for func in self.funcs[1:]:
+            # Unwrap the value as the node outputs would be (see `Pipeline._normalize_outputs`)
+            value = func(value[0] if isinstance(value, tuple) and len(value) == 1 else value)
+        return value
+
+class _AliasNode(Node):
+    """
+    Identity node of an execution plan. Its output is bound to its input without calling the node. Not registered.
+    """
+
+    def __init__(self, node: Node) -> None:
+        super().__init__(name=node.name, input=node.input, output=node.output, func=node.func, description=node.description)
+
+    def _register(self) -> None:
+        pass
+
+class _FusedNode(Node):
+    """
+    Linear chain of nodes of an execution plan fused into a single call. Each node passes its output straight to the
+    next one. Not registered.
+    """
+
+    def __init__(self, nodes: list[Node]) -> None:
+        super().__init__(
+            name = "+".join(node.name for node in nodes),
+            input = nodes[0].input,
+            output = nodes[-1].output,
+            func = _Chain([node.func for node in nodes]),
+            description = f"Fusion of nodes: {', '.join(node.name for node in nodes)}",
+            copy_inputs = nodes[0].copy_inputs,
+        )
+        self.nodes: list[Node] = nodes
+
+    def _register(self) -> None:
+        pass
+
 class Pipeline():
     """
     Pipeline data structure for canonada construction.
@@ -132,7 +309,13 @@ class Pipeline():
 
         return cls.registry
 
-    def __init__(self, name:str, nodes:list[Node], description:str="", max_workers:int|None=None, multiprocessing:bool=True, error_tolerant:bool=True) -> None:
+    def __init__(self, name:str, nodes:list[Node], description:str="", max_workers:int|str|None=None, multiprocessing:bool=True, error_tolerant:bool=True,
+                 max_tasks_per_worker:int|None=None, chunksize:int|str=1, parallel_nodes:bool=False, copy_inputs:str="deep",
+                 check_mutations:bool=False, shm_threshold:int|None=1 << 20, mode:str|None=None, max_concurrency:int=100,
+                 cache:bool=False, checkpoint:bool=False, prune:bool=False, to_outputs:list[str]|None=None,
+                 from_nodes:list[str]|None=None, optimize:bool=True, min_workers:int=1, memory_budget:int|str|None=None,
+                 item_timeout:float|None=None, join:str="left", missing:str="error",
+                 key_map:dict[str, Callable]|None=None, prefetch:int=0) -> None:
         """
         Instantiate a new pipeline.
 
@@ -140,29 +323,145 @@ class Pipeline():
             name (str): The name of the pipeline. This name will be used to call the pipeline from the command line. The name must be unique.
             nodes (list[Node]): The list of nodes in the pipeline.
             description (str, optional): A description of the pipeline. Defaults to "".
-            max_workers (int, optional): The maximum number of workers to use. Defaults to None (uses all available cores).
+            max_workers (int|str, optional): The maximum number of workers to use, or "auto" to adjust the number of workers
+              during the run from the measured throughput (between `min_workers` and the number of cores, or four times the
+              number of cores for threads). Defaults to None (uses all available cores).
             multiprocessing (bool, optional): Whether to use multiprocessing. Defaults to True.
             error_tolerant (bool, optional): If an error occurs inside the pipeline does not stop its execution. Defaults to True.
+            max_tasks_per_worker (int, optional): Number of items a worker process handles before being replaced by a fresh one.
+              Defaults to None (workers live for the whole run).
+            chunksize (int|str, optional): Number of master items sent to a worker at once. Set to "auto" to size the chunks
+              from the measured time per item. Defaults to 1.
+            parallel_nodes (bool, optional): Run the independent nodes of an item (nodes on the same topological level)
+              concurrently on a thread pool. Useful for I/O bound nodes or nodes that release the GIL. Not used by pipelines
+              with batch nodes. Defaults to False.
+            copy_inputs (str, optional): How inputs are passed to the nodes: "deep" (each node gets a deep copy), "none" (by
+              reference, nodes must not modify their inputs) or "readonly" (read-only containers and arrays, modifying them
+              raises an error). Can be overridden per node. Defaults to "deep".
+            check_mutations (bool, optional): Debug mode. Fingerprint the inputs of every node before and after the call and
+              raise an error if the node modified them in place. Defaults to False.
+            shm_threshold (int, optional): Buffers (e.g. NumPy arrays) of at least this many bytes are handed over between the
+              parent and the worker processes through shared memory instead of the pipe. Set to None to always use the pipe.
+              Defaults to 1 MiB.
+            mode (str, optional): How the master items are processed: "process" (pool of worker processes), "thread" (pool
+              of worker threads) or "asyncio" (a single event loop, coroutine nodes and async datahandler methods are
+              awaited). Defaults to None (set by `multiprocessing`).
+            max_concurrency (int, optional): Maximum number of master items in flight at once in asyncio mode. Defaults to
+              100.
+            cache (bool, optional): Cache the outputs of the nodes on disk and skip the nodes whose code and inputs did not
+              change since they were cached. Batch nodes are not cached. Can be overridden per node. Defaults to False.
+            checkpoint (bool, optional): Journal the master items processed successfully, so an interrupted or failed run
+              can be resumed with `run(resume=True)`. The journal is written to the `path` of the `[checkpoint]` section of
+              canonada.toml (defaults to "data/.checkpoints") and removed once every item succeeds. Defaults to False.
+            prune (bool, optional): Skip the nodes that do not contribute to any saved catalog output. Nodes run only for
+              their side effects are skipped too. Defaults to False.
+            to_outputs (list[str], optional): Only run the nodes needed to compute these outputs. Defaults to None (all).
+            from_nodes (list[str], optional): Only run these nodes, the nodes downstream of them and the nodes computing
+              their in-memory inputs. Catalog inputs are loaded. Defaults to None (all).
+            optimize (bool, optional): Optimize the execution plan before running: identity nodes (e.g. `lambda x: x`)
+              bind their output to their input without being called, and chains of nodes passing a single unsaved value
+              to a single consumer are fused into one call. Does not apply to `run_once`. Defaults to True.
+            min_workers (int, optional): The minimum number of workers when `max_workers` is "auto". Defaults to 1.
+            memory_budget (int|str, optional): Memory the items in flight may use, in bytes or with a unit (e.g. "8GB").
+              New items are held back once the budget is reached and items too large to share it run one at a time. The
+              memory of an item is estimated from the stored size of its inputs and the peak memory reported by the worker
+              processes. Defaults to None (no limit).
+            item_timeout (float, optional): Maximum seconds a master item may take to run through the pipeline. The worker
+              processing an item that exceeds it (or a node `timeout`) is stopped and replaced, the item fails and the
+              worker's remaining items are handed out again. Worker threads can not be stopped and are left running in the
+              background. In asyncio mode only awaits are interrupted. Defaults to None (no limit).
+            join (str, optional): How the master dataset (the first catalog input of the first node) is joined with the
+              other input datasets: "left" (every master item) or "inner" (only the master items found in every input
+              dataset). Defaults to "left".
+            missing (str, optional): What a left join does with an input dataset missing the key of a master item:
+              "error" (the item fails), "none" (the input is None) or "skip" (the item is skipped). Defaults to "error".
+            key_map (dict[str, callable], optional): Functions mapping a master key to the key of the item to load from
+              an input dataset, by dataset name. By default the master key is projected on the dataset `keys` when they
+              are a subset of the master dataset `keys`, and used as is otherwise. Defaults to None.
+            prefetch (int, optional): Number of master items whose inputs each worker loads ahead on a background thread
+              while it processes the current item. Read-ahead stays within the chunk of the worker, chunks are made at
+              least `prefetch + 1` items long. Not used by pipelines with batch nodes or in asyncio mode (inputs are
+              already loaded concurrently). The hit rate and the time spent waiting for inputs are logged at the end of
+              the run and kept in `prefetch_stats`. Defaults to 0 (inputs are loaded when the item starts).
         """
 
         self.name:str = name
         self.description:str = description
         self.nodes:list[Node] = nodes
-        self.max_workers: int|None = max_workers
+        self.max_workers: int|str|None = max_workers
+        self.min_workers: int = min_workers
+        self.memory_budget: int|None = parse_size(memory_budget) if memory_budget is not None else None
+        self.item_timeout: float|None = item_timeout
         self.multiprocessing: bool = multiprocessing
         self.error_tolerant: bool = error_tolerant
+        self.max_tasks_per_worker: int|None = max_tasks_per_worker
+        self.chunksize: int|str = chunksize
+        self.parallel_nodes: bool = parallel_nodes
+        self.copy_inputs: str = copy_inputs
+        self.check_mutations: bool = check_mutations
+        self.shm_threshold: int|None = shm_threshold
+        self.mode: str|None = mode
+        self.max_concurrency: int = max_concurrency
+        self.cache: bool = cache
+        self.checkpoint: bool = checkpoint
+        self.prune: bool = prune
+        self.to_outputs: list[str]|None = to_outputs
+        self.from_nodes: list[str]|None = from_nodes
+        self.optimize: bool = optimize
+        self.join: str = join
+        self.missing: str = missing
+        self.key_map: dict[str, Callable]|None = key_map
+        self.prefetch: int = prefetch
+        # Prefetching statistics of the last run: items prefetched in time (hits), items waited for (misses) and seconds waited
+        self.prefetch_stats: dict[str, float] = {}
         self._exec_order:list[Node] = []
+        self._exec_levels:list[list[Node]] = []
+        # Execution plan of `run`, the execution order rewritten by `_optimize_plan`. `run_once` keeps to the execution order,
+        # so it returns the outputs of every node
+        self._plan_order:list[Node] = []
+        self._plan_levels:list[list[Node]] = []
+        # Reducer nodes and the nodes reading their outputs, which run once at the end of the run
+        self._reducers:list[Reducer] = []
+        self._final_order:list[Node] = []
         self._input_datahandlers:dict[str, Datahandler] = {}
         self._output_datahandlers:dict[str, Datahandler] = {}
+        self._join:_Join|None = None
+        # Catalog datasets passed in memory between the nodes instead of read from the catalog, and those of them that are
+        # still saved. Only used by pipelines fused by a system.
+        self._intermediates:set[str] = set()
+        self._persist:set[str] = set()
+        # Overrides the show_progress setting of the configuration when not None (e.g. to run pipelines concurrently)
+        self._show_progress:bool|None = None
+        # Set in the worker processes, where nodes placed on a process executor run inline
+        self._in_worker_process:bool = False
 
         # Check that the pipeline name is unique and not empty
         if self.name == "":
             raise ValueError("Pipeline name cannot be empty")
 
+        if self.copy_inputs not in COPY_POLICIES:
+            raise ValueError(f"Invalid copy_inputs '{self.copy_inputs}'. Options are {COPY_POLICIES}")
+        if self.mode is not None and self.mode not in MODES:
+            raise ValueError(f"Invalid mode '{self.mode}'. Options are {MODES}")
+        if self.item_timeout is not None and self.item_timeout <= 0:
+            raise ValueError(f"Invalid item_timeout '{self.item_timeout}'. Must be a positive number of seconds or None.")
+        if self.join not in JOIN_TYPES:
+            raise ValueError(f"Invalid join '{self.join}'. Options are {JOIN_TYPES}")
+        if self.missing not in MISSING_POLICIES:
+            raise ValueError(f"Invalid missing '{self.missing}'. Options are {MISSING_POLICIES}")
+        if not isinstance(self.prefetch, int) or self.prefetch < 0:
+            raise ValueError(f"Invalid prefetch '{self.prefetch}'. Must be a non-negative number of items.")
+
+        self._register()
+
+    def _register(self) -> None:
+        """
+        Add the pipeline to the registry. The pipeline name must be unique.
+        """
+
         if self.name in [pipe.name for pipe in Pipeline.registry]:
             raise ValueError(f"Pipeline name '{self.name}' is not unique")
 
-        # Register the pipeline
         Pipeline.registry.append(self)
     
     def __repr__(self) -> str:
@@ -203,6 +502,11 @@ class Pipeline():
 
         # Reset the execution order (avoid duplicates)
         self._exec_order = []
+        self._exec_levels = []
+        self._plan_order = []
+        self._plan_levels = []
+        self._reducers = []
+        self._final_order = []
         self._input_datahandlers = {}
         self._output_datahandlers = {}
 
@@ -213,11 +517,15 @@ class Pipeline():
                 if output in outputs:
                     raise ValueError(f"The pipeline contains multiple nodes with the same output: {output}")
                 outputs.add(output)
+
+        # Only plan the nodes that have to run
+        nodes = self._select_nodes()
+        outputs = {output for node in nodes for output in node.output}
         
         # Check which outputs are in the catalog
         catalog_outputs: set = set()
         for output in outputs:
-            if output in catalog_ls():
+            if output in catalog_ls() and (output not in self._intermediates or output in self._persist):
                 catalog_outputs.add(output)
         
         # Make sure that no outputs are parameters
@@ -227,9 +535,10 @@ class Pipeline():
 
         # Check that no outputs can be known inputs
         known_inputs = set([ki for ki in known_inputs if ki[:8] != "params:"]) # Remove parameters from `known_inputs`
-        for node in self.nodes:
+        for node in nodes:
             for input in node.input:
-                if input in catalog_ls():
+                # Intermediates of fused pipelines are loaded when the node producing them is skipped
+                if input in catalog_ls() and (input not in self._intermediates or input not in outputs):
                     known_inputs.add(input)
         
         for known_input in known_inputs:
@@ -247,7 +556,7 @@ class Pipeline():
         known_inputs.update(params)
         
         # Calculate the execution order
-        nodes_to_process = self.nodes.copy()
+        nodes_to_process = nodes.copy()
         nodes_idx_processed = []
         # Start with the nodes that have no inputs until there are none left
         for i, node in enumerate(nodes_to_process):
@@ -262,7 +571,7 @@ class Pipeline():
             nodes_to_process.pop(idx)
         
         # Process the rest of the nodes
-        max_iter = len(self.nodes)
+        max_iter = len(nodes)
         iter_count = 0
         while len(nodes_to_process) > 0:  
             nodes_idx_processed = []
@@ -290,13 +599,194 @@ class Pipeline():
             if iter_count > max_iter:
                 raise ValueError("Pipeline contains a cycle")
                 break
-        
+
+        self._split_reducers(params)
+        self._exec_levels = self._calc_exec_levels(self._exec_order)
+        self._plan_order, self._plan_levels = self._exec_order, self._exec_levels
+
         # Log a warning for those outputs that are never used as inputs or saved
-        inputs: set[str] = set([i for node in self.nodes for i in node.input])
+        inputs: set[str] = set([i for node in nodes for i in node.input])
         for o in outputs:
             if o not in catalog_outputs and o not in inputs:
                 log.warning(f"Output named '{o}' is never used nor saved.")
     
+    def _split_reducers(self, params: set[str]) -> None:
+        """
+        Move the reducer nodes and the nodes downstream of them out of the execution order. Nodes downstream of a reducer
+        run once, so they may only read aggregated values and parameters.
+        """
+
+        aggregated: set[str] = set()
+        exec_order: list[Node] = []
+        for node in self._exec_order:
+            if isinstance(node, Reducer):
+                self._reducers.append(node)
+                aggregated.update(node.output)
+            elif len(aggregated.intersection(node.input)) > 0:
+                per_item = [input for input in node.input if input not in aggregated and input not in params]
+                if len(per_item) > 0:
+                    raise ValueError(f"Node '{node.name}' reads the outputs of a reducer, it can not also read per item "
+                                     f"inputs: {', '.join(per_item)}")
+                self._final_order.append(node)
+                aggregated.update(node.output)
+            else:
+                exec_order.append(node)
+        self._exec_order = exec_order
+
+    @staticmethod
+    def _calc_exec_levels(order: list[Node]) -> list[list[Node]]:
+        """
+        Group the nodes of an execution order into topological levels. Nodes on the same level do not depend on each other.
+        """
+
+        levels: list[list[Node]] = []
+        output_levels: dict[str, int] = {}
+        for node in order:
+            level = max([output_levels[i] + 1 for i in node.input if i in output_levels], default=0)
+            if level == len(levels):
+                levels.append([])
+            levels[level].append(node)
+            output_levels.update({o: level for o in node.output})
+
+        return levels
+
+    def _optimize_plan(self) -> None:
+        """
+        Rewrite the execution order into the execution plan of `run`: identity nodes become aliases of their input and
+        linear chains of nodes are fused into a single node. A chain link is a single output, not saved and read only by the
+        next node, which has no other inputs. Nodes with a setup, an executor, a batch size, a cache, a timeout or coroutine
+        functions are left as they are.
+        """
+
+        def plain(node: Node) -> bool:
+            cached = node.cache if node.cache is not None else self.cache
+            return node.setup is None and node.executor is None and node.batch_size is None and node.timeout is None \
+                and not cached and not inspect.iscoroutinefunction(node.func)
+
+        rewrites: list[str] = []
+
+        # Bind the output of identity nodes to their input
+        exec_order: list[Node] = []
+        for node in self._exec_order:
+            if len(node.input) == 1 and len(node.output) == 1 and plain(node) and _is_identity(node.func):
+                exec_order.append(_AliasNode(node))
+                rewrites.append(f"node {node.name} binds '{node.output[0]}' to '{node.input[0]}'")
+            else:
+                exec_order.append(node)
+
+        # Fuse linear chains of nodes
+        consumers: dict[str, int] = {}
+        for node in exec_order + self._reducers:
+            for input in node.input:
+                consumers[input] = consumers.get(input, 0) + 1
+        kept = set(self._output_datahandlers.keys()) | self._intermediates
+
+        chains: list[list[Node]] = []
+        chain_ends: dict[str, list[Node]] = {} # Output of the last node of a chain -> chain
+        for node in exec_order:
+            fusable = plain(node) and not isinstance(node, _AliasNode)
+            link = node.input[0] if len(node.input) == 1 else None
+            if fusable and len(node.output) == 1 and link in chain_ends and consumers[link] == 1 and link not in kept:
+                chain = chain_ends.pop(link)
+                chain.append(node)
+            else:
+                chain = [node]
+                chains.append(chain)
+            if fusable and len(node.output) == 1:
+                chain_ends[node.output[0]] = chain
+
+        self._plan_order = []
+        for chain in chains:
+            if len(chain) == 1:
+                self._plan_order.append(chain[0])
+                continue
+            fused = _FusedNode(chain)
+            self._plan_order.append(fused)
+            rewrites.append(f"nodes {', '.join(node.name for node in chain)} are fused into one call")
+        self._plan_levels = self._calc_exec_levels(self._plan_order)
+
+        if len(rewrites) > 0:
+            log.info(f"Optimized pipeline {self.name}: {'; '.join(rewrites)}")
+
+    def _select_nodes(self) -> list[Node]:
+        """
+        Select the nodes to run: the nodes in `from_nodes` and those downstream of them (if set), pruned to the nodes that
+        contribute to `to_outputs` (if set) or to a saved catalog output (if `prune` is enabled). Inputs produced by skipped
+        nodes are loaded from the catalog, inputs passed in memory are still computed by their nodes.
+
+        Returns:
+            list[Node]: The selected nodes, in pipeline order
+        """
+
+        nodes = self.nodes
+        node_names = {node.name for node in nodes}
+        producers = {output: node for node in nodes for output in node.output}
+
+        if self.from_nodes is not None:
+            unknown = set(self.from_nodes) - node_names
+            if len(unknown) > 0:
+                raise ValueError(f"Nodes not found in pipeline {self.name}: {', '.join(sorted(unknown))}")
+
+            # Add the nodes downstream of the starting nodes
+            selected = set(self.from_nodes)
+            produced = {output for node in nodes if node.name in selected for output in node.output}
+            changed = True
+            while changed:
+                changed = False
+                for node in nodes:
+                    if node.name not in selected and len(produced.intersection(node.input)) > 0:
+                        selected.add(node.name)
+                        produced.update(node.output)
+                        changed = True
+
+            # Add the nodes computing the inputs that can not be loaded from the catalog
+            catalog = set(catalog_ls())
+            changed = True
+            while changed:
+                changed = False
+                for node in nodes:
+                    if node.name not in selected:
+                        continue
+                    for input in node.input:
+                        producer = producers.get(input)
+                        if producer is not None and producer.name not in selected and input not in catalog:
+                            selected.add(producer.name)
+                            changed = True
+            nodes = [node for node in nodes if node.name in selected]
+
+        targets: set[str]|None = None
+        if self.to_outputs is not None:
+            targets = set(self.to_outputs)
+            unknown = targets - {output for node in nodes for output in node.output}
+            if len(unknown) > 0:
+                raise ValueError(f"Outputs not produced by the nodes to run in pipeline {self.name}: {', '.join(sorted(unknown))}")
+        elif self.prune:
+            catalog = set(catalog_ls())
+            targets = {
+                output for node in nodes for output in node.output
+                if output in catalog and (output not in self._intermediates or output in self._persist)
+            }
+
+        if targets is not None:
+            # Walk back from the targets to the nodes they depend on
+            needed = set(targets)
+            kept: set[str] = set()
+            changed = True
+            while changed:
+                changed = False
+                for node in nodes:
+                    if node.name not in kept and len(needed.intersection(node.output)) > 0:
+                        kept.add(node.name)
+                        needed.update(node.input)
+                        changed = True
+            nodes = [node for node in nodes if node.name in kept]
+
+        if len(nodes) < len(self.nodes):
+            kept_names = {node.name for node in nodes}
+            log.info(f"Pipeline {self.name} skips nodes: {', '.join(node.name for node in self.nodes if node.name not in kept_names)}")
+
+        return nodes
+
     def run_once(self, known_inputs:dict[str, Any]) -> dict[str, Any]:
         """
         Run the pipeline once with known inputs.
@@ -318,85 +808,879 @@ class Pipeline():
         # Add parameters to the known inputs
         known_inputs.update({f"params:{key}": value for key, value in params.items()})
 
-        # Execute the nodes in order
-        for node in self._exec_order:
-            log.debug(f"Running node: {node.name} for inputs: {known_inputs.keys()}")
-            # Prepare the inputs for the node
-            node_inputs = [copy.deepcopy(known_inputs[input_name]) for input_name in node.input]
-            # Run the node
-            output_data = node.func(*node_inputs)
-            # If the node does not return a tuple, check if a list/tuple is returned and wrap it in a tuple
-            if not isinstance(output_data, tuple):
-                output_data = (output_data,)
-            if len(output_data) != len(node.output):
-                if len(node.output) == 1:
-                    output_data = (output_data,)
-            # Update the known inputs
-            known_inputs.update({output: output_data[i] for i, output in enumerate(node.output)})
+        # Execute the nodes, reducers aggregate the single item
+        self._run_nodes(known_inputs, save=False, optimized=False)
+        if len(self._reducers) > 0:
+            self._accumulate(known_inputs)
+            self._reduce(self._take_partials(), known_inputs, save=False)
         
         return known_inputs # Now being the known outputs       
     
+    def _call_node(self, node: Node, known_inputs: dict[str, Any]) -> tuple:
+        """
+        Call a node with its inputs
+
+        Args:
+            node (Node): The node to call
+            known_inputs (dict[str, any]): The known inputs. Not modified.
+
+        Returns:
+            tuple: The node outputs, one element per declared output
+        """
+
+        if isinstance(node, _AliasNode):
+            return (known_inputs[node.input[0]],)
+
+        # Use the cached outputs if the node code and inputs did not change
+        cache_key = self._cache_key(node, known_inputs)
+        if cache_key is not None:
+            hit, output_data = self._cache().get(cache_key)
+            if hit:
+                log.debug(f"Using cached outputs of node: {node.name}")
+                return output_data
+
+        log.debug(f"Running node: {node.name}")
+        # Prepare the inputs for the node
+        node_inputs, fingerprints = self._node_inputs(node, known_inputs)
+        # Run the node
+        with self._node_deadline(node):
+            output_data = self._invoke(node, node_inputs)
+        # Check that the node did not modify its inputs in place
+        self._check_mutations(node, known_inputs, fingerprints)
+
+        output_data = self._normalize_outputs(node, output_data)
+        if cache_key is not None:
+            self._cache().put(cache_key, output_data, node.name)
+
+        return output_data
+
+    async def _acall_node(self, node: Node, known_inputs: dict[str, Any]) -> tuple:
+        """
+        Call a node with its inputs from the event loop (asyncio mode). Coroutine functions are awaited, nodes placed on a
+        thread or process executor run without blocking the event loop.
+
+        Args:
+            node (Node): The node to call
+            known_inputs (dict[str, any]): The known inputs. Not modified.
+
+        Returns:
+            tuple: The node outputs, one element per declared output
+        """
+
+        if isinstance(node, _AliasNode):
+            return (known_inputs[node.input[0]],)
+
+        cache_key = self._cache_key(node, known_inputs)
+        if cache_key is not None:
+            hit, cached = self._cache().get(cache_key)
+            if hit:
+                log.debug(f"Using cached outputs of node: {node.name}")
+                return cached
+
+        log.debug(f"Running node: {node.name}")
+        node_inputs, fingerprints = self._node_inputs(node, known_inputs)
+        if inspect.iscoroutinefunction(node.func):
+            if node.setup is not None:
+                node_inputs = [self._node_state(node)] + node_inputs
+            async with asyncio.timeout(node.timeout) as deadline:
+                try:
+                    output_data = await node.func(*node_inputs)
+                except TimeoutError:
+                    if deadline.expired():
+                        raise TimeoutError(f"Node {node.name} timed out (node timeout exceeded)")
+                    raise
+        elif node.executor in ("thread", "process"):
+            output_data = await asyncio.to_thread(self._invoke, node, node_inputs)
+        else:
+            output_data = self._invoke(node, node_inputs)
+        self._check_mutations(node, known_inputs, fingerprints)
+
+        output_data = self._normalize_outputs(node, output_data)
+        if cache_key is not None:
+            self._cache().put(cache_key, output_data, node.name)
+
+        return output_data
+
+    @contextlib.contextmanager
+    def _node_deadline(self, node: Node) -> Iterator[None]:
+        """
+        Report the deadline of a node call to the watchdog of the current worker (if the node has a timeout)
+        """
+
+        watchdog: _Watchdog|None = _local_state().get(f"{self.name}:watchdog") if node.timeout is not None else None
+        if watchdog is None:
+            yield
+            return
+        assert node.timeout is not None
+        watchdog.start_node(node.timeout)
+        try:
+            yield
+        finally:
+            watchdog.end_node()
+
+    def _cache_key(self, node: Node, known_inputs: dict[str, Any]) -> str|None:
+        """
+        Get the cache key of a node call: a hash of the node code (and setup), its inputs and its declared outputs.
+
+        Returns:
+            str|None: The key, or None if the node is not cached or an input can not be hashed
+        """
+
+        if not (node.cache if node.cache is not None else self.cache):
+            return None
+
+        h = hashlib.blake2b(digest_size=20)
+        h.update(fingerprint_function(node.func))
+        if node.setup is not None:
+            h.update(fingerprint_function(node.setup))
+        for input_name in node.input:
+            value_hash = fingerprint(known_inputs[input_name])
+            if value_hash is None:
+                log.debug(f"Not caching node {node.name}, input '{input_name}' can not be hashed")
+                return None
+            h.update(input_name.encode())
+            h.update(value_hash)
+        h.update(repr(node.output).encode())
+
+        return h.hexdigest()
+
+    def _cache(self) -> Cache:
+        """
+        Get the node result cache of the current worker (thread or process)
+        """
+
+        state = _local_state()
+        cache = state.get(f"{self.name}:cache")
+        if cache is None:
+            cache = Cache()
+            state[f"{self.name}:cache"] = cache
+
+        return cache
+
+    def _node_inputs(self, node: Node, known_inputs: dict[str, Any]) -> tuple[list, list|None]:
+        """
+        Prepare the inputs of a node
+
+        Returns:
+            tuple[list, list|None]: The inputs to pass to the node and, when checking mutations, their fingerprints
+        """
+
+        policy = self._input_policy(node)
+        node_inputs = [prepare_input(known_inputs[input_name], policy) for input_name in node.input]
+        fingerprints = [fingerprint(known_inputs[input_name]) for input_name in node.input] if self.check_mutations else None
+
+        return node_inputs, fingerprints
+
+    def _check_mutations(self, node: Node, known_inputs: dict[str, Any], fingerprints: list|None) -> None:
+        """
+        Raise an error if a node modified its inputs in place (only when checking mutations)
+        """
+
+        if fingerprints is None:
+            return
+        for input_name, before in zip(node.input, fingerprints):
+            if before is not None and fingerprint(known_inputs[input_name]) != before:
+                raise RuntimeError(f"Node '{node.name}' modified its input '{input_name}' in place")
+
+    def _call_batch(self, node: Node, items: list[dict[str, Any]]) -> list[tuple]:
+        """
+        Call a batch node once for several items
+
+        Args:
+            node (Node): The node to call
+            items (list[dict[str, any]]): The known inputs of each item. Not modified.
+
+        Returns:
+            list[tuple]: The node outputs of each item, one element per declared output
+        """
+
+        log.debug(f"Running node: {node.name} (batch of {len(items)})")
+        # Prepare the inputs for the node. Parameters are the same for every item and are passed once
+        policy = self._input_policy(node)
+        node_inputs = []
+        for input_name in node.input:
+            if input_name.startswith("params:"):
+                node_inputs.append(prepare_input(items[0][input_name], policy))
+            else:
+                node_inputs.append(prepare_batch([item[input_name] for item in items], policy))
+        if self.check_mutations:
+            fingerprints = [[fingerprint(item[input_name]) for input_name in node.input] for item in items]
+        # Run the node
+        with self._node_deadline(node):
+            output_data = self._normalize_outputs(node, self._invoke(node, node_inputs))
+        # Check that the node did not modify its inputs in place
+        if self.check_mutations:
+            for item, item_fingerprints in zip(items, fingerprints):
+                for input_name, before in zip(node.input, item_fingerprints):
+                    if before is not None and fingerprint(item[input_name]) != before:
+                        raise RuntimeError(f"Node '{node.name}' modified its input '{input_name}' in place")
+
+        # Split the outputs back into the outputs of each item
+        try:
+            outputs = [split_batch(values, len(items)) for values in output_data]
+        except ValueError as e:
+            log.error(f"Batch node '{node.name}' must return one value per item for each output: {e}")
+            raise RuntimeError(f"Batch node '{node.name}' must return one value per item for each output: {e}")
+
+        return list(zip(*outputs)) if len(outputs) > 0 else [() for _ in items]
+
+    def _input_policy(self, node: Node) -> str:
+        """
+        Get the policy used to pass the inputs to a node (see `copy_inputs`)
+        """
+
+        policy = node.copy_inputs or self.copy_inputs
+        if policy == "deep" and node.executor == "process" and not self._in_worker_process:
+            return "none" # The inputs are pickled to be sent to the process pool, no need to copy them
+        return policy
+
+    def _invoke(self, node: Node, node_inputs: list) -> Any:
+        """
+        Call the function of a node on the executor it is placed on
+
+        Args:
+            node (Node): The node to call
+            node_inputs (list): The prepared inputs of the node
+
+        Returns:
+            any: The value returned by the node function
+        """
+
+        if node.executor == "process" and not self._in_worker_process:
+            future = self._process_executor().submit(_call_in_process, node.name, node.func, node.setup, node_inputs)
+            return future.result()
+
+        if node.setup is not None:
+            node_inputs = [self._node_state(node)] + node_inputs
+        if node.executor == "thread" and not getattr(_worker_state, "node_thread", False):
+            output_data = self._node_executor().submit(node.func, *node_inputs).result()
+        else:
+            output_data = node.func(*node_inputs)
+        # Coroutine functions outside asyncio mode run on their own event loop
+        if inspect.iscoroutine(output_data):
+            output_data = asyncio.run(output_data)
+
+        return output_data
+
+    def _normalize_outputs(self, node: Node, output_data: Any) -> tuple:
+        """
+        Wrap the value returned by a node in a tuple with one element per declared output
+        """
+
+        # If the node does not return a tuple, check if a list/tuple is returned and wrap it in a tuple
+        if not isinstance(output_data, tuple):
+            output_data = (output_data,)
+        if len(output_data) != len(node.output):
+            if len(node.output) == 1:
+                output_data = (output_data,)
+            else:
+                log.error(f"Node '{node.name}' is producing more outputs ({len(output_data)}) than declared ({len(node.output)})")
+                raise RuntimeError(f"Node '{node.name}' is producing more outputs ({len(output_data)}) than declared ({len(node.output)})")
+
+        return output_data
+
+    def _store_outputs(self, node: Node, output_data: tuple, known_inputs: dict[str, Any], save: bool = True) -> None:
+        """
+        Add the outputs of a node to the known inputs and save those present in the catalog
+
+        Args:
+            node (Node): The node that produced the outputs
+            output_data (tuple): The node outputs
+            known_inputs (dict[str, any]): The known inputs. Updated in place.
+            save (bool, optional): Whether to save the outputs with their datahandlers. Defaults to True.
+        """
+
+        # Update the known inputs
+        known_inputs.update({output: output_data[i] for i, output in enumerate(node.output)})
+        # Check if the output data should be saved
+        watchdog: _Watchdog|None = _local_state().get(f"{self.name}:watchdog")
+        if watchdog is not None and watchdog.cancelled:
+            raise SkipItem(message="Item timed out, its outputs are discarded") # Already reported by the parent
+        if save:
+            for output_name in node.output:
+                if output_name in self._output_datahandlers:
+                    self._output_datahandlers[output_name].save(known_inputs[output_name])
+
+    def _run_nodes(self, known_inputs: dict[str, Any], save: bool = True, optimized: bool = True) -> None:
+        """
+        Execute all nodes for a single item
+
+        Args:
+            known_inputs (dict[str, any]): The known inputs (parameters and loaded datasets). Updated in place with the outputs
+              of every node.
+            save (bool, optional): Whether to save the outputs with their datahandlers. Defaults to True.
+            optimized (bool, optional): Follow the execution plan instead of the execution order. Defaults to True.
+        """
+
+        if self._max_batch_size() > 0:
+            # Run as a batch of a single item
+            errors: list[Exception|None] = [None]
+            self._run_items([known_inputs], errors, save, optimized)
+            if errors[0] is not None:
+                raise errors[0]
+            return
+
+        if not self.parallel_nodes:
+            # Execute the nodes in order
+            for node in self._plan_order if optimized else self._exec_order:
+                self._store_outputs(node, self._call_node(node, known_inputs), known_inputs, save)
+            return
+
+        # Execute each topological level at once, independent nodes run concurrently
+        for level in self._plan_levels if optimized else self._exec_levels:
+            if len(level) == 1:
+                self._store_outputs(level[0], self._call_node(level[0], known_inputs), known_inputs, save)
+                continue
+
+            # Nodes placed inline run in this thread while the others run on the thread pool
+            executor = self._node_executor()
+            futures = {node.name: executor.submit(self._call_node, node, known_inputs) for node in level if node.executor != "inline"}
+            inline = {node.name: self._call_node(node, known_inputs) for node in level if node.executor == "inline"}
+            # Outputs are stored once the whole level finished, the nodes only read the known inputs
+            for node in level:
+                output_data = inline[node.name] if node.name in inline else futures[node.name].result()
+                self._store_outputs(node, output_data, known_inputs, save)
+
+    def _run_items(self, items: list[dict[str, Any]], errors: list[Exception|None], save: bool = True,
+                   optimized: bool = True) -> None:
+        """
+        Execute all nodes for several items, node by node. Batch nodes are called once per batch of items, other nodes
+        once per item.
+
+        Args:
+            items (list[dict[str, any]]): The known inputs of each item. Updated in place with the outputs of every node.
+            errors (list[Exception|None]): The error raised by each item (None if no error). Items with an error are not
+              processed further. Updated in place.
+            save (bool, optional): Whether to save the outputs with their datahandlers. Defaults to True.
+            optimized (bool, optional): Follow the execution plan instead of the execution order. Defaults to True.
+        """
+
+        for node in self._plan_order if optimized else self._exec_order:
+            pending = [i for i, error in enumerate(errors) if error is None]
+            if node.batch_size is None:
+                batches = [[i] for i in pending]
+            else:
+                batches = [pending[start:start + node.batch_size] for start in range(0, len(pending), node.batch_size)]
+
+            for batch in batches:
+                try:
+                    if node.batch_size is None:
+                        outputs = [self._call_node(node, items[batch[0]])]
+                    else:
+                        outputs = self._call_batch(node, [items[i] for i in batch])
+                    for i, output_data in zip(batch, outputs):
+                        self._store_outputs(node, output_data, items[i], save)
+                except Exception as e:
+                    for i in batch:
+                        errors[i] = e
+                    if isinstance(e, StopPipeline) or not isinstance(e, SkipItem) and not self.error_tolerant:
+                        return # Stop processing the remaining items
+
+    def _max_batch_size(self) -> int:
+        """
+        Get the largest batch size of the nodes in the pipeline (0 if there are no batch nodes)
+        """
+
+        return max((node.batch_size or 0 for node in self.nodes), default=0)
+
+    def _node_executor(self) -> ThreadPoolExecutor:
+        """
+        Get the thread pool used to run independent nodes concurrently. Each worker (thread or process) has its own pool.
+        """
+
+        state = _local_state()
+        executor = state.get(f"{self.name}:node_executor")
+        if executor is None:
+            # The threads share the state of the worker (e.g. the node setups)
+            executor = ThreadPoolExecutor(max_workers=max(len(level) for level in self._exec_levels), thread_name_prefix=f"{self.name}-nodes",
+                                          initializer=_share_state, initargs=(state,))
+            state[f"{self.name}:node_executor"] = executor
+
+        return executor
+
+    def _prefetch_executor(self) -> ThreadPoolExecutor:
+        """
+        Get the I/O thread loading the inputs of the next items ahead of time. Each worker (thread or process) has its own.
+        """
+
+        state = _local_state()
+        executor = state.get(f"{self.name}:prefetch_executor")
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{self.name}-prefetch")
+            state[f"{self.name}:prefetch_executor"] = executor
+
+        return executor
+
+    def _process_executor(self) -> ProcessPoolExecutor:
+        """
+        Get the process pool running the nodes placed on a process executor. The pool is shared by all the worker threads.
+        """
+
+        with _process_executors_lock:
+            pid, executor = _process_executors.get(self.name, (None, None))
+            if executor is None or pid != os.getpid():
+                workers = self.max_workers if isinstance(self.max_workers, int) else multiprocessing.cpu_count()
+                log.debug(f"Starting a pool of {workers} processes for the nodes of pipeline {self.name}")
+                executor = ProcessPoolExecutor(max_workers=workers)
+                _process_executors[self.name] = (os.getpid(), executor)
+
+        return executor
+
+    def _shutdown_process_executor(self) -> None:
+        """
+        Stop the process pool running the nodes placed on a process executor (if any)
+        """
+
+        with _process_executors_lock:
+            pid, executor = _process_executors.pop(self.name, (None, None))
+        if executor is not None and pid == os.getpid():
+            executor.shutdown()
+
+    def _node_state(self, node: Node) -> Any:
+        """
+        Get the value returned by the setup of a node on the current worker. The setup runs the first time it is needed.
+        """
+
+        state = _local_state()
+        key = f"node_setup:{node.name}"
+        if key not in state:
+            log.debug(f"Setting up node: {node.name}")
+            assert node.setup is not None
+            state[key] = node.setup()
+
+        return state[key]
+
+    def _accumulate(self, known_inputs: dict[str, Any]) -> None:
+        """
+        Add an item processed successfully to the partial aggregates of the reducer nodes kept by the current worker
+        """
+
+        if len(self._reducers) == 0:
+            return
+        state = _local_state()
+        watchdog: _Watchdog|None = state.get(f"{self.name}:watchdog")
+        if watchdog is not None and watchdog.cancelled:
+            raise SkipItem(message="Item timed out, its outputs are discarded") # Already reported by the parent
+
+        # Every reducer aggregates the item or none does
+        partials = state.setdefault(f"{self.name}:partials", {})
+        updated = {}
+        for reducer in self._reducers:
+            log.debug(f"Running node: {reducer.name}")
+            node_inputs, _ = self._node_inputs(reducer, known_inputs)
+            partial = partials[reducer.name] if reducer.name in partials else reducer.init()
+            updated[reducer.name] = reducer.accumulate(partial, *node_inputs)
+        partials.update(updated)
+
+    def _take_partials(self) -> dict[str, Any]:
+        """
+        Get the partial aggregates of the reducer nodes kept by the current worker and start new ones
+        """
+
+        return _local_state().pop(f"{self.name}:partials", {})
+
+    def _combine_partials(self, totals: dict[str, Any], partials: dict[str, Any]) -> None:
+        """
+        Combine partial aggregates of the reducer nodes into the aggregates of the run (updated in place)
+        """
+
+        for reducer in self._reducers:
+            if reducer.name not in partials:
+                continue
+            if reducer.name in totals:
+                totals[reducer.name] = reducer.combine(totals[reducer.name], partials[reducer.name])
+            else:
+                totals[reducer.name] = partials[reducer.name]
+
+    def _reduce(self, totals: dict[str, Any], known_inputs: dict[str, Any], save: bool = True) -> None:
+        """
+        Finalize the aggregates of the reducer nodes and run the nodes reading them
+
+        Args:
+            totals (dict[str, any]): The aggregates of the run, by reducer node. Reducers without items start from `init`.
+            known_inputs (dict[str, any]): The known inputs (parameters). Updated in place with the outputs of every node.
+            save (bool, optional): Whether to save the outputs with their datahandlers. Defaults to True.
+        """
+
+        for reducer in self._reducers:
+            log.debug(f"Finalizing node: {reducer.name}")
+            aggregate = totals[reducer.name] if reducer.name in totals else reducer.init()
+            output_data = reducer.finalize(aggregate) if reducer.finalize is not None else aggregate
+            self._store_outputs(reducer, self._normalize_outputs(reducer, output_data), known_inputs, save)
+        for node in self._final_order:
+            self._store_outputs(node, self._call_node(node, known_inputs), known_inputs, save)
+
+    def _worker_stop(self) -> None:
+        """
+        Release the resources held by the current worker (thread or process). Called when a worker finishes.
+        """
+
+        state = _local_state()
+        executor = state.pop(f"{self.name}:node_executor", None)
+        if executor is not None:
+            executor.shutdown()
+        executor = state.pop(f"{self.name}:prefetch_executor", None)
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        cache = state.pop(f"{self.name}:cache", None)
+        if cache is not None:
+            cache.close()
+
+        # Tear down the nodes set up by this worker
+        for node in self.nodes:
+            key = f"node_setup:{node.name}"
+            if key not in state:
+                continue
+            value = state.pop(key)
+            if node.teardown is None:
+                continue
+            log.debug(f"Tearing down node: {node.name}")
+            try:
+                node.teardown(value)
+            except Exception as e:
+                log.error(f"Error tearing down node {node.name}: {e}\n{traceback.format_exc()}")
+
     # Define the function to run a single pass of the pipeline
-    def _run_pass(self, master: tuple[tuple, Any], params: dict[str, Any]) -> None|Exception:
+    def _run_pass(self, master_key: Any, params: dict[str, Any], failed: list|None = None,
+                  load: Callable[[], dict[str, Any]]|None = None) -> None|Exception:
         """
-        Run a single pass of the pipeline
+        Run a single pass of the pipeline. The inputs for the master key (including the master item itself) are loaded here.
 
         Args:
-            master (tuple[tuple, any]): A tuple with the master key and the master data
+            master_key (any): The key of the master item
             params (dict[str, any]): Catalog parameters dictionary
+            failed (list, optional): List where the key is added if the item fails with a tolerated error
+            load (callable, optional): Get the known inputs of the item instead of loading them here (e.g. prefetched)
 
         Returns:
             None|Exception
         """
 
-        master_key, _ = master
-
         try:
-            known_inputs = params
-            for input_name, datahandler in self._input_datahandlers.items():
-                known_inputs[input_name] = datahandler[master_key]
+            known_inputs = load() if load is not None else self._load_inputs(master_key, params)
                 
-            # Execute the nodes in order
-            for node in self._exec_order:
-                # Prepare the inputs for the node
-                node_inputs = [copy.deepcopy(known_inputs[input_name]) for input_name in node.input]
-                # Run the node
-                output_data = node.func(*node_inputs)
-                # If the node does not return a tuple, check if a list/tuple is returned and wrap it in a tuple
-                if not isinstance(output_data, tuple):
-                    output_data = (output_data,)
-                if len(output_data) != len(node.output):
-                    if len(node.output) == 1:
-                        output_data = (output_data,)
-                    else:
-                        log.error(f"Node '{node.name}' is producing more outputs ({len(output_data)}) than declared ({len(node.output)})")
-                        raise RuntimeError(f"Node '{node.name}' is producing more outputs ({len(output_data)}) than declared ({len(node.output)})")
-                # Update the known inputs
-                known_inputs.update({output: output_data[i] for i, output in enumerate(node.output)})
-                # Check if the output data should be saved
-                for output_name in node.output:
-                    if output_name in self._output_datahandlers:
-                        self._output_datahandlers[output_name].save(known_inputs[output_name])
-
-        except SkipItem as e:
+            # Execute the nodes
+            self._run_nodes(known_inputs)
+            self._accumulate(known_inputs)
+
+        except Exception as e:
+            return self._item_error(master_key, e, failed)
+        return None
+
+    def _run_batch(self, master_keys: list, params: dict[str, Any], failed: list|None = None) -> list[None|Exception]:
+        """
+        Run the pipeline for several master items at once, so batch nodes can process them together
+
+        Args:
+            master_keys (list): A list of master keys
+            params (dict[str, any]): Catalog parameters dictionary
+            failed (list, optional): List where the keys of the items that fail with a tolerated error are added
+
+        Returns:
+            list[None|Exception]: The status of each item, as returned by `_run_pass`
+        """
+
+        items: list[dict[str, Any]] = []
+        errors: list[Exception|None] = []
+        for master_key in master_keys:
+            try:
+                items.append(self._load_inputs(master_key, params))
+                errors.append(None)
+            except Exception as e:
+                items.append({})
+                errors.append(e)
+
+        self._run_items(items, errors)
+        for i, item in enumerate(items):
+            if errors[i] is None:
+                try:
+                    self._accumulate(item)
+                except Exception as e:
+                    errors[i] = e
+
+        return [self._item_error(master_key, error, failed) if error else None for master_key, error in zip(master_keys, errors)]
+
+    def _load_inputs(self, master_key: Any, params: dict[str, Any]) -> dict[str, Any]:
+        """
+        Load the known inputs (parameters and input datasets) of a master item
+        """
+
+        known_inputs = params.copy()
+        if len(self._input_datahandlers) == 0:
+            return known_inputs # Pipelines ran once
+        join = self._plan_join()
+        for input_name in self._input_datahandlers:
+            known_inputs[input_name] = join.load(input_name, master_key)
+
+        return known_inputs
+
+    def _item_error(self, master_key: Any, e: Exception, failed: list|None = None) -> None|Exception:
+        """
+        Handle an error raised while processing a master item
+
+        Args:
+            master_key (any): The key of the master item
+            e (Exception): The raised error
+            failed (list, optional): List where the key is added if the error is tolerated
+
+        Returns:
+            None|Exception: The error if it should stop the pipeline, None otherwise
+        """
+
+        if isinstance(e, SkipItem):
             e.master_key = master_key
             log.debug(e)
             return None
-        except StopPipeline as e:
+        if isinstance(e, StopPipeline):
             return StopPipeline(master_key = master_key, message = e.message)
+        log.error(f"Error in pipeline {self.name} with key {master_key}: {e}\n{''.join(traceback.format_exception(e))}")
+        if not self.error_tolerant:
+            return e
+        if failed is not None:
+            failed.append(master_key)
+        return None
+
+    async def _arun(self, master_keys: Iterable, params: dict[str, Any], prog_bar: ProgressBar|None,
+                    checkpoint: _Checkpoint|None = None) -> list:
+        """
+        Run the pipeline for every master key on the event loop (asyncio mode), with at most `max_concurrency` items in
+        flight. Stops at the first error that should stop the pipeline.
+
+        Args:
+            master_keys (iterable): The master keys
+            params (dict[str, any]): Catalog parameters dictionary
+            prog_bar (ProgressBar|None): Progress bar to update (if any)
+            checkpoint (_Checkpoint, optional): Journal of the items processed successfully
+
+        Returns:
+            list: The master keys of the items that failed with a tolerated error
+        """
+
+        keys = iter(master_keys)
+        errors: list[Exception] = []
+        failed: list = []
+        self._take_partials() # Start new aggregates
+
+        async def consume() -> None:
+            # Each consumer processes one item at a time until there are no keys left
+            for master_key in keys:
+                if len(errors) > 0:
+                    return
+                failures = len(failed)
+                res = await self._arun_pass(master_key, params, failed)
+                if res:
+                    errors.append(res)
+                    return
+                if checkpoint is not None and len(failed) == failures:
+                    checkpoint.add([master_key])
+                if prog_bar is not None:
+                    prog_bar.update()
+
+        await asyncio.gather(*(consume() for _ in range(self.max_concurrency)))
+
+        if len(errors) > 0:
+            if isinstance(errors[0], StopPipeline):
+                log.error(errors[0])
+            raise errors[0]
+
+        return failed
+
+    async def _arun_pass(self, master_key: Any, params: dict[str, Any], failed: list|None = None) -> None|Exception:
+        """
+        Run a single pass of the pipeline on the event loop. See `_run_pass`.
+        """
+
+        try:
+            async with asyncio.timeout(self.item_timeout) as deadline:
+                try:
+                    await self._arun_nodes(master_key, params)
+                except TimeoutError:
+                    if deadline.expired():
+                        raise TimeoutError("Item timed out (item_timeout exceeded)")
+                    raise
+
         except Exception as e:
-            log.error(f"Error in pipeline {self.name} with key {master_key}: {e}\n{traceback.format_exc()}")
-            if not self.error_tolerant:
-                return e
+            return self._item_error(master_key, e, failed)
         return None
 
-    def run(self) -> None:
+    async def _arun_nodes(self, master_key: Any, params: dict[str, Any]) -> None:
+        """
+        Load the inputs of a master item and execute all nodes on the event loop
+        """
+
+        known_inputs = params.copy()
+        names = list(self._input_datahandlers.keys())
+        join = self._plan_join()
+        loaded = await asyncio.gather(*(join.aload(name, master_key) for name in names))
+        known_inputs.update(zip(names, loaded))
+
+        # Execute the nodes, each topological level at once when running independent nodes concurrently
+        levels = self._plan_levels if self.parallel_nodes else [[node] for node in self._plan_order]
+        for level in levels:
+            results = await asyncio.gather(*(self._acall_node(node, known_inputs) for node in level))
+            for node, output_data in zip(level, results):
+                self._store_outputs(node, output_data, known_inputs, save=False)
+                await asyncio.gather(*(
+                    self._output_datahandlers[output_name].asave(output_data[i])
+                    for i, output_name in enumerate(node.output) if output_name in self._output_datahandlers
+                ))
+        self._accumulate(known_inputs)
+
+    def _item_nbytes(self, master_key: Any) -> int|None:
+        """
+        Get the stored size of the inputs of a master item in bytes, or None if unknown
+        """
+
+        join = self._plan_join()
+        sizes = [datahandler.nbytes(join.key(name, master_key)) for name, datahandler in self._input_datahandlers.items()]
+        known = [size for size in sizes if size is not None]
+        return sum(known) if len(known) > 0 else None
+
+    def _plan_join(self) -> _Join:
+        """
+        Get the join of the master dataset with the other input datasets, planned once the input datahandlers are known
+        """
+
+        if self._join is None or self._join.datahandlers is not self._input_datahandlers:
+            # The master dataset is the first cataloged input of the first node
+            nodes = self._exec_order + self._reducers
+            first_inputs = [name for name in nodes[0].input if name in self._input_datahandlers] if len(nodes) > 0 else []
+            master = first_inputs[0] if len(first_inputs) > 0 else next(iter(self._input_datahandlers))
+            self._join = _Join(master, self._input_datahandlers, self.join, self.missing, self.key_map)
+
+        return self._join
+
+    def _has_timeouts(self) -> bool:
+        """
+        Check whether the pipeline or any of its nodes has a timeout
+        """
+
+        return self.item_timeout is not None or any(node.timeout is not None for node in self.nodes)
+
+    def _run_chunk(self, master_keys: list, params: dict[str, Any], watchdog: _Watchdog|None = None) -> _ChunkResult:
+        """
+        Run a pass of the pipeline for every master key in a chunk
+
+        Args:
+            master_keys (list): A list of master keys
+            params (dict[str, any]): Catalog parameters dictionary
+            watchdog (_Watchdog, optional): Where the deadlines of the current item and node are reported, for the parent to
+              stop the worker when one passes
+
+        Returns:
+            _ChunkResult: Combined status of the chunk. Processing stops at the first error that should stop the pipeline.
+        """
+
+        result = _ChunkResult()
+        start = time.perf_counter()
+        # The memory of worker processes is measured from the peak of the chunk. Where the peak can not be reset, the
+        # chunk is not measured and its items are estimated from their stored size.
+        rss_before = rss() if self.memory_budget is not None and self._in_worker_process and reset_peak_rss() else None
+        _local_state()[f"{self.name}:watchdog"] = watchdog
+        self._take_partials() # The reducers only aggregate the items of this chunk
+
+        # Load the inputs of the next items while the current one runs
+        prefetcher: _Prefetcher|None = None
+        if self.prefetch > 0 and self._max_batch_size() == 0:
+            prefetcher = _Prefetcher(self._prefetch_executor(), lambda master_key: self._load_inputs(master_key, params),
+                                     master_keys, self.prefetch)
+
+        def passes() -> Iterator[None|Exception]:
+            for position, master_key in enumerate(master_keys):
+                if watchdog is not None:
+                    if watchdog.cancelled:
+                        return # Abandoned by the parent, the remaining items were handed out again
+                    watchdog.start_item(position, self.item_timeout)
+                load = functools.partial(prefetcher.get, position) if prefetcher is not None else None
+                yield self._run_pass(master_key, params, result.failed, load)
+
+        statuses: Iterable[None|Exception]
+        if self._max_batch_size() > 0:
+            # The items of a batch run together, a timeout fails all of them
+            if watchdog is not None:
+                watchdog.start_item(len(master_keys) - 1, self.item_timeout * len(master_keys) if self.item_timeout is not None else None)
+            statuses = self._run_batch(master_keys, params, result.failed)
+        else:
+            statuses = passes()
+        for res in statuses:
+            result.processed += 1
+            if res:
+                result.error = res
+                break
+        if watchdog is not None:
+            watchdog.idle()
+        if prefetcher is not None:
+            prefetcher.cancel()
+            result.prefetch_hits, result.prefetch_misses, result.prefetch_stall = prefetcher.hits, prefetcher.misses, prefetcher.stall
+        result.partials = self._take_partials()
+        result.elapsed = time.perf_counter() - start
+        if rss_before is not None and (peak := peak_rss()) is not None:
+            result.peak_memory = max(0, peak - rss_before)
+
+        return result
+
+    def _record_prefetch(self, chunk_res: _ChunkResult) -> None:
+        """
+        Add the prefetching statistics of a chunk to those of the run
+        """
+
+        self.prefetch_stats["hits"] += chunk_res.prefetch_hits
+        self.prefetch_stats["misses"] += chunk_res.prefetch_misses
+        self.prefetch_stats["stall"] += chunk_res.prefetch_stall
+
+    @staticmethod
+    def _journal(checkpoint: _Checkpoint|None, chunk: list, chunk_res: _ChunkResult) -> int:
+        """
+        Journal the items of a chunk processed successfully
+
+        Returns:
+            int: Number of items of the chunk that failed
+        """
+
+        if checkpoint is not None:
+            processed = chunk[:chunk_res.processed - (1 if chunk_res.error else 0)]
+            checkpoint.add(key for key in processed if key not in chunk_res.failed)
+
+        return len(chunk_res.failed)
+
+    def run(self, resume: bool = False, listen: str|None = None, shard: tuple[int, int]|None = None) -> None:
         """
         Execute the pipeline
+
+        Args:
+            resume (bool, optional): Skip the master items processed successfully by the last (interrupted or failed) run,
+              as recorded in its checkpoint journal. Defaults to False.
+            listen (str, optional): Distribute the master items to remote workers instead of running them locally. The
+              pipeline listens on this address (host:port) for workers started with `canonada worker --connect host:port`
+              and hands out leases on chunks of master keys. Chunks of workers that disconnect or stop sending heartbeats
+              are leased again. Defaults to None (run locally).
+            shard (tuple[int, int], optional): Only process the master items of one shard, given as (index, count) with
+              index from 0 to count - 1. Items are assigned to shards by a stable hash of their key, so `count`
+              independent runs (e.g. on different machines) process disjoint slices without coordinating. Each shard has
+              its own checkpoint journal, and output datahandlers saving to a shared file save to per-shard files instead
+              (see `Datahandler.merge_shards`). Pipelines without catalog inputs only run in shard 0. Defaults to None
+              (every item).
         """
 
+        try:
+            self._execute(resume, listen, shard)
+        finally:
+            self._shutdown_process_executor()
+
+    def _execute(self, resume: bool = False, listen: str|None = None, shard: tuple[int, int]|None = None) -> None:
+        """
+        Execute the pipeline. See `run`.
+        """
+
+        if shard is not None and not 0 <= shard[0] < shard[1]:
+            raise ValueError(f"Invalid shard {shard[0]}/{shard[1]}. The index must be between 0 and the number of shards - 1.")
+        if shard is not None and any(isinstance(node, Reducer) for node in self.nodes):
+            raise ValueError(f"Pipeline {self.name} has reducer nodes and can not be sharded, each shard would only aggregate its own items")
+
         # Calculate the execution order & get datahandlers
         self._calc_exec_order()
+        if self.optimize:
+            self._optimize_plan()
         
         log.info(f"Running pipeline: {self.name}")
 
@@ -406,134 +1690,239 @@ class Pipeline():
 
         # If none of the pipeline inputs are datahandlers, run the pipeline once
         if len(self._input_datahandlers) == 0:
-            res = self._run_pass(((None,), None), params)
+            if shard is not None and shard[0] != 0:
+                log.info(f"Pipeline {self.name} has no catalog inputs, it only runs in shard 0")
+                return
+            res = self._run_pass((None,), params)
+            self._worker_stop()
             if res:
                 raise res
+            self._reduce(self._take_partials(), params.copy())
             log.info(f"Pipeline {self.name} finished")
             return
 
-        # From the first node in the exec_order, get the first cataloged datasource
-        master_datahandler: str
-        for input_src in self._exec_order[0].input:
-            if input_src in self._input_datahandlers:
-                master_datahandler = input_src
-                break
+        # Join the first cataloged datasource of the first node in the exec_order with the other inputs
+        join = self._plan_join()
 
         # Adjust the number of workers if not set
         if self.max_workers is None:
             self.max_workers = multiprocessing.cpu_count()
 
+        # Scale the number of workers during the run if set to "auto"
+        mode = self.mode or ("process" if self.multiprocessing else "thread")
+        autoscaler: _Autoscaler|None = None
+        if self.max_workers == "auto":
+            if self.min_workers < 1:
+                raise ValueError("min_workers must be greater than 0")
+            upper = multiprocessing.cpu_count() * (4 if mode == "thread" else 1)
+            lower = min(self.min_workers, upper)
+            workers = min(upper, max(lower, multiprocessing.cpu_count() // 2))
+            if upper > lower:
+                autoscaler = _Autoscaler(self.name, lower, upper, workers)
+                log.info(f"Pipeline {self.name} starts with {workers} workers, scaling between {lower} and {upper}")
+        elif isinstance(self.max_workers, int):
+            workers = self.max_workers
+        else:
+            raise ValueError(f"Invalid max_workers '{self.max_workers}'. Must be a positive integer, 'auto' or None.")
+
+        if workers < 1:
+            raise ValueError("Number of workers must be greater than 0. Set to None to use all available cores.")
+
+        # Journal the master items processed successfully, skipping those of the previous run when resuming
+        master_items = self._input_datahandlers[join.master]
+        master_keys: Iterable = master_items.iter_keys()
+        total = len(master_items)
+        if join.how == "inner" and len(self._input_datahandlers) > 1:
+            # Only the keys are joined up front, the items are loaded by the workers
+            master_keys = list(join.keys(master_keys))
+            log.info(f"Pipeline {self.name}: {len(master_keys)} of {total} master items in the inner join ({join.strategy} join)")
+            total = len(master_keys)
+        journal = self.name if shard is None else f"{self.name}.shard-{shard[0]}-of-{shard[1]}"
+        if resume and len(self._reducers) > 0:
+            # The items of the previous run are not in the aggregates
+            log.warning(f"Pipeline {self.name} has reducer nodes, it runs every item again instead of resuming")
+            resume = False
+        checkpoint = _Checkpoint(journal, resume) if self.checkpoint else None
+        if checkpoint is not None and len(checkpoint.done) > 0:
+            log.info(f"Resuming pipeline {self.name}, skipping {len(checkpoint.done)} items processed by the previous run")
+            master_keys = checkpoint.pending(master_keys)
+            total = max(0, total - len(checkpoint.done))
+        elif resume and checkpoint is None:
+            log.warning(f"Pipeline {self.name} can not be resumed, checkpointing is disabled")
+
+        # Keep the master items of this shard only
+        if shard is not None:
+            master_keys = [key for key in master_keys if shard_of(key, shard[1]) == shard[0]]
+            total = len(master_keys)
+            log.info(f"Pipeline {self.name} runs shard {shard[0]}/{shard[1]} ({total} items)")
+            for datahandler in self._output_datahandlers.values():
+                datahandler.set_shard(*shard)
+        failures = 0
+
         # Create a progress bar (if configured)
-        show_prog = config.get("logging",{}).get("show_progress", True)
+        show_prog = config.get("logging",{}).get("show_progress", True) if self._show_progress is None else self._show_progress
         if show_prog:
-            prog_bar = ProgressBar(total=len(self._input_datahandlers[master_datahandler]), width=30, prefix=f"Pipeline {self.name}:")
+            prog_bar = ProgressBar(total=total, width=30, prefix=f"Pipeline {self.name}:")
 
-        if self.max_workers < 1:
-            raise ValueError("Number of workers must be greater than 0. Set to None to use all available cores.")
+        # Group the master keys into chunks to be handed out to the workers. Only keys are iterated here, the master items
+        # are loaded by the workers
+        # Chunks hold the items a worker reads ahead when prefetching
+        chunker = _Chunker(master_keys, total, self.chunksize, workers,
+                           min_chunksize=max(1, self._max_batch_size(), self.prefetch + 1))
 
         # Start pipeline execution
         if show_prog:
             prog_bar.update(0)
 
-        if self.max_workers == 1:
-            # Run the pipeline sequentially with no threading or multiprocessing
-            for mkey in self._input_datahandlers[master_datahandler]:
-                try:
-                    res = self._run_pass(mkey, params)
-                    if res:
-                        raise res
-                except StopPipeline as e:
-                    log.error(e)
-                    raise e
-                except Exception as e:
-                    raise e
-                if show_prog:
-                    prog_bar.update()
-
-        elif not self.multiprocessing:
-            # Start multithreaded pipeline execution
-            # Create a master key iterator
-            mkey_iter = iter(self._input_datahandlers[master_datahandler])
-
-            # Define and fill a thread pool
-            thread_pool = []
-            for _ in range(self.max_workers):
+        completed = False # Every item processed successfully
+        totals: dict[str, Any] = {} # Aggregates of the reducer nodes, combined from the partial aggregates of the chunks
+        self.prefetch_stats = {"hits": 0, "misses": 0, "stall": 0.0}
+        try:
+            if listen is not None:
+                # Lease the chunks of master keys to remote workers, they build the same execution plan
+                coordinator = _Coordinator(self, listen, {
+                    "pipeline": self.name,
+                    "params": params,
+                    "shard": shard,
+                    "settings": {name: getattr(self, name) for name in ("prune", "to_outputs", "from_nodes", "optimize")},
+                })
                 try:
-                    mkey = next(mkey_iter)
-                    thread = _ThreadReturn(target=self._run_pass, args=(mkey, copy.deepcopy(params)))
-                    thread.start()
-                    thread_pool.append(thread)
-                except StopIteration:
-                    break
-            
-            # Wait for threads to finish and start new ones until the input data is exhausted
-            while len(thread_pool) > 0:
-                for thread in thread_pool:
-                    if not thread.is_alive():
-                        try:
-                            res = thread.join(0)
-                            if res:
-                                raise res
-                        except StopPipeline as e:
-                            log.error(e)
-                            raise e
-                        except Exception as e:
-                            raise e
-                        thread_pool.remove(thread)
+                    for chunk, chunk_res in coordinator.results(chunker):
+                        failures += self._journal(checkpoint, chunk, chunk_res)
+                        self._combine_partials(totals, chunk_res.partials)
+                        self._record_prefetch(chunk_res)
+                        if chunk_res.error:
+                            if isinstance(chunk_res.error, StopPipeline):
+                                log.error(chunk_res.error)
+                            raise chunk_res.error
                         if show_prog:
-                            prog_bar.update()
-                        try:
-                            mkey = next(mkey_iter)
-                            thread = _ThreadReturn(target=self._run_pass, args=(mkey, copy.deepcopy(params)))
-                            thread.start()
-                            thread_pool.append(thread)
-                        except StopIteration:
-                            break
-
-        else:
-            # Start multiprocessed pipeline execution
-            # Create a master key iterator
-            mkey_iter = iter(self._input_datahandlers[master_datahandler])
+                            prog_bar.update(prog_bar.current + chunk_res.processed)
+                        chunker.update(chunk_res.processed, chunk_res.elapsed)
+                finally:
+                    coordinator.close()
+
+            elif mode == "asyncio":
+                # Run the pipeline on an event loop, many items can wait on I/O at once
+                if self._max_batch_size() > 0:
+                    raise ValueError("Batch nodes are not supported in asyncio mode")
+                if self.max_concurrency < 1:
+                    raise ValueError("max_concurrency must be greater than 0")
+                try:
+                    failures = len(asyncio.run(self._arun(master_keys, params, prog_bar if show_prog else None, checkpoint)))
+                    totals = self._take_partials() # The event loop is a single worker
+                finally:
+                    self._worker_stop()
 
-            # Define and fill a process pool
-            process_pool = []
-            for _ in range(self.max_workers):
+            elif workers == 1 and autoscaler is None and not self._has_timeouts():
+                # Run the pipeline sequentially with no threading or multiprocessing
                 try:
-                    mkey = next(mkey_iter)
-                    process = _ProcessReturn(target=self._run_pass, args=(mkey, params))
-                    process.start()
-                    process_pool.append(process)
-                except StopIteration:
-                    break
-            
-            # Wait for processes to finish and start new ones until the input data is exhausted
-            while len(process_pool) > 0:
-                for process in process_pool:
-                    if not process.is_alive():
-                        try:
-                            res = process.join(0)
-                            if res:
-                                raise res
-                        except StopPipeline as e:
-                            log.error(e)
-                            raise e
-                        except Exception as e:
-                            for p in process_pool: # Kill remaining processes
-                                p.kill()
-                            raise e
-                        process_pool.remove(process)
+                    while len(chunk := chunker.next()) > 0:
+                        chunk_res = self._run_chunk(chunk, params)
+                        failures += self._journal(checkpoint, chunk, chunk_res)
+                        self._combine_partials(totals, chunk_res.partials)
+                        self._record_prefetch(chunk_res)
+                        if chunk_res.error:
+                            if isinstance(chunk_res.error, StopPipeline):
+                                log.error(chunk_res.error)
+                            raise chunk_res.error
                         if show_prog:
-                            prog_bar.update()
-                        try:
-                            mkey = next(mkey_iter)
-                            process = _ProcessReturn(target=self._run_pass, args=(mkey, params))
-                            process.start()
-                            process_pool.append(process)
-                        except StopIteration:
+                            prog_bar.update(prog_bar.current + chunk_res.processed)
+                        chunker.update(chunk_res.processed, chunk_res.elapsed)
+                finally:
+                    self._worker_stop()
+
+            else:
+                # Start parallel pipeline execution on a pool of long-lived workers (processes or threads). Also used by a
+                # single worker when there are timeouts, so a stuck worker can be replaced
+                if self.max_tasks_per_worker is not None and self.max_tasks_per_worker < 1:
+                    raise ValueError("max_tasks_per_worker must be greater than 0. Set to None to never recycle workers.")
+
+                budget = _MemoryBudget(self.name, self.memory_budget, workers, self._item_nbytes) if self.memory_budget is not None else None
+                pool: _ProcessPool|_ThreadPool
+                if mode == "process":
+                    pool = _ProcessPool(self, params, workers, self.max_tasks_per_worker)
+                else:
+                    pool = _ThreadPool(self, params, workers)
+                try:
+                    while True:
+                        # Hand out chunks of master keys to the idle workers. Each worker holds at most one chunk, which bounds
+                        # the work in flight
+                        while len(pool.idle()) > 0:
+                            next_chunk = budget.next(chunker) if budget is not None else chunker.next()
+                            if next_chunk is None or len(next_chunk) == 0:
+                                break # No chunks left or held back by the memory budget
+                            pool.submit(next_chunk)
+                        if len(pool.busy()) == 0:
                             break
 
+                        # Block until workers finish
+                        wait_start = time.perf_counter()
+                        finished = pool.wait()
+                        waited = time.perf_counter() - wait_start
+                        for chunk, status in finished:
+                            journaled = chunk # Items whose outcome is known
+                            if isinstance(status, _ChunkTimeout):
+                                # The worker was stopped, only the item that timed out failed. The outcome (outputs and
+                                # reducer partials) of the items processed before it was lost, so they are handed out again
+                                # with the items after it.
+                                journaled = [chunk[status.position]]
+                                lost = chunk[:status.position]
+                                if len(lost) > 0:
+                                    log.debug(f"Pipeline {self.name} processes {len(lost)} items again, their outcome was lost with the stopped worker")
+                                chunker.requeue(lost + chunk[status.position + 1:])
+                                chunk_res = _ChunkResult()
+                                chunk_res.processed = 1
+                                chunk_res.error = self._item_error(journaled[0], TimeoutError(str(status)), chunk_res.failed)
+                            elif isinstance(status, Exception): # The worker died before returning a result
+                                log.error(f"Error in pipeline {self.name}: {status}")
+                                if not self.error_tolerant:
+                                    raise status
+                                chunk_res = _ChunkResult()
+                                chunk_res.processed = len(chunk)
+                                chunk_res.failed = list(chunk)
+                            else:
+                                chunk_res = status
+                            if budget is not None:
+                                budget.done(chunk, chunk_res.peak_memory)
+                            failures += self._journal(checkpoint, journaled, chunk_res)
+                            self._combine_partials(totals, chunk_res.partials)
+                            self._record_prefetch(chunk_res)
+                            if chunk_res.error:
+                                if isinstance(chunk_res.error, StopPipeline):
+                                    log.error(chunk_res.error)
+                                raise chunk_res.error
+                            if show_prog:
+                                prog_bar.update(prog_bar.current + chunk_res.processed)
+                            if not isinstance(status, _ChunkTimeout):
+                                chunker.update(chunk_res.processed, chunk_res.elapsed)
+
+                        # Grow or shrink the pool
+                        if autoscaler is not None:
+                            autoscaler.record(sum(len(chunk) for chunk, _ in finished), waited)
+                            if (size := autoscaler.step()) != pool.size:
+                                pool.resize(size)
+                                chunker.workers = size
+                                if budget is not None:
+                                    budget.workers = size
+                except BaseException:
+                    pool.terminate() # Stop remaining workers
+                    raise
+                pool.close()
+            completed = failures == 0
+        finally:
+            if checkpoint is not None:
+                checkpoint.close(completed)
+
         # Finish the progress bar
         if show_prog:
             prog_bar.finish()
 
+        # Aggregate the master items with the reducer nodes
+        self._reduce(totals, params.copy())
+
+        lookups = self.prefetch_stats["hits"] + self.prefetch_stats["misses"]
+        if lookups > 0:
+            log.info(f"Pipeline {self.name} prefetching: {self.prefetch_stats['hits']}/{lookups} items loaded in time "
+                     f"({100 * self.prefetch_stats['hits'] / lookups:.1f}% hit rate), waited {self.prefetch_stats['stall']:.2f}s for inputs")
+
         log.info(f"Pipeline {self.name} finished")
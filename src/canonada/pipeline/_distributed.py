@@ -0,0 +1,319 @@
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from multiprocessing.connection import wait as wait_connections
+from typing import Any, Iterator
+
+from .._config import config
+from .._logger import logger as log
+
+
+def parse_address(address: str) -> tuple[str, int]:
+    """
+    Parse a `host:port` address
+
+    Args:
+        address (str): The address
+
+    Returns:
+        tuple[str, int]: The host and the port
+    """
+
+    host, _, port = address.rpartition(":")
+    if host == "" or not port.isdigit():
+        raise ValueError(f"Invalid address '{address}'. Must be host:port.")
+
+    return host.strip("[]"), int(port)
+
+def _authkey() -> bytes:
+    """
+    Get the key authenticating the coordinator and the workers: the CANONADA_AUTHKEY environment variable or `authkey`
+    in the `[distributed]` section of canonada.toml
+    """
+
+    key = os.environ.get("CANONADA_AUTHKEY") or config.get("distributed", {}).get("authkey")
+    if not key:
+        raise ValueError("No authentication key for distributed execution. Set `authkey` in the [distributed] section of "
+                         "canonada.toml or the CANONADA_AUTHKEY environment variable.")
+
+    return key.encode()
+
+class _RemoteWorker():
+    """
+    Connection to a worker, as seen by the coordinator
+    """
+
+    def __init__(self, conn: Any, name: str) -> None:
+        self.conn: Any = conn
+        self.name: str = name
+        self.last_seen: float = time.monotonic()
+        self.leases: set[int] = set()
+
+class _Coordinator():
+    """
+    Hands out leases on chunks of master keys to the workers connected over TCP and collects their results. Workers send
+    heartbeats, the chunks leased by a worker that disconnects or goes silent for `lease_timeout` seconds are leased again
+    to another worker. Items are processed at least once: those of a re-leased chunk may have already been saved.
+
+    The heartbeat interval and lease timeout are configured in the `[distributed]` section of canonada.toml.
+    """
+
+    def __init__(self, pipeline: Any, address: str, setup: dict[str, Any]) -> None:
+        """
+        Start listening for workers.
+
+        Args:
+            pipeline (Pipeline): The pipeline to run
+            address (str): Address to listen on (host:port)
+            setup (dict[str, any]): Sent to every worker when it connects (pipeline name, parameters and settings)
+        """
+
+        settings = config.get("distributed", {})
+        self.heartbeat: float = settings.get("heartbeat", 1.0)
+        self.lease_timeout: float = settings.get("lease_timeout", 10.0)
+        if self.heartbeat <= 0 or self.lease_timeout <= self.heartbeat:
+            raise ValueError("The heartbeat interval must be positive and shorter than the lease timeout")
+
+        self.name: str = pipeline.name
+        self._setup: dict[str, Any] = setup | {"heartbeat": self.heartbeat}
+        self._listener = Listener(parse_address(address), authkey=_authkey())
+        self._new: queue.Queue = queue.Queue()
+        self._workers: dict[Any, _RemoteWorker] = {}
+        self._leases: dict[int, tuple[list, _RemoteWorker]] = {}
+        self._next_lease: int = 0
+        self._connected: int = 0 # Number of workers that connected, used to name them
+        self._closed: bool = False
+        self._requeued: bool = False # Chunks of lost workers were put back since the chunker was exhausted
+        self._accepter = threading.Thread(target=self._accept, daemon=True)
+        self._accepter.start()
+        log.info(f"Pipeline {self.name} waiting for workers on {address}")
+
+    def _accept(self) -> None:
+        """
+        Accept the workers connecting. Runs on its own thread until the coordinator is closed.
+        """
+
+        while True:
+            try:
+                conn = self._listener.accept()
+            except AuthenticationError as e:
+                log.warning(f"Rejected a worker connection: {e}")
+                continue
+            except (EOFError, OSError):
+                if self._closed:
+                    break
+                continue # The client hung up during the handshake
+            if self._closed:
+                conn.close() # Connection waking up the thread, see `close`
+                break
+            try:
+                conn.send(("setup", self._setup))
+            except OSError:
+                continue
+            self._new.put(conn)
+
+    def results(self, chunker: Any) -> Iterator[tuple[list, Any]]:
+        """
+        Lease the chunks of master keys to the workers until every chunk was processed
+
+        Args:
+            chunker (_Chunker): The chunks of master keys. Chunks of lost workers are put back with `requeue`.
+
+        Yields:
+            tuple[list, _ChunkResult]: Each processed chunk and its result
+        """
+
+        exhausted = False
+        # Chunks of lost workers may be put back once every chunk was leased, even after the last lease was dropped
+        while not exhausted or len(self._leases) > 0 or self._requeued:
+            while not self._new.empty():
+                conn = self._new.get()
+                self._connected += 1
+                self._workers[conn] = _RemoteWorker(conn, f"worker {self._connected}")
+                log.info(f"Pipeline {self.name}: {len(self._workers)} workers connected")
+            chunker.workers = max(1, len(self._workers))
+
+            if self._requeued:
+                exhausted = self._requeued = False
+            for ready in wait_connections(list(self._workers.keys()), self.heartbeat):
+                worker = self._workers[ready]
+                try:
+                    message = worker.conn.recv()
+                    if message[0] == "lease":
+                        chunk = chunker.next() if not exhausted else []
+                        if len(chunk) == 0:
+                            exhausted = True
+                            # Idle workers ask again, chunks of lost workers may still be leased again
+                            worker.conn.send(("wait", self.heartbeat))
+                        else:
+                            self._next_lease += 1
+                            self._leases[self._next_lease] = (chunk, worker)
+                            worker.leases.add(self._next_lease)
+                            worker.conn.send(("chunk", self._next_lease, chunk))
+                except (EOFError, OSError):
+                    self._drop(worker, chunker, "disconnected")
+                    continue
+                worker.last_seen = time.monotonic()
+
+                if message[0] == "result":
+                    _, lease, chunk_res = message
+                    if lease not in worker.leases:
+                        continue # Lease expired, the chunk was leased again
+                    worker.leases.discard(lease)
+                    chunk, _ = self._leases.pop(lease)
+                    yield chunk, chunk_res
+
+            # Lease again the chunks of silent workers
+            now = time.monotonic()
+            for worker in list(self._workers.values()):
+                if now - worker.last_seen > self.lease_timeout:
+                    self._drop(worker, chunker, f"sent no heartbeat for {self.lease_timeout}s")
+
+    def _drop(self, worker: _RemoteWorker, chunker: Any, reason: str) -> None:
+        """
+        Disconnect a worker and put its leased chunks back to be leased again
+        """
+
+        self._workers.pop(worker.conn, None)
+        worker.conn.close()
+        for lease in worker.leases:
+            chunk, _ = self._leases.pop(lease)
+            chunker.requeue(chunk)
+            self._requeued = True
+        log.warning(f"Pipeline {self.name}: {worker.name} {reason}, {len(worker.leases)} leased chunks are leased again")
+        worker.leases.clear()
+
+    def close(self) -> None:
+        """
+        Stop the connected workers and stop listening
+        """
+
+        # Connect once to wake up the thread blocked accepting connections
+        self._closed = True
+        try:
+            Client(self._listener.address, authkey=_authkey()).close()
+        except (OSError, EOFError, AuthenticationError):
+            pass
+        self._accepter.join(timeout=5)
+        self._listener.close()
+        while not self._new.empty():
+            conn = self._new.get()
+            self._workers[conn] = _RemoteWorker(conn, "")
+        for conn in self._workers:
+            try:
+                conn.send(("stop",))
+            except OSError:
+                pass
+            conn.close()
+        self._workers.clear()
+
+def run_worker(address: str, processes: int = 1, connect_timeout: float = 60.0) -> None:
+    """
+    Process the master items leased by the coordinator of a pipeline run (see `Pipeline.run` with `listen`). The worker
+    must have the same project (pipelines and catalog) as the coordinator and access to its data. Waits up to
+    `connect_timeout` seconds for the coordinator to start and returns when the run finishes.
+
+    Args:
+        address (str): Address of the coordinator (host:port)
+        processes (int, optional): Number of worker processes to start. Each one connects to the coordinator and processes
+          its chunks sequentially. Defaults to 1.
+        connect_timeout (float, optional): Seconds to wait for the coordinator to accept connections. Defaults to 60.
+    """
+
+    parse_address(address)
+    if processes < 1:
+        raise ValueError("The number of worker processes must be greater than 0")
+    if processes == 1:
+        _worker(address, connect_timeout)
+        return
+
+    workers = [multiprocessing.Process(target=_worker, args=(address, connect_timeout)) for _ in range(processes)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+
+def _worker(address: str, connect_timeout: float) -> None:
+    """
+    Connect to a coordinator and process leased chunks until it stops the run
+    """
+
+    from ._core import Pipeline # Imported here, the pipeline module uses the coordinator
+
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            conn = Client(parse_address(address), authkey=_authkey())
+            break
+        except ConnectionRefusedError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2) # The coordinator did not start yet
+    _, setup = conn.recv()
+    pipeline = next((p for p in Pipeline.registry if p.name == setup["pipeline"]), None)
+    if pipeline is None:
+        conn.close()
+        raise ValueError(f"Pipeline {setup['pipeline']} not found")
+    log.info(f"Connected to {address}, running pipeline {pipeline.name}")
+
+    # Build the same execution plan as the coordinator
+    for name, value in setup["settings"].items():
+        setattr(pipeline, name, value)
+    pipeline._calc_exec_order()
+    if pipeline.optimize:
+        pipeline._optimize_plan()
+    if setup["shard"] is not None:
+        for datahandler in pipeline._output_datahandlers.values():
+            datahandler.set_shard(*setup["shard"])
+    pipeline._in_worker_process = True
+
+    # Heartbeats are sent from a thread, also while a chunk is running
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def beat() -> None:
+        while not stop.wait(setup["heartbeat"]):
+            try:
+                with lock:
+                    conn.send(("heartbeat",))
+            except OSError:
+                return
+
+    threading.Thread(target=beat, daemon=True).start()
+    try:
+        request = True
+        while True:
+            if request:
+                with lock:
+                    conn.send(("lease",))
+            message = conn.recv()
+            request = True
+            match message[0]:
+                case "chunk":
+                    _, lease, chunk = message
+                    chunk_res = pipeline._run_chunk(chunk, setup["params"])
+                    if conn.poll():
+                        request = False # The coordinator stopped the run
+                        continue
+                    with lock:
+                        try:
+                            conn.send(("result", lease, chunk_res))
+                        except (pickle.PicklingError, TypeError, AttributeError):
+                            # The error of the chunk can not be pickled
+                            chunk_res.error = RuntimeError(str(chunk_res.error))
+                            conn.send(("result", lease, chunk_res))
+                case "wait":
+                    request = not conn.poll(message[1]) # Ask again, unless the coordinator stops the run meanwhile
+                case "stop":
+                    break
+    except (EOFError, OSError):
+        log.warning(f"Lost the connection to the coordinator at {address}")
+    finally:
+        stop.set()
+        pipeline._worker_stop()
+        conn.close()
@@ -0,0 +1,169 @@
+import copy
+import hashlib
+import io
+import pickle
+from typing import Any, NoReturn
+
+try:
+    import numpy as np
+except ImportError: # NumPy is optional
+    np = None # type: ignore
+
+# Policies to pass the known inputs to the nodes
+COPY_POLICIES = ("deep", "none", "readonly")
+
+
+def _read_only(*args, **kwargs) -> NoReturn:
+    raise TypeError("Node inputs are read-only (copy_inputs='readonly'). Copy the input before modifying it.")
+
+class _FrozenDict(dict):
+    """
+    Read-only dictionary. Still a `dict`, so it can be serialized and saved like the original.
+    """
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (_FrozenDict, (dict(self),))
+
+class _FrozenList(list):
+    """
+    Read-only list. Still a `list`, so it can be serialized and saved like the original.
+    """
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = clear = extend = insert = pop = remove = reverse = sort = _read_only
+
+    def __reduce__(self):
+        return (_FrozenList, (list(self),))
+
+def freeze(value: Any) -> Any:
+    """
+    Get a read-only version of a value. Containers are rebuilt as read-only containers (leaf values are not copied) and
+    NumPy arrays are returned as non-writeable views.
+
+    Args:
+        value (any): The value to freeze
+
+    Returns:
+        any: The read-only value
+    """
+
+    if isinstance(value, dict):
+        return _FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return _FrozenList(freeze(v) for v in value)
+    if isinstance(value, tuple) and not hasattr(value, "_fields"): # Keep named tuples as they are
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    if isinstance(value, bytearray):
+        return bytes(value)
+    if np is not None and isinstance(value, np.ndarray):
+        view = value.view()
+        view.flags.writeable = False
+        return view
+
+    return value
+
+def prepare_input(value: Any, policy: str) -> Any:
+    """
+    Prepare a known input to be passed to a node
+
+    Args:
+        value (any): The known input
+        policy (str): "deep" to pass a deep copy, "none" to pass the value by reference or "readonly" to pass a read-only
+          version of the value.
+
+    Returns:
+        any: The value to pass to the node
+    """
+
+    match policy:
+        case "deep":
+            return copy.deepcopy(value)
+        case "readonly":
+            return freeze(value)
+        case _:
+            return value
+
+class _CanonicalPickler(pickle.Pickler):
+    """
+    Pickler writing the items of sets in a fixed order. Sets of strings are otherwise ordered by their hash, which changes
+    between runs (hash randomization).
+    """
+
+    def persistent_id(self, obj: Any) -> Any:
+        if type(obj) in (set, frozenset):
+            return (type(obj).__name__, sorted(_canonical_dumps(item) for item in obj))
+        return None
+
+def _canonical_dumps(value: Any) -> bytes:
+    """
+    Serialize a value with the items of its sets in a fixed order
+    """
+
+    data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    # Without the set opcodes there are no sets, the canonical pickler would write the same bytes (only slower)
+    if b"\x8f" not in data and b"\x91" not in data:
+        return data
+    buffer = io.BytesIO()
+    _CanonicalPickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(value)
+    return buffer.getvalue()
+
+def fingerprint(value: Any) -> bytes|None:
+    """
+    Get a hash of the contents of a value, stable between runs. Used to detect inputs modified in place and to key the
+    node result cache.
+
+    Args:
+        value (any): The value to fingerprint
+
+    Returns:
+        bytes|None: The hash of the value, or None if the value can not be serialized
+    """
+
+    try:
+        return hashlib.blake2b(_canonical_dumps(value), digest_size=16).digest()
+    except Exception:
+        return None
+
+def prepare_batch(values: list, policy: str) -> Any:
+    """
+    Prepare the values of one input for a batch of items. NumPy arrays of the same shape and dtype are stacked into a
+    single array (with the batch as the first axis), any other values are passed as a list.
+
+    Args:
+        values (list): The known input of every item in the batch
+        policy (str): The copy policy, see `prepare_input`
+
+    Returns:
+        any: The batched input
+    """
+
+    if np is not None and len(values) > 0 and all(isinstance(v, np.ndarray) for v in values) \
+        and len({(v.shape, v.dtype) for v in values}) == 1:
+        batch = np.stack(values) # Always a new array, no need to copy
+        if policy == "readonly":
+            batch.flags.writeable = False
+        return batch
+
+    return [prepare_input(value, policy) for value in values]
+
+def split_batch(values: Any, size: int) -> list:
+    """
+    Split one output of a batch back into the values for each item
+
+    Args:
+        values (any): The batched output (a sequence or an array with the batch as the first axis)
+        size (int): Number of items in the batch
+
+    Returns:
+        list: The output of every item
+    """
+
+    if isinstance(values, (str, bytes, dict)) or not hasattr(values, "__len__") or len(values) != size:
+        raise ValueError(f"Expected a batch of {size} elements")
+
+    return list(values)
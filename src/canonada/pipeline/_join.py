@@ -0,0 +1,157 @@
+from typing import Any, Callable, Iterable, Iterator
+
+from .._logger import logger as log
+from ..catalog import Datahandler
+from ..exceptions import SkipItem
+
+# How the master items are joined with the other input datasets
+JOIN_TYPES = ("left", "inner")
+# What a left join passes for an input missing the key of a master item
+MISSING_POLICIES = ("error", "none", "skip")
+
+_END = object() # End of a key iterator
+
+
+class _Join():
+    """
+    Join of the master dataset of a pipeline with its other input datasets. Each master key is mapped to the key of the
+    item to load from every other dataset: with the function given in `key_map`, by projecting the master key on the
+    join columns of the dataset (its `keys` in the catalog) or as is.
+
+    Inner joins only keep the master items found in every dataset. They stream the keys of all the datasets side by side
+    (merge join) when every dataset yields its keys in order and all the keys have the same type, and look the master
+    keys up in a set of the keys of each dataset (hash join) otherwise.
+    """
+
+    def __init__(self, master: str, datahandlers: dict[str, Datahandler], how: str, missing: str,
+                 key_map: dict[str, Callable]|None = None) -> None:
+        """
+        Args:
+            master (str): Name of the master dataset
+            datahandlers (dict[str, Datahandler]): The input datahandlers, including the master
+            how (str): "left" (every master item) or "inner" (master items found in every dataset)
+            missing (str): What a left join passes for an input without the key: "error" (the item fails), "none" (None)
+              or "skip" (the item is skipped)
+            key_map (dict[str, callable], optional): Functions mapping a master key to the key of a dataset
+        """
+
+        for name in key_map or {}:
+            if name not in datahandlers or name == master:
+                raise ValueError(f"Invalid key_map dataset '{name}'. Must be an input dataset other than the master dataset '{master}'.")
+
+        self.master: str = master
+        self.datahandlers: dict[str, Datahandler] = datahandlers
+        self.how: str = how
+        self.missing: str = missing
+        self._maps: dict[str, Callable|None] = {name: self._key_map(name, key_map or {}) for name in datahandlers if name != master}
+        ordered = all(self._maps[name] is None for name in self._maps) and all(dh.sorted_keys() for dh in datahandlers.values())
+        self.strategy: str = "merge" if ordered and self._comparable_keys() else "hash"
+
+    def _key_map(self, name: str, key_map: dict[str, Callable]) -> Callable|None:
+        """
+        Get the function mapping a master key to the key of a dataset, or None if the keys are the same
+        """
+
+        if name in key_map:
+            return key_map[name]
+
+        # Project the master key on the join columns of the dataset
+        master_columns = list(self.datahandlers[self.master].keys)
+        columns = list(self.datahandlers[name].keys)
+        if len(columns) > 0 and columns != master_columns and all(column in master_columns for column in columns):
+            positions = [master_columns.index(column) for column in columns]
+            return lambda master_key: tuple(master_key[i] for i in positions)
+
+        return None
+
+    def _comparable_keys(self) -> bool:
+        """
+        Whether the keys of all the datasets can be ordered against each other (e.g. not filenames against row numbers),
+        judging by the type of the first key of each dataset
+        """
+
+        key_types = set()
+        for datahandler in self.datahandlers.values():
+            first = next(iter(datahandler.iter_keys()), _END)
+            if first is not _END:
+                key_types.add(type(first))
+        return len(key_types) <= 1
+
+    def key(self, name: str, master_key: Any) -> Any:
+        """
+        Get the key of the item of a dataset joined with a master item
+        """
+
+        key_map = self._maps.get(name)
+        return master_key if key_map is None else key_map(master_key)
+
+    def keys(self, master_keys: Iterable) -> Iterable:
+        """
+        Filter the master keys to join
+
+        Args:
+            master_keys (iterable): The master keys
+
+        Returns:
+            iterable: The master keys of the items to process
+        """
+
+        if self.how == "left" or len(self._maps) == 0:
+            return master_keys
+        log.debug(f"Inner join of {self.master} with {', '.join(self._maps)} ({self.strategy} join)")
+        return self._merge_join(master_keys) if self.strategy == "merge" else self._hash_join(master_keys)
+
+    def _hash_join(self, master_keys: Iterable) -> Iterator:
+        tables = {name: set(self.datahandlers[name].iter_keys()) for name in self._maps}
+        for master_key in master_keys:
+            if all(self.key(name, master_key) in table for name, table in tables.items()):
+                yield master_key
+
+    def _merge_join(self, master_keys: Iterable) -> Iterator:
+        iterators = {name: iter(self.datahandlers[name].iter_keys()) for name in self._maps}
+        current = {name: next(iterator, _END) for name, iterator in iterators.items()}
+        for master_key in master_keys:
+            found = True
+            for name, iterator in iterators.items():
+                # Advance each dataset up to the master key
+                while current[name] is not _END and current[name] < master_key:
+                    current[name] = next(iterator, _END)
+                found = found and current[name] is not _END and current[name] == master_key
+            if found:
+                yield master_key
+
+    def load(self, name: str, master_key: Any) -> Any:
+        """
+        Load the item of a dataset joined with a master item
+
+        Args:
+            name (str): Name of the dataset
+            master_key (any): The master key
+
+        Returns:
+            any: The loaded item (see `missing` for keys not found)
+        """
+
+        key = self.key(name, master_key)
+        try:
+            return self.datahandlers[name][key]
+        except KeyError:
+            return self._missing(name, key)
+
+    async def aload(self, name: str, master_key: Any) -> Any:
+        """
+        Load the item of a dataset joined with a master item asynchronously. See `load`.
+        """
+
+        key = self.key(name, master_key)
+        try:
+            return await self.datahandlers[name].aload(key)
+        except KeyError:
+            return self._missing(name, key)
+
+    def _missing(self, name: str, key: Any) -> Any:
+        if name == self.master or self.missing == "error":
+            raise KeyError(f"Key {key} not found in dataset {name}")
+        if self.missing == "skip":
+            raise SkipItem(master_key=key, message=f"Key {key} not found in dataset {name}")
+        return None
@@ -0,0 +1,21 @@
+import hashlib
+from typing import Any
+
+from ._checkpoint import encode_key
+
+
+def shard_of(master_key: Any, count: int) -> int:
+    """
+    Get the shard of a master key. Uses a hash of the encoded key, stable across processes, machines and Python versions
+    (unlike `hash`), so independent runs agree on the partition.
+
+    Args:
+        master_key (any): The master key
+        count (int): The number of shards
+
+    Returns:
+        int: The shard of the key, from 0 to count - 1
+    """
+
+    digest = hashlib.blake2b(encode_key(master_key).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count
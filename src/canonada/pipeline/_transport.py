@@ -0,0 +1,113 @@
+import os
+import pickle
+import secrets
+from multiprocessing import shared_memory
+from typing import Any
+
+# Directory where POSIX shared memory segments are listed (Linux)
+_SHM_DIR = "/dev/shm"
+
+
+def send(conn: Any, obj: Any, threshold: int|None, prefix: str) -> list[str]:
+    """
+    Send an object through a connection. Buffers of at least `threshold` bytes (pickle protocol 5 out-of-band buffers,
+    e.g. contiguous NumPy arrays) are written to shared memory segments and only the segment names go through the pipe.
+
+    Args:
+        conn (Connection): The connection to send the object through
+        obj (any): The object to send
+        threshold (int|None): Minimum size in bytes of a buffer to be sent through shared memory. None to send everything
+          through the pipe.
+        prefix (str): Prefix of the names of the created segments
+
+    Returns:
+        list[str]: The names of the created segments. They are removed by the receiver (see `recv`) or, if the receiver
+          dies first, by the sender with `release`.
+    """
+
+    segments: list[tuple[str, int]] = []
+
+    def place(buffer: pickle.PickleBuffer) -> bool:
+        try:
+            view = buffer.raw()
+        except BufferError: # Non-contiguous buffers are serialized in-band
+            return True
+        if threshold is None or view.nbytes < threshold or view.nbytes == 0:
+            return True
+
+        name = f"{prefix}{secrets.token_hex(8)}"
+        shm = shared_memory.SharedMemory(name=name, create=True, size=view.nbytes)
+        segments.append((name, view.nbytes))
+        try:
+            assert shm.buf is not None
+            shm.buf[:view.nbytes] = view
+        finally:
+            shm.close()
+        return False
+
+    try:
+        payload = pickle.dumps(obj, protocol=5, buffer_callback=place)
+        conn.send(segments)
+        conn.send_bytes(payload)
+    except BaseException:
+        release([name for name, _ in segments])
+        raise
+
+    return [name for name, _ in segments]
+
+def recv(conn: Any) -> Any:
+    """
+    Receive an object sent with `send`. The shared memory segments are copied and removed.
+
+    Args:
+        conn (Connection): The connection to receive the object from
+
+    Returns:
+        any: The received object
+    """
+
+    segments = conn.recv()
+    try:
+        payload = conn.recv_bytes()
+        buffers = []
+        for name, size in segments:
+            shm = shared_memory.SharedMemory(name=name)
+            try:
+                assert shm.buf is not None
+                buffers.append(bytearray(shm.buf[:size]))
+            finally:
+                shm.close()
+    finally:
+        release([name for name, _ in segments])
+
+    return pickle.loads(payload, buffers=buffers)
+
+def release(names: list[str]) -> None:
+    """
+    Remove shared memory segments. Segments that do not exist anymore are ignored.
+
+    Args:
+        names (list[str]): The names of the segments
+    """
+
+    for name in names:
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+        except FileNotFoundError:
+            continue
+        shm.close()
+        shm.unlink()
+
+def cleanup(prefix: str) -> None:
+    """
+    Remove every shared memory segment whose name starts with `prefix`. Used to release the segments of a worker that
+    died while sending a message. Only supported where segments are listed in /dev/shm (Linux), elsewhere leaked segments
+    are removed by the multiprocessing resource tracker when the program exits.
+
+    Args:
+        prefix (str): Prefix of the segment names
+    """
+
+    if not os.path.isdir(_SHM_DIR):
+        return
+    release([name for name in os.listdir(_SHM_DIR) if name.startswith(prefix)])
@@ -0,0 +1,931 @@
+import copy
+import itertools
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing.connection import wait as wait_connections
+from typing import Any, Callable, Iterable, Iterator
+
+from .._logger import logger as log
+from . import _transport
+
+_NO_DEADLINE = float("inf")
+# Seconds between checks of the worker deadlines. Node deadlines are set by the workers while the parent waits.
+_WATCHDOG_INTERVAL = 0.05
+
+
+class _Watchdog():
+    """
+    Deadlines of the item and the node a worker is running, written by the worker and checked by the parent. Process
+    workers share them through shared memory (set before the process is forked). Deadlines use `time.monotonic`, which is
+    system-wide.
+    """
+
+    def __init__(self, shared: bool) -> None:
+        """
+        Args:
+            shared (bool): Share the deadlines with a worker process
+        """
+
+        # Item deadline, node deadline, position of the item in the chunk
+        self._values: Any = multiprocessing.RawArray("d", 3) if shared else [0.0, 0.0, 0.0]
+        self.cancelled: bool = False # Set by the parent when it gives up on a worker thread (threads can not be killed)
+        self.idle()
+
+    def start_item(self, position: int, timeout: float|None) -> None:
+        self._values[2] = position
+        self._values[1] = _NO_DEADLINE
+        self._values[0] = time.monotonic() + timeout if timeout is not None else _NO_DEADLINE
+
+    def start_node(self, timeout: float) -> None:
+        self._values[1] = time.monotonic() + timeout
+
+    def end_node(self) -> None:
+        self._values[1] = _NO_DEADLINE
+
+    def idle(self) -> None:
+        self._values[0] = self._values[1] = _NO_DEADLINE
+        self._values[2] = 0
+
+    @property
+    def deadline(self) -> float:
+        return min(self._values[0], self._values[1])
+
+    def expired(self) -> "_ChunkTimeout|None":
+        """
+        Check whether a deadline passed
+
+        Returns:
+            _ChunkTimeout|None: The timeout, or None if no deadline passed
+        """
+
+        item_deadline, node_deadline, position = self._values[0], self._values[1], int(self._values[2])
+        if time.monotonic() < min(item_deadline, node_deadline):
+            return None
+        limit = "node timeout" if node_deadline <= item_deadline else "item_timeout"
+        return _ChunkTimeout(position, f"Item timed out ({limit} exceeded)")
+
+def _wait_timeout(workers: list) -> float|None:
+    """
+    Get how long a pool may block waiting for results before checking the deadlines of its workers
+    """
+
+    deadlines = [worker.watchdog.deadline for worker in workers if worker.watchdog is not None]
+    if len(deadlines) == 0:
+        return None
+    return max(0.0, min(min(deadlines) - time.monotonic(), _WATCHDOG_INTERVAL))
+
+class _ChunkTimeout(Exception):
+    """
+    Result of a chunk whose worker was stopped because an item exceeded its time limit
+    """
+
+    def __init__(self, position: int, message: str) -> None:
+        """
+        Args:
+            position (int): Position in the chunk of the item that timed out. The items before it were processed.
+            message (str): Description of the timeout
+        """
+
+        super().__init__(message)
+        self.position: int = position
+
+
+def _process_worker(pipeline: Any, params: dict[str, Any], conn: Any, max_tasks: int|None, prefix: str,
+                    watchdog: _Watchdog|None = None) -> None:
+    """
+    Main loop of a long-lived worker process. Receives chunks of master keys from the parent, runs a pass of the pipeline
+    over each chunk and sends the combined result back.
+
+    Args:
+        pipeline (Pipeline): The pipeline to run. Its execution order and datahandlers must be already calculated.
+        params (dict[str, any]): Catalog parameters dictionary
+        conn (Connection): Connection to the parent process
+        max_tasks (int|None): Number of chunks after which the worker exits. None to keep the worker alive until stopped.
+        prefix (str): Prefix of the shared memory segments created by the worker
+        watchdog (_Watchdog, optional): Deadlines shared with the parent, when the pipeline has timeouts
+    """
+
+    pipeline._in_worker_process = True # Nodes placed on a process executor run inline
+    tasks_done = 0
+    while max_tasks is None or tasks_done < max_tasks:
+        try:
+            chunk = _transport.recv(conn)
+        except EOFError:
+            break # The parent closed the connection
+        if chunk is None:
+            break # Stop request from the parent
+
+        _transport.send(conn, pipeline._run_chunk(chunk, params, watchdog), pipeline.shm_threshold, prefix)
+        tasks_done += 1
+
+    pipeline._worker_stop()
+    conn.close()
+
+class _ProcessWorker():
+    """
+    Handle to a long-lived worker process and the connection used to send it tasks
+    """
+
+    def __init__(self, pipeline: Any, params: dict[str, Any], max_tasks: int|None, prefix: str) -> None:
+        """
+        Start a new worker process.
+
+        Args:
+            pipeline (Pipeline): The pipeline to run.
+            params (dict[str, any]): Catalog parameters dictionary
+            max_tasks (int|None): Number of tasks after which the worker is recycled. None to never recycle it.
+            prefix (str): Prefix of the shared memory segments created by the worker. Must be unique to the worker.
+        """
+
+        self.watchdog: _Watchdog|None = _Watchdog(shared=True) if pipeline._has_timeouts() else None
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_process_worker, args=(pipeline, params, child_conn, max_tasks, prefix, self.watchdog))
+        self.process.start()
+        child_conn.close() # Only the child uses this end
+        self.max_tasks: int|None = max_tasks
+        self.tasks_done: int = 0
+        self.task: Any = None
+        self.prefix: str = prefix
+        self.segments: list[str] = [] # Shared memory segments sent with the current task
+
+    @property
+    def busy(self) -> bool:
+        return self.task is not None
+
+    @property
+    def exhausted(self) -> bool:
+        return self.max_tasks is not None and self.tasks_done >= self.max_tasks
+
+    def stop(self, timeout: float|None = None) -> None:
+        """
+        Ask the worker to exit and wait for it. Kills the process if it does not exit in time.
+        """
+
+        if self.process.is_alive():
+            try:
+                _transport.send(self.conn, None, None, "")
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(timeout)
+        self.kill()
+
+    def kill(self) -> None:
+        """
+        Kill the worker process (if still alive) and release its resources
+        """
+
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+        # Remove the shared memory segments that were not received
+        _transport.release(self.segments)
+        _transport.cleanup(self.prefix)
+
+class _ProcessPool():
+    """
+    Pool of long-lived worker processes. Each worker is started once, keeps its own copy of the pipeline (execution
+    order and datahandlers) and processes many master keys over its lifetime.
+
+    Messages between the parent and the workers go through `_transport`, large buffers are handed over through shared
+    memory. The pool releases the segments of every task once it finishes, and those left behind by dead workers.
+    """
+
+    def __init__(self, pipeline: Any, params: dict[str, Any], size: int, max_tasks_per_worker: int|None = None) -> None:
+        """
+        Start the worker processes.
+
+        Args:
+            pipeline (Pipeline): The pipeline to run.
+            params (dict[str, any]): Catalog parameters dictionary
+            size (int): Number of worker processes.
+            max_tasks_per_worker (int|None, optional): Number of tasks after which a worker is replaced by a fresh one.
+              Defaults to None (workers live for the whole run).
+        """
+
+        self._pipeline = pipeline
+        self._params = params
+        self._max_tasks = max_tasks_per_worker
+        self._started: int = 0 # Number of workers started, used to name their shared memory segments
+        self.size: int = size
+
+        # Start the resource tracker before forking, so all the workers share it with the parent
+        if os.name == "posix":
+            from multiprocessing import resource_tracker
+            resource_tracker.ensure_running()
+
+        self.workers: list[_ProcessWorker] = [self._start_worker() for _ in range(size)]
+
+    def _start_worker(self) -> _ProcessWorker:
+        """
+        Start a new worker process
+        """
+
+        self._started += 1
+        return _ProcessWorker(self._pipeline, self._params, self._max_tasks, f"cnd{os.getpid()}w{self._started}_")
+
+    def idle(self) -> list[_ProcessWorker]:
+        """
+        List the workers without an assigned task
+        """
+
+        return [worker for worker in self.workers if not worker.busy]
+
+    def busy(self) -> list[_ProcessWorker]:
+        """
+        List the workers with an assigned task
+        """
+
+        return [worker for worker in self.workers if worker.busy]
+
+    def submit(self, task: Any) -> None:
+        """
+        Send a task to an idle worker
+        """
+
+        worker = self.idle()[0]
+        worker.task = task
+        worker.segments = _transport.send(worker.conn, task, self._pipeline.shm_threshold, f"cnd{os.getpid()}p_")
+
+    def wait(self) -> list[tuple[Any, Any]]:
+        """
+        Block until at least one of the busy workers finishes its task, or a worker is stopped for exceeding a deadline.
+        May return no tasks when workers have deadlines, which are checked every `_WATCHDOG_INTERVAL` seconds.
+
+        Returns:
+            list[tuple[any, any]]: A list of (task, result) tuples for every finished task. If a worker died while processing
+              a task, its result is a RuntimeError. If it was killed for exceeding a deadline, a `_ChunkTimeout`.
+        """
+
+        busy = self.busy()
+        if len(busy) == 0:
+            return []
+
+        # Wait on the result connections and on the process sentinels (to detect dead workers), checking the deadlines
+        conns: dict[Any, _ProcessWorker] = {worker.conn: worker for worker in busy}
+        sentinels: dict[Any, _ProcessWorker] = {worker.process.sentinel: worker for worker in busy}
+        ready = wait_connections(list(conns.keys()) + list(sentinels.keys()), _wait_timeout(busy))
+
+        finished: list[tuple[Any, Any]] = []
+        handled: set[int] = set()
+        # Kill the workers running an item past its deadline, unless the result is already there
+        for worker in busy:
+            if worker.watchdog is None or worker.conn in ready or worker.process.sentinel in ready:
+                continue
+            expired = worker.watchdog.expired()
+            if expired is None or worker.conn.poll():
+                continue # Not expired, or the result arrived in the meantime (received on the next wait)
+            handled.add(id(worker))
+            task = worker.task
+            worker.task = None
+            worker.kill() # Also releases the shared memory segments of the task
+            worker.segments = []
+            finished.append((task, expired))
+            if len(self.workers) > self.size:
+                self.workers.remove(worker)
+            else:
+                self.workers[self.workers.index(worker)] = self._start_worker()
+
+        for obj in ready:
+            worker = conns[obj] if obj in conns else sentinels[obj]
+            if id(worker) in handled:
+                continue
+            handled.add(id(worker))
+
+            task = worker.task
+            result: Any
+            try:
+                if not worker.conn.poll():
+                    raise EOFError
+                result = _transport.recv(worker.conn)
+                worker.tasks_done += 1
+            except (EOFError, OSError):
+                # The worker died without returning a result
+                worker.process.join()
+                result = RuntimeError(f"Worker process exited unexpectedly (exit code {worker.process.exitcode})")
+            worker.task = None
+            _transport.release(worker.segments)
+            worker.segments = []
+            finished.append((task, result))
+
+            # Retire workers above the pool size, replace dead or exhausted workers
+            if len(self.workers) > self.size:
+                worker.stop()
+                self.workers.remove(worker)
+            elif worker.exhausted or not worker.process.is_alive() and worker.process.exitcode is not None:
+                self._replace(worker)
+
+        return finished
+
+    def resize(self, size: int) -> None:
+        """
+        Change the number of workers. New workers start right away, idle workers above the new size are stopped and busy
+        ones once they finish their task.
+        """
+
+        self.size = size
+        while len(self.workers) < size:
+            self.workers.append(self._start_worker())
+        for worker in self.idle()[:max(0, len(self.workers) - size)]:
+            worker.stop(timeout=5)
+            self.workers.remove(worker)
+
+    def _replace(self, worker: _ProcessWorker) -> None:
+        """
+        Stop a worker and start a fresh one in its place
+        """
+
+        worker.stop()
+        self.workers[self.workers.index(worker)] = self._start_worker()
+
+    def close(self) -> None:
+        """
+        Stop all workers gracefully
+        """
+
+        for worker in self.workers:
+            worker.stop(timeout=5)
+        self.workers = []
+
+    def terminate(self) -> None:
+        """
+        Kill all workers immediately
+        """
+
+        for worker in self.workers:
+            worker.kill()
+        self.workers = []
+
+def _thread_worker(pipeline: Any, params: dict[str, Any], worker: "_ThreadWorker", results: queue.Queue) -> None:
+    """
+    Main loop of a long-lived worker thread. Takes chunks of master keys from its task queue, runs a pass of the pipeline
+    over each chunk and puts the combined result in the shared results queue.
+
+    Args:
+        pipeline (Pipeline): The pipeline to run. Its execution order and datahandlers must be already calculated.
+        params (dict[str, any]): Catalog parameters dictionary
+        worker (_ThreadWorker): Handle of this worker
+        results (queue.Queue): Queue shared by all workers to report finished chunks
+    """
+
+    while True:
+        chunk = worker.tasks.get()
+        if chunk is None:
+            break # Stop request from the parent
+
+        result: Any
+        try:
+            result = pipeline._run_chunk(chunk, params, worker.watchdog)
+        except Exception as e:
+            result = e
+        results.put((worker, result))
+
+    pipeline._worker_stop()
+
+class _ThreadWorker():
+    """
+    Handle to a long-lived worker thread and the queue used to send it tasks
+    """
+
+    def __init__(self, pipeline: Any, params: dict[str, Any], results: queue.Queue) -> None:
+        """
+        Start a new worker thread.
+
+        Args:
+            pipeline (Pipeline): The pipeline to run.
+            params (dict[str, any]): Catalog parameters dictionary. Each worker gets its own copy.
+            results (queue.Queue): Queue shared by all workers to report finished chunks
+        """
+
+        self.tasks: queue.Queue = queue.Queue()
+        self.task: Any = None
+        self.watchdog: _Watchdog|None = _Watchdog(shared=False) if pipeline._has_timeouts() else None
+        self.abandoned: bool = False # Set when the worker timed out. Threads can not be killed, its results are ignored.
+        # Daemon threads, so a thread stuck on a timed out item does not keep the program alive
+        self.thread = threading.Thread(target=_thread_worker, args=(pipeline, copy.deepcopy(params), self, results), daemon=True)
+        self.thread.start()
+
+    @property
+    def busy(self) -> bool:
+        return self.task is not None
+
+class _ThreadPool():
+    """
+    Pool of long-lived worker threads. Exposes the same interface as `_ProcessPool`.
+    """
+
+    def __init__(self, pipeline: Any, params: dict[str, Any], size: int) -> None:
+        """
+        Start the worker threads.
+
+        Args:
+            pipeline (Pipeline): The pipeline to run.
+            params (dict[str, any]): Catalog parameters dictionary
+            size (int): Number of worker threads.
+        """
+
+        self._pipeline = pipeline
+        self._params = params
+        self._results: queue.Queue = queue.Queue()
+        self._retired: list[_ThreadWorker] = [] # Stopped workers that may still be finishing
+        self.size: int = size
+        self.workers: list[_ThreadWorker] = [_ThreadWorker(pipeline, params, self._results) for _ in range(size)]
+
+    def idle(self) -> list[_ThreadWorker]:
+        """
+        List the workers without an assigned task
+        """
+
+        return [worker for worker in self.workers if not worker.busy]
+
+    def busy(self) -> list[_ThreadWorker]:
+        """
+        List the workers with an assigned task
+        """
+
+        return [worker for worker in self.workers if worker.busy]
+
+    def submit(self, task: Any) -> None:
+        """
+        Send a task to an idle worker
+        """
+
+        worker = self.idle()[0]
+        worker.task = task
+        worker.tasks.put(task)
+
+    def wait(self) -> list[tuple[Any, Any]]:
+        """
+        Block until at least one of the busy workers finishes its task, or a worker is replaced for exceeding a deadline.
+        May return no tasks when workers have deadlines, which are checked every `_WATCHDOG_INTERVAL` seconds.
+
+        Returns:
+            list[tuple[any, any]]: A list of (task, result) tuples for every finished task. If a worker was replaced for
+              exceeding a deadline, its result is a `_ChunkTimeout`.
+        """
+
+        busy = self.busy()
+        if len(busy) == 0:
+            return []
+
+        finished: list[tuple[Any, Any]] = []
+        try:
+            worker, result = self._results.get(timeout=_wait_timeout(busy))
+        except queue.Empty:
+            self._abandon_expired(finished)
+            return finished
+        while True:
+            if not worker.abandoned:
+                finished.append((worker.task, result))
+                worker.task = None
+                if len(self.workers) > self.size:
+                    self._retire(worker)
+            try:
+                worker, result = self._results.get_nowait()
+            except queue.Empty:
+                break
+        self._abandon_expired(finished)
+
+        return finished
+
+    def _abandon_expired(self, finished: list[tuple[Any, Any]]) -> None:
+        """
+        Replace the workers running an item past its deadline. The stuck threads are left behind and stop once their current
+        node returns.
+        """
+
+        for worker in self.busy():
+            if worker.watchdog is None or (expired := worker.watchdog.expired()) is None:
+                continue
+            log.warning("Worker threads can not be killed, the thread of the timed out item is left running in the background")
+            finished.append((worker.task, expired))
+            worker.task = None
+            worker.abandoned = True
+            worker.watchdog.cancelled = True # The thread saves nothing else and stops after the current node
+            worker.tasks.put(None)
+            self.workers.remove(worker)
+            if len(self.workers) < self.size:
+                self.workers.append(_ThreadWorker(self._pipeline, self._params, self._results))
+
+    def resize(self, size: int) -> None:
+        """
+        Change the number of workers. New workers start right away, idle workers above the new size are stopped and busy
+        ones once they finish their task.
+        """
+
+        self.size = size
+        while len(self.workers) < size:
+            self.workers.append(_ThreadWorker(self._pipeline, self._params, self._results))
+        for worker in self.idle()[:max(0, len(self.workers) - size)]:
+            self._retire(worker)
+
+    def _retire(self, worker: _ThreadWorker) -> None:
+        """
+        Ask an idle worker to stop and remove it from the pool
+        """
+
+        worker.tasks.put(None)
+        self.workers.remove(worker)
+        self._retired.append(worker)
+
+    def close(self) -> None:
+        """
+        Stop all workers gracefully and wait for them
+        """
+
+        self.terminate()
+        for worker in self.workers + self._retired:
+            worker.thread.join()
+        self.workers = []
+        self._retired = []
+
+    def terminate(self) -> None:
+        """
+        Ask all workers to stop. Threads can not be killed, so workers finish their current task before exiting.
+        """
+
+        for worker in self.workers:
+            worker.tasks.put(None)
+
+class _Prefetcher():
+    """
+    Loads the inputs of the next items of a chunk on a background thread of the worker while it processes the current
+    one. Counts the items whose inputs were loaded in time (hits) and the time the worker waited for the others (stalls).
+    """
+
+    def __init__(self, executor: ThreadPoolExecutor, load: Callable[[Any], Any], master_keys: list, depth: int) -> None:
+        """
+        Start loading the first items of a chunk.
+
+        Args:
+            executor (ThreadPoolExecutor): The I/O thread of the worker
+            load (callable): Function loading the inputs of a master key
+            master_keys (list): The master keys of the chunk, in processing order
+            depth (int): Number of items loaded ahead of the current one
+        """
+
+        self._executor: ThreadPoolExecutor = executor
+        self._load: Callable[[Any], Any] = load
+        self._keys: list = master_keys
+        self._depth: int = depth
+        self._pending: dict[int, Future] = {}
+        self._next: int = 0 # Position of the next item to load
+        self.hits: int = 0
+        self.misses: int = 0
+        self.stall: float = 0.0 # Seconds waited for inputs that were not loaded yet
+        self._read_ahead(0)
+
+    def _read_ahead(self, position: int) -> None:
+        while self._next < len(self._keys) and self._next <= position + self._depth:
+            self._pending[self._next] = self._executor.submit(self._load, self._keys[self._next])
+            self._next += 1
+
+    def get(self, position: int) -> Any:
+        """
+        Get the inputs of the item at a position of the chunk, waiting for them if they are still loading. Raises the error
+        of the load (if any).
+        """
+
+        future = self._pending.pop(position)
+        self._read_ahead(position + 1)
+        if future.done():
+            self.hits += 1
+        else:
+            self.misses += 1
+            start = time.perf_counter()
+            future.exception() # Wait for the load to finish
+            self.stall += time.perf_counter() - start
+
+        return future.result()
+
+    def cancel(self) -> None:
+        """
+        Drop the items that were not processed (e.g. the chunk stopped at an error)
+        """
+
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+
+class _Chunker():
+    """
+    Split the master keys into chunks. The chunks have a fixed size or, with chunksize "auto", are sized from the
+    measured time per item so that each chunk takes about `target` seconds to run.
+    """
+
+    def __init__(self, items: Iterable, total: int, chunksize: int|str, workers: int, target: float = 0.1, max_chunksize: int = 1024,
+                 min_chunksize: int = 1) -> None:
+        """
+        Args:
+            items (iterable): The master keys
+            total (int): Number of master keys
+            chunksize (int|str): Number of items per chunk or "auto"
+            workers (int): Number of workers sharing the items
+            target (float, optional): Desired processing time per chunk in seconds (when auto). Defaults to 0.1.
+            max_chunksize (int, optional): Upper bound for the chunk size (when auto). Defaults to 1024.
+            min_chunksize (int, optional): Lower bound for the chunk size (e.g. the size of the node batches). Defaults to 1.
+        """
+
+        if chunksize != "auto" and (not isinstance(chunksize, int) or chunksize < 1):
+            raise ValueError(f"Invalid chunksize '{chunksize}'. Must be a positive integer or 'auto'.")
+
+        self._items: Iterator = iter(items)
+        self.remaining: int = total
+        self.chunksize: int|str = chunksize
+        self.workers: int = workers
+        self.target: float = target
+        self.max_chunksize: int = max(max_chunksize, min_chunksize)
+        self.min_chunksize: int = min_chunksize
+        self.latency: float|None = None # Moving average of the seconds per item
+
+    def requeue(self, items: list) -> None:
+        """
+        Put master keys back to be handed out first (e.g. the items of a chunk that were not processed)
+        """
+
+        self._items = itertools.chain(items, self._items)
+        self.remaining += len(items)
+
+    def next(self) -> list:
+        """
+        Get the next chunk of master keys. An empty list means there are no items left.
+        """
+
+        chunk = list(itertools.islice(self._items, self._size()))
+        self.remaining -= len(chunk)
+
+        return chunk
+
+    def update(self, items: int, elapsed: float) -> None:
+        """
+        Record the time it took to process a chunk
+
+        Args:
+            items (int): Number of items in the chunk
+            elapsed (float): Seconds spent processing the chunk
+        """
+
+        if items == 0:
+            return
+        latency = elapsed / items
+        self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+
+    def _size(self) -> int:
+        """
+        Get the size of the next chunk
+        """
+
+        if isinstance(self.chunksize, int):
+            return max(self.chunksize, self.min_chunksize)
+        if self.latency is None:
+            return self.min_chunksize # Measure first
+
+        size = int(self.target / max(self.latency, 1e-9))
+        # Keep at least two chunks per worker to balance the load at the end of the run
+        size = min(size, self.remaining // (2 * self.workers))
+
+        return max(self.min_chunksize, min(size, self.max_chunksize))
+
+class _Autoscaler():
+    """
+    Hill-climbing controller of the number of workers. Every `interval` seconds the throughput (items/s) is compared with
+    that of the previous interval: the pool keeps growing (or shrinking) while the throughput improves and turns around
+    when it drops or stays flat after growing. The pool does not grow while the parent rarely waits for the workers (they
+    are starved of tasks) or the CPUs are overloaded.
+    """
+
+    def __init__(self, name: str, min_workers: int, max_workers: int, workers: int, interval: float = 2.0,
+                 tolerance: float = 0.05, max_load: float = 1.0) -> None:
+        """
+        Args:
+            name (str): Name of the pipeline (for logging)
+            min_workers (int): Lower bound for the number of workers
+            max_workers (int): Upper bound for the number of workers
+            workers (int): Initial number of workers
+            interval (float, optional): Seconds between decisions. Defaults to 2.0.
+            tolerance (float, optional): Relative throughput change considered noise. Defaults to 0.05.
+            max_load (float, optional): System load (1 minute average) per CPU above which the pool does not grow. Defaults
+              to 1.0.
+        """
+
+        self.name: str = name
+        self.min_workers: int = min_workers
+        self.max_workers: int = max_workers
+        self.workers: int = workers
+        self.interval: float = interval
+        self.tolerance: float = tolerance
+        self.max_load: float = max_load
+        self.direction: int = 1 # +1 to grow, -1 to shrink
+        self._processed: int = 0
+        self._waited: float = 0.0
+        self._start: float = time.perf_counter()
+        self._throughput: float|None = None # Throughput of the previous interval
+
+    def record(self, processed: int, waited: float) -> None:
+        """
+        Record finished items and the time the parent spent waiting for the workers
+
+        Args:
+            processed (int): Number of items processed
+            waited (float): Seconds the parent was blocked waiting for results
+        """
+
+        self._processed += processed
+        self._waited += waited
+
+    def step(self) -> int:
+        """
+        Decide the number of workers once per interval
+
+        Returns:
+            int: The number of workers to use
+        """
+
+        elapsed = time.perf_counter() - self._start
+        if elapsed < self.interval:
+            return self.workers
+
+        throughput = self._processed / elapsed
+        waiting = self._waited / elapsed
+        load = os.getloadavg()[0] / (os.cpu_count() or 1) if hasattr(os, "getloadavg") else 0.0
+
+        if self._throughput is None:
+            reason = "first measurement"
+        elif throughput < self._throughput * (1 - self.tolerance):
+            self.direction = -self.direction
+            reason = "throughput dropped"
+        elif throughput <= self._throughput * (1 + self.tolerance) and self.direction > 0:
+            self.direction = -1
+            reason = "no gain from more workers"
+        else:
+            reason = "throughput improved" if throughput > self._throughput * (1 + self.tolerance) else "throughput stable"
+
+        target = self.workers + self.direction * max(1, round(self.workers * 0.25))
+        if self.direction > 0 and waiting < 0.5:
+            target, reason = self.workers, "workers are waiting for tasks"
+        elif self.direction > 0 and load > self.max_load:
+            target, reason = self.workers, "system overloaded"
+        target = min(self.max_workers, max(self.min_workers, target))
+        if target == self.workers and (target == self.min_workers or target == self.max_workers):
+            self.direction = 1 if target == self.min_workers else -1 # Turn around at the bounds
+
+        summary = f"{throughput:.1f} items/s, parent waiting {waiting:.0%}, load {load:.2f}"
+        if target != self.workers:
+            log.info(f"Pipeline {self.name}: scaling from {self.workers} to {target} workers ({reason}; {summary})")
+        else:
+            log.debug(f"Pipeline {self.name}: keeping {self.workers} workers ({reason}; {summary})")
+
+        self.workers = target
+        self._throughput = throughput
+        self._processed = 0
+        self._waited = 0.0
+        self._start = time.perf_counter()
+
+        return target
+
+def rss() -> int|None:
+    """
+    Get the resident memory of the current process in bytes, or None if unknown (only supported on Linux)
+    """
+
+    if sys.platform == "win32":
+        return None
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+def reset_peak_rss() -> bool:
+    """
+    Reset the peak resident memory of the current process to its current resident memory (only supported on Linux)
+
+    Returns:
+        bool: Whether the peak was reset. Otherwise `peak_rss` is the peak over the whole life of the process.
+    """
+
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def peak_rss() -> int|None:
+    """
+    Get the peak resident memory of the current process in bytes since it started or since `reset_peak_rss`, or None if
+    unknown (only supported on Linux)
+    """
+
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024 # Kilobytes
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+class _MemoryBudget():
+    """
+    Admission control of the chunks handed out to the workers by their estimated memory. Chunks are held back while the
+    chunks in flight would exceed the budget. Chunks estimated above the share of the budget of one worker are oversized
+    and run one at a time, in their own lane.
+
+    The memory of an item is estimated as the stored size of its inputs times an expansion factor, learned from the peak
+    memory reported by the worker processes. Items without a stored size are estimated from the reported peak per item.
+    """
+
+    def __init__(self, name: str, budget: int, workers: int, item_bytes: Callable[[Any], int|None],
+                 expansion: float = 4.0) -> None:
+        """
+        Args:
+            name (str): Name of the pipeline (for logging)
+            budget (int): Memory budget in bytes
+            workers (int): Number of workers sharing the budget
+            item_bytes (callable): Function returning the stored size of the inputs of a master key (None if unknown)
+            expansion (float, optional): Initial ratio between the memory used to process an item and its stored size.
+              Defaults to 4.0.
+        """
+
+        self.name: str = name
+        self.budget: int = budget
+        self.workers: int = workers
+        self.expansion: float = expansion
+        self.in_flight: int = 0 # Estimated bytes of the chunks in flight
+        self._item_bytes = item_bytes
+        self._per_item: float = 0.0 # Reported peak per item, for items without a stored size
+        self._held: list[tuple[list, list[int|None]]] = [] # Chunks waiting to be admitted and their stored sizes
+        self._running: dict[int, tuple[int, int|None, bool, int]] = {} # id(chunk) -> (estimate, stored, oversized, items)
+        self._oversized: int = 0 # Oversized chunks in flight
+
+    def _estimate(self, stored: list[int|None]) -> int:
+        return int(sum(self.expansion * size if size is not None else self._per_item for size in stored))
+
+    def next(self, chunker: "_Chunker") -> list|None:
+        """
+        Get the next chunk that fits in the budget. Looks ahead at most one chunk per worker.
+
+        Args:
+            chunker (_Chunker): Source of the chunks
+
+        Returns:
+            list|None: The chunk to submit, an empty list if there are no chunks left or None if the chunks must wait
+        """
+
+        while True:
+            for i, (chunk, stored) in enumerate(self._held):
+                if self._admit(chunk, stored):
+                    del self._held[i]
+                    return chunk
+            if len(self._held) >= self.workers:
+                return None
+            chunk = chunker.next()
+            if len(chunk) == 0:
+                return [] if len(self._held) == 0 else None
+            self._held.append((chunk, [self._item_bytes(key) for key in chunk]))
+
+    def _admit(self, chunk: list, stored: list[int|None]) -> bool:
+        """
+        Reserve the memory of a chunk if it fits. A chunk always fits when nothing else is in flight.
+        """
+
+        estimate = self._estimate(stored)
+        oversized = estimate > self.budget / self.workers
+        if self.in_flight > 0 and (self.in_flight + estimate > self.budget or oversized and self._oversized > 0):
+            return False
+
+        if oversized:
+            self._oversized += 1
+            log.info(f"Pipeline {self.name}: running {len(chunk)} item(s) estimated at {estimate / 2**20:.1f} MiB in the oversized lane")
+        self.in_flight += estimate
+        known = [size for size in stored if size is not None]
+        self._running[id(chunk)] = (estimate, sum(known) if len(known) == len(stored) else None, oversized, len(chunk))
+
+        return True
+
+    def done(self, chunk: list, peak: int|None) -> None:
+        """
+        Release the memory of a finished chunk and learn from its reported peak memory
+
+        Args:
+            chunk (list): The finished chunk
+            peak (int|None): Peak memory used by the worker while processing the chunk in bytes (None if unknown)
+        """
+
+        estimate, stored, oversized, items = self._running.pop(id(chunk))
+        self.in_flight -= estimate
+        if oversized:
+            self._oversized -= 1
+        if peak is None or peak <= 0:
+            return
+
+        if stored:
+            self.expansion = max(1.0, 0.7 * self.expansion + 0.3 * peak / stored)
+        self._per_item = 0.7 * self._per_item + 0.3 * peak / items if self._per_item > 0 else peak / items
+        log.debug(f"Pipeline {self.name}: chunk peak {peak / 2**20:.1f} MiB (estimated {estimate / 2**20:.1f} MiB), expansion {self.expansion:.1f}")
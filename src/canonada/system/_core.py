@@ -1,7 +1,79 @@
 import io
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any
 
 from .._logger import logger as log
-from ..pipeline import Pipeline
+from ..catalog import Datahandler
+from ..catalog import get as catalog_get
+from ..catalog import ls as catalog_ls
+from ..pipeline import Node, Pipeline, Reducer
+
+
+class _FusedPipeline(Pipeline):
+    """
+    Consecutive pipelines of a system fused into a single pipeline that streams each master item through all of them.
+    Datasets produced and consumed inside the fused pipeline are passed in memory. Fused pipelines are not registered.
+    """
+
+    def __init__(self, pipelines: list[Pipeline], intermediates: set[str], persist: set[str]) -> None:
+        """
+        Fuse a list of pipelines. Execution settings are taken from the first pipeline.
+
+        Args:
+            pipelines (list[Pipeline]): The pipelines to fuse, in execution order.
+            intermediates (set[str]): Catalog datasets passed in memory between the pipelines.
+            persist (set[str]): Intermediate datasets that are also saved to the catalog.
+        """
+
+        first = pipelines[0]
+        copy_policies = {pipe.copy_inputs for pipe in pipelines}
+        item_timeouts = [pipe.item_timeout for pipe in pipelines if pipe.item_timeout is not None]
+        super().__init__(
+            name = "+".join(pipe.name for pipe in pipelines),
+            nodes = [node for pipe in pipelines for node in pipe.nodes],
+            description = f"Fusion of pipelines: {', '.join(pipe.name for pipe in pipelines)}",
+            max_workers = first.max_workers,
+            min_workers = first.min_workers,
+            memory_budget = first.memory_budget,
+            item_timeout = sum(item_timeouts) if len(item_timeouts) == len(pipelines) else None, # Time for every pipeline
+            multiprocessing = first.multiprocessing,
+            error_tolerant = all(pipe.error_tolerant for pipe in pipelines),
+            max_tasks_per_worker = first.max_tasks_per_worker,
+            chunksize = first.chunksize,
+            parallel_nodes = first.parallel_nodes,
+            copy_inputs = copy_policies.pop() if len(copy_policies) == 1 else "deep",
+            check_mutations = any(pipe.check_mutations for pipe in pipelines),
+            shm_threshold = first.shm_threshold,
+            mode = first.mode,
+            max_concurrency = first.max_concurrency,
+            cache = first.cache,
+            checkpoint = all(pipe.checkpoint for pipe in pipelines),
+            prune = all(pipe.prune for pipe in pipelines),
+            optimize = all(pipe.optimize for pipe in pipelines),
+            join = first.join,
+            missing = first.missing,
+            key_map = first.key_map,
+            prefetch = first.prefetch,
+        )
+        self._intermediates = intermediates
+        self._persist = persist
+        self._intermediate_datahandlers: dict[str, Datahandler] = {}
+
+    def _register(self) -> None:
+        pass
+
+    def _calc_exec_order(self, known_inputs: set[str] = set(), init_datahandlers: bool = True) -> None:
+        super()._calc_exec_order(known_inputs, init_datahandlers)
+        if init_datahandlers:
+            self._intermediate_datahandlers = {name: self._output_datahandlers.get(name) or catalog_get(name) for name in self._intermediates}
+
+    def _store_outputs(self, node: Node, output_data: tuple, known_inputs: dict[str, Any], save: bool = True) -> None:
+        super()._store_outputs(node, output_data, known_inputs, save)
+        # Intermediate datasets are passed on as if they had been saved and loaded again
+        for output_name in node.output:
+            if output_name in self._intermediate_datahandlers:
+                known_inputs[output_name] = self._intermediate_datahandlers[output_name].as_loaded(known_inputs[output_name])
 
 
 class System():
@@ -19,7 +91,8 @@ class System():
 
         return cls.registry
 
-    def __init__(self, name:str, pipelines:list[Pipeline], description:str="") -> None:
+    def __init__(self, name:str, pipelines:list[Pipeline], description:str="", fuse:bool=False, persist:list[str]|None=None,
+                 parallel:bool=False, max_workers:int|None=None) -> None:
         """
         Instantiate a new pipeline system.
 
@@ -27,11 +100,25 @@ class System():
             name (str): The name of the system.
             pipelines (list[Pipeline]): A list of pipelines to be run sequentially (order matters).
             description (str, optional): A description of the system. Defaults to "".
+            fuse (bool, optional): Fuse consecutive pipelines connected through catalog datasets into a single pipeline that
+              streams each master item through all of them. Datasets only used between the fused pipelines are kept in
+              memory instead of being saved and read back. Defaults to False.
+            persist (list[str], optional): Intermediate datasets to save to the catalog even when the pipelines producing
+              them are fused. Defaults to None.
+            parallel (bool, optional): Run pipelines that do not depend on each other at the same time. Dependencies are
+              found from the catalog datasets each pipeline reads and writes, so pipelines must not exchange data outside
+              the catalog. Progress bars are not shown. Defaults to False (run the pipelines sequentially).
+            max_workers (int, optional): Number of workers shared by the pipelines running at the same time. Defaults to
+              None (uses all available cores).
         """
 
         self.name:str = name
         self.description:str = description
         self.pipeline:list[Pipeline] = pipelines
+        self.fuse:bool = fuse
+        self.persist:list[str] = persist if persist is not None else []
+        self.parallel:bool = parallel
+        self.max_workers:int|None = max_workers
 
         # Check that the system name is unique and not empty
         if self.name == "":
@@ -74,15 +161,200 @@ class System():
 
         self.run()
     
-    def run(self):
+    def run(self, resume: bool = False):
         """
         Run the system pipelines sequentially
+
+        Args:
+            resume (bool, optional): Resume the pipelines from their checkpoint journals, see `Pipeline.run`. Defaults to
+              False.
         """
 
         log.info(f"Running pipeline system: '{self.name}'")
+        stages = self._stages()
+        if self.parallel:
+            self._run_parallel(stages, resume)
+            return
+
+        for pipeline in stages:
+            pipeline.run(resume=resume)
+
+    def _run_parallel(self, stages: list[Pipeline], resume: bool = False) -> None:
+        """
+        Run the pipelines as a dependency graph. A pipeline starts as soon as the pipelines it depends on finished and
+        there are enough workers left in the budget. After an error no new pipelines are started.
+
+        Args:
+            stages (list[Pipeline]): The pipelines to run, in system order
+            resume (bool, optional): Resume the pipelines from their checkpoint journals. Defaults to False.
+        """
+
+        budget = self.max_workers if self.max_workers is not None else multiprocessing.cpu_count()
+        if budget < 1:
+            raise ValueError("Number of workers must be greater than 0. Set to None to use all available cores.")
+
+        dependencies = self._dependencies(stages)
+        pending = list(range(len(stages)))
+        running: dict[Future, tuple[int, int]] = {} # Future -> (stage index, granted workers)
+        done: set[int] = set()
+        free = budget
+        error: BaseException|None = None
+
+        with ThreadPoolExecutor(max_workers=len(stages), thread_name_prefix=f"{self.name}-pipelines") as executor:
+            while len(pending) > 0 or len(running) > 0:
+                # Start the pipelines whose dependencies finished, while the budget allows it
+                for i in list(pending):
+                    if error is not None or not dependencies[i].issubset(done):
+                        continue
+                    stage = stages[i]
+                    wanted = stage.max_workers if isinstance(stage.max_workers, int) else budget
+                    if len(_catalog_inputs([stage]) - stage._intermediates) == 0:
+                        wanted = 1 # Runs a single pass
+                    if len(running) > 0 and wanted > free:
+                        continue # Wait for workers to be released
+                    granted = max(1, min(wanted, free))
+
+                    waits_for = ", ".join(stages[j].name for j in sorted(dependencies[i]))
+                    log.info(f"Starting pipeline {stage.name} with {granted} worker(s)" + (f" (after: {waits_for})" if waits_for else ""))
+                    running[executor.submit(_run_stage, stage, granted, resume)] = (i, granted)
+                    pending.remove(i)
+                    free -= granted
+
+                if len(running) == 0:
+                    break # Nothing left that can run (after an error)
+
+                finished, _ = wait(list(running.keys()), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    i, granted = running.pop(future)
+                    free += granted
+                    done.add(i)
+                    if future.exception() is not None and error is None:
+                        error = future.exception()
+                        log.error(f"Pipeline {stages[i].name} failed, no more pipelines will be started")
+
+        if error is not None:
+            raise error
+
+    def _stages(self) -> list[Pipeline]:
+        """
+        Get the pipelines to run. If the system is fused, consecutive connected pipelines are replaced by their fusion.
+        """
+
+        if not self.fuse:
+            return self.pipeline
+
+        # Group consecutive pipelines that can be streamed together
+        groups: list[list[Pipeline]] = []
         for pipeline in self.pipeline:
-            pipeline()
+            if len(groups) > 0 and self._fusable(groups[-1], pipeline):
+                groups[-1].append(pipeline)
+            else:
+                groups.append([pipeline])
 
+        stages: list[Pipeline] = []
+        for i, group in enumerate(groups):
+            if len(group) == 1:
+                stages.append(group[0])
+                continue
 
-    
-    
\ No newline at end of file
+            produced = _catalog_outputs(group)
+            intermediates = set()
+            for j, pipeline in enumerate(group[1:], start=1):
+                intermediates.update(_catalog_inputs([pipeline]).intersection(_catalog_outputs(group[:j])))
+            # Intermediates read by pipelines outside the group are still saved
+            later_inputs = _catalog_inputs([pipe for later in groups[i + 1:] for pipe in later])
+            persist = intermediates.intersection(set(self.persist).union(later_inputs))
+
+            log.info(f"Fusing pipelines {', '.join(pipe.name for pipe in group)} (in memory: {', '.join(sorted(intermediates - persist)) or 'none'})")
+            log.debug(f"Datasets saved by the fused pipelines: {', '.join(sorted(produced - intermediates | persist)) or 'none'}")
+            stages.append(_FusedPipeline(group, intermediates, persist))
+
+        return stages
+
+    @staticmethod
+    def _dependencies(stages: list[Pipeline]) -> list[set[int]]:
+        """
+        Find the pipelines each pipeline depends on. A pipeline depends on an earlier one if it reads a dataset the earlier
+        one writes, or writes a dataset the earlier one reads or writes.
+
+        Args:
+            stages (list[Pipeline]): The pipelines, in system order
+
+        Returns:
+            list[set[int]]: The indexes of the pipelines each pipeline depends on
+        """
+
+        reads = [_catalog_inputs([stage]) - stage._intermediates for stage in stages]
+        writes = [_catalog_outputs([stage]) - (stage._intermediates - stage._persist) for stage in stages]
+
+        dependencies: list[set[int]] = []
+        for j in range(len(stages)):
+            dependencies.append({
+                i for i in range(j)
+                if writes[i] & reads[j] or reads[i] & writes[j] or writes[i] & writes[j]
+            })
+
+        return dependencies
+
+    @staticmethod
+    def _fusable(group: list[Pipeline], pipeline: Pipeline) -> bool:
+        """
+        Check whether a pipeline can be streamed together with the previous group of pipelines. The pipeline must read a
+        dataset produced by the group, the group must iterate over a catalog dataset, no node outputs may collide, the
+        pipelines must run in the same mode, join their inputs the same way and cache their nodes the same way. Pipelines
+        with reducer nodes are not fused.
+        """
+
+        produced = _catalog_outputs(group)
+        if len(_catalog_inputs([pipeline]).intersection(produced)) == 0:
+            return False
+        if len(_catalog_inputs(group) - produced) == 0:
+            return False # The group runs once, there are no master items to stream
+        if any(isinstance(node, Reducer) for pipe in group + [pipeline] for node in pipe.nodes):
+            log.debug(f"Pipeline {pipeline.name} is not fused, reducer nodes aggregate the items of a single pipeline")
+            return False
+        if len({pipe.mode or ("process" if pipe.multiprocessing else "thread") for pipe in group + [pipeline]}) > 1:
+            log.debug(f"Pipeline {pipeline.name} is not fused, it runs in a different mode")
+            return False
+        if (pipeline.join, pipeline.missing, pipeline.key_map) != (group[0].join, group[0].missing, group[0].key_map):
+            log.debug(f"Pipeline {pipeline.name} is not fused, it joins its inputs differently")
+            return False
+        if pipeline.cache != group[0].cache:
+            log.debug(f"Pipeline {pipeline.name} is not fused, it caches its nodes differently")
+            return False
+
+        group_outputs = {output for pipe in group for node in pipe.nodes for output in node.output}
+        pipeline_outputs = {output for node in pipeline.nodes for output in node.output}
+        if len(group_outputs.intersection(pipeline_outputs)) > 0:
+            log.debug(f"Pipeline {pipeline.name} is not fused, its outputs collide with the previous pipelines")
+            return False
+
+        return True
+
+def _catalog_inputs(pipelines: list[Pipeline]) -> set[str]:
+    """
+    Get the catalog datasets read by a list of pipelines
+    """
+
+    catalog = set(catalog_ls())
+    return {input for pipe in pipelines for node in pipe.nodes for input in node.input if input in catalog}
+
+def _catalog_outputs(pipelines: list[Pipeline]) -> set[str]:
+    """
+    Get the catalog datasets written by a list of pipelines
+    """
+
+    catalog = set(catalog_ls())
+    return {output for pipe in pipelines for node in pipe.nodes for output in node.output if output in catalog}
+
+def _run_stage(pipeline: Pipeline, workers: int, resume: bool = False) -> None:
+    """
+    Run a pipeline of a parallel system with the given number of workers and without progress bar
+    """
+
+    max_workers, show_progress = pipeline.max_workers, pipeline._show_progress
+    pipeline.max_workers, pipeline._show_progress = workers, False
+    try:
+        pipeline.run(resume=resume)
+    finally:
+        pipeline.max_workers, pipeline._show_progress = max_workers, show_progress
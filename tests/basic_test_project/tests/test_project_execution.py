@@ -1,5 +1,12 @@
+import asyncio
+import json
+import multiprocessing
 import os
+import signal
+import socket
 import sys
+import threading
+import time
 import unittest
 
 # Change to the test project directory
@@ -10,6 +17,84 @@ import pipelines.offsets_pipeline
 import systems.gen_offset_sys
 
 import canonada.exceptions
+import canonada.pipeline._sharding
+from canonada.catalog import params as catalog_params
+from canonada.pipeline import Node, Pipeline, Reducer, run_worker
+from canonada.system import System
+
+
+# Node functions sent to process pools must be importable
+def where_it_runs(x):
+    return os.getpid(), threading.get_ident()
+
+def scale_signal(signal):
+    return {"filename": signal["id"], "data": {"signal": [2 * x for x in signal["signal"]]}}
+
+# Calls of the cached node (not captured by the node, so they are not part of its fingerprint)
+cached_calls: list[str] = []
+
+def cached_sum(signal):
+    cached_calls.append(signal["id"])
+    return sum(signal["signal"])
+
+def hangs(signal):
+    # Never finishes for about one in eight signals
+    return int(signal["id"][-1], 16) % 8 == 0
+
+def hang_some(signal):
+    if hangs(signal):
+        time.sleep(3600)
+    return {"filename": signal["id"], "data": signal}
+
+def double(signal):
+    return {"filename": signal["id"], "data": {"id": signal["id"], "signal": [2 * x for x in signal["signal"]]}}
+
+def add_one(doubled, signal):
+    if doubled["id"] != signal["id"]:
+        raise ValueError("Intermediate data does not belong to the master item")
+    return {"filename": doubled["id"], "data": {"signal": [x + 1 for x in doubled["signal"]]}}
+
+async def double_async(signal):
+    await asyncio.sleep(0)
+    return double(signal)
+
+def copy_signal(signal):
+    return {"filename": signal["id"], "data": signal}
+
+def wait():
+    time.sleep(0.5)
+
+def fail():
+    raise RuntimeError("Failing pipeline")
+
+# Calls made in the workers are recorded in files, one line per call
+BATCH_SIZES = "data/batch_sizes.txt"
+SETUPS = "data/node_setups.txt"
+TEARDOWNS = "data/node_teardowns.txt"
+
+def record(path, line):
+    with open(path, "a") as f:
+        f.write(f"{line}\n")
+
+def read_lines(path):
+    if not os.path.isfile(path):
+        return []
+    with open(path) as f:
+        return f.read().splitlines()
+
+def signal_means(signals, scale):
+    record(BATCH_SIZES, len(signals))
+    return [{"filename": signal["id"], "data": {"mean": scale * sum(signal["signal"]) / len(signal["signal"])}} for signal in signals]
+
+def load_model():
+    record(SETUPS, "setup")
+    return {"scale": 2}
+
+def unload_model(model):
+    record(TEARDOWNS, f"scale={model['scale']}")
+
+def scale_with_model(model, signal):
+    return {"filename": signal["id"], "data": {"signal": [model["scale"] * x for x in signal["signal"]]}}
 
 
 class TestPipelines(unittest.TestCase):
@@ -61,6 +146,942 @@ class TestPipelines(unittest.TestCase):
         os.system("rm -rf data/split_signals1")
         os.system("rm -rf data/split_signals2")
     
+    def test_pipeline_worker_recycling(self):
+        """
+        Test running a pipeline on a worker pool that recycles its workers after a few items. (Using multiprocessing)
+        """
+        # Run the data generation pipeline and offsets pipeline
+        data_gen_pipeline = pipelines.data_generation.data_gen
+        offset_pipeline = pipelines.offsets_pipeline.offset_pipe
+        offset_pipeline.multiprocessing = True
+        offset_pipeline.max_workers = 4
+        offset_pipeline.max_tasks_per_worker = 7
+
+        data_gen_pipeline.run()
+        offset_pipeline.run()
+        offset_pipeline.max_tasks_per_worker = None
+
+        # Assert that every item was processed
+        raw_signals = os.listdir("data/raw_signals")
+        offset_signals = os.listdir("data/offset_signals")
+        self.assertEqual(len(raw_signals), len(offset_signals), "Raw signals and offsets have different a number of files")
+        substracted_signals = os.listdir("data/substracted_signals")
+        self.assertEqual(len(raw_signals), len(substracted_signals), "Raw signals and substracted signals have a different number of files")
+
+        # Clean up
+        os.system("rm -rf data/raw_signals")
+        os.system("rm -rf data/offset_signals")
+        os.system("rm -rf data/substracted_signals")
+        os.system("rm -rf data/split_signals1")
+        os.system("rm -rf data/split_signals2")
+
+    def test_pipeline_chunksize(self):
+        """
+        Test running a pipeline handing out chunks of master items to the workers. (Using multiprocessing and multithreading)
+        """
+        data_gen_pipeline = pipelines.data_generation.data_gen
+        offset_pipeline = pipelines.offsets_pipeline.offset_pipe
+        offset_pipeline.max_workers = 4
+
+        for multiprocessing, chunksize in [(True, 16), (True, "auto"), (False, 16), (False, "auto")]:
+            offset_pipeline.multiprocessing = multiprocessing
+            offset_pipeline.chunksize = chunksize
+
+            data_gen_pipeline.run()
+            offset_pipeline.run()
+
+            # Assert that every item was processed exactly once
+            raw_signals = os.listdir("data/raw_signals")
+            offset_signals = os.listdir("data/offset_signals")
+            self.assertEqual(len(raw_signals), len(offset_signals), f"Raw signals and offsets have different a number of files (chunksize={chunksize})")
+            substracted_signals = os.listdir("data/substracted_signals")
+            self.assertEqual(len(raw_signals), len(substracted_signals), f"Raw signals and substracted signals have a different number of files (chunksize={chunksize})")
+        offset_pipeline.chunksize = 1
+
+        # An invalid chunksize is rejected
+        offset_pipeline.chunksize = 0
+        with self.assertRaises(ValueError):
+            offset_pipeline.run()
+        offset_pipeline.chunksize = 1
+
+        # Clean up
+        os.system("rm -rf data/raw_signals")
+        os.system("rm -rf data/offset_signals")
+        os.system("rm -rf data/substracted_signals")
+        os.system("rm -rf data/split_signals1")
+        os.system("rm -rf data/split_signals2")
+
+    def test_pipeline_parallel_nodes(self):
+        """
+        Test running the independent nodes of each item concurrently. (Single threaded, multithreading and multiprocessing)
+        """
+        data_gen_pipeline = pipelines.data_generation.data_gen
+        offset_pipeline = pipelines.offsets_pipeline.offset_pipe
+        offset_pipeline.parallel_nodes = True
+
+        for max_workers, multiprocessing in [(1, False), (4, False), (4, True)]:
+            offset_pipeline.max_workers = max_workers
+            offset_pipeline.multiprocessing = multiprocessing
+
+            data_gen_pipeline.run()
+            offset_pipeline.run()
+
+            # Assert that every output was produced for every item
+            raw_signals = os.listdir("data/raw_signals")
+            for dataset in ["offset_signals", "substracted_signals", "split_signals1", "split_signals2"]:
+                self.assertEqual(len(raw_signals), len(os.listdir(f"data/{dataset}")), f"Raw signals and {dataset} have a different number of files")
+        offset_pipeline.parallel_nodes = False
+
+        # Clean up
+        os.system("rm -rf data/raw_signals")
+        os.system("rm -rf data/offset_signals")
+        os.system("rm -rf data/substracted_signals")
+        os.system("rm -rf data/split_signals1")
+        os.system("rm -rf data/split_signals2")
+
+    def test_pipeline_parallel_nodes_levels(self):
+        """
+        Test that independent nodes are grouped in the same level and run concurrently
+        """
+        def wait_and_add(x, y):
+            time.sleep(0.3)
+            return x + y
+
+        parallel_pipe = Pipeline("parallel_levels_test", [
+            Node(func=lambda x: x * 2, input=["x"], output=["x2"], name="parallel_levels_double"),
+            Node(func=lambda x: wait_and_add(x, 1), input=["x2"], output=["a"], name="parallel_levels_a"),
+            Node(func=lambda x: wait_and_add(x, 2), input=["x2"], output=["b"], name="parallel_levels_b"),
+            Node(func=lambda x: wait_and_add(x, 3), input=["x2"], output=["c"], name="parallel_levels_c"),
+            Node(func=lambda a, b, c: a + b + c, input=["a", "b", "c"], output=["total"], name="parallel_levels_total"),
+        ], parallel_nodes=True)
+
+        parallel_pipe._calc_exec_order(known_inputs={"x"}, init_datahandlers=False)
+        self.assertEqual([[node.name for node in level] for level in parallel_pipe._exec_levels], [
+            ["parallel_levels_double"],
+            ["parallel_levels_a", "parallel_levels_b", "parallel_levels_c"],
+            ["parallel_levels_total"],
+        ])
+
+        start = time.perf_counter()
+        outputs = parallel_pipe.run_once({"x": 1})
+        elapsed = time.perf_counter() - start
+        self.assertEqual(outputs["total"], 12)
+        self.assertLess(elapsed, 0.8, "Independent nodes did not run concurrently")
+
+    def test_pipeline_copy_inputs(self):
+        """
+        Test the policies to pass inputs to the nodes and the mutation check
+        """
+        def append_one(values):
+            values.append(1)
+            return len(values)
+
+        deep_pipe = Pipeline("copy_inputs_deep_test", [
+            Node(func=append_one, input=["values"], output=["n"], name="copy_inputs_deep_append"),
+        ])
+        values = [0]
+        self.assertEqual(deep_pipe.run_once({"values": values})["n"], 2)
+        self.assertEqual(values, [0])
+
+        none_pipe = Pipeline("copy_inputs_none_test", [
+            Node(func=lambda x: x, input=["values"], output=["same"], name="copy_inputs_none_identity"),
+        ], copy_inputs="none")
+        self.assertIs(none_pipe.run_once({"values": values})["same"], values)
+
+        readonly_pipe = Pipeline("copy_inputs_readonly_test", [
+            Node(func=lambda d: {**d, "b": 2}, input=["data"], output=["merged"], name="copy_inputs_readonly_merge"),
+            Node(func=append_one, input=["values"], output=["n"], name="copy_inputs_readonly_append"),
+        ], copy_inputs="readonly")
+        with self.assertRaises(TypeError):
+            readonly_pipe.run_once({"data": {"a": [1]}, "values": [0]})
+        # A node can override the pipeline policy
+        readonly_pipe.nodes[1].copy_inputs = "deep"
+        outputs = readonly_pipe.run_once({"data": {"a": [1]}, "values": [0]})
+        self.assertEqual(outputs["merged"], {"a": [1], "b": 2})
+        self.assertEqual(outputs["n"], 2)
+
+        check_pipe = Pipeline("copy_inputs_check_test", [
+            Node(func=append_one, input=["values"], output=["n"], name="copy_inputs_check_append"),
+        ], copy_inputs="none", check_mutations=True)
+        with self.assertRaisesRegex(RuntimeError, "copy_inputs_check_append"):
+            check_pipe.run_once({"values": [0]})
+
+        with self.assertRaises(ValueError):
+            Pipeline("copy_inputs_invalid_test", [], copy_inputs="shallow")
+
+    def test_pipeline_batch_nodes(self):
+        """
+        Test running a pipeline with a node that processes batches of master items. (Using multiprocessing and multithreading)
+        """
+        batch_pipe = Pipeline("batch_nodes_test", [
+            Node(func=signal_means, input=["raw_signals", "params:offset_signal.random_seed"], output=["offset_signals"], name="batch_nodes_means", batch_size=8),
+        ], error_tolerant=False)
+
+        data_gen_pipeline = pipelines.data_generation.data_gen
+        for multiprocessing, max_workers in [(True, 2), (False, 2), (False, 1)]:
+            batch_pipe.multiprocessing = multiprocessing
+            batch_pipe.max_workers = max_workers
+
+            data_gen_pipeline.run()
+            os.system(f"rm -f {BATCH_SIZES}")
+            batch_pipe.run()
+
+            # Every item gets its own output
+            raw_signals = os.listdir("data/raw_signals")
+            offset_signals = os.listdir("data/offset_signals")
+            self.assertEqual(len(raw_signals), len(offset_signals), "Raw signals and batch outputs have a different number of files")
+            batch_sizes = [int(line) for line in read_lines(BATCH_SIZES)]
+            self.assertEqual(sum(batch_sizes), len(raw_signals), "Every item must be in one batch")
+            self.assertGreater(max(batch_sizes), 1, "Items were not batched")
+            self.assertLessEqual(max(batch_sizes), 8, "Batches are larger than the batch size")
+
+        # A single item runs as a batch of one
+        outputs = batch_pipe.run_once({"raw_signals": {"id": "a", "signal": [1, 3]}})
+        self.assertEqual(outputs["offset_signals"]["data"]["mean"], 2 * catalog_params()["offset_signal.random_seed"])
+
+        # Batch nodes must return one value per item
+        bad_batch_pipe = Pipeline("batch_nodes_bad_test", [
+            Node(func=lambda signals: signals[0], input=["signals"], output=["first"], name="batch_nodes_bad", batch_size=4),
+        ])
+        with self.assertRaises(RuntimeError):
+            bad_batch_pipe.run_once({"signals": [1, 2, 3]})
+
+        with self.assertRaises(ValueError):
+            Node(func=lambda x: x, input=["x"], output=["y"], name="batch_nodes_invalid", batch_size=0)
+
+        # Clean up
+        os.system(f"rm -f {BATCH_SIZES}")
+        os.system("rm -rf data/raw_signals")
+        os.system("rm -rf data/offset_signals")
+        os.system("rm -rf data/substracted_signals")
+        os.system("rm -rf data/split_signals1")
+        os.system("rm -rf data/split_signals2")
+
+    def test_pipeline_node_setup(self):
+        """
+        Test that node setups run once per worker and their value is passed to the node. (Using multiprocessing and multithreading)
+        """
+        setup_pipe = Pipeline("node_setup_test", [
+            Node(func=scale_with_model, input=["raw_signals"], output=["offset_signals"], name="node_setup_scale", setup=load_model, teardown=unload_model),
+        ], max_workers=2, error_tolerant=False)
+
+        data_gen_pipeline = pipelines.data_generation.data_gen
+        for use_multiprocessing in [True, False]:
+            setup_pipe.multiprocessing = use_multiprocessing
+
+            data_gen_pipeline.run()
+            os.system(f"rm -f {SETUPS} {TEARDOWNS}")
+            setup_pipe.run()
+
+            setups, teardowns = len(read_lines(SETUPS)), len(read_lines(TEARDOWNS))
+            self.assertEqual(len(os.listdir("data/raw_signals")), len(os.listdir("data/offset_signals")), "Not every item was processed")
+            self.assertTrue(1 <= setups <= 2, f"Expected one setup per worker, got {setups}")
+            self.assertEqual(setups, teardowns, "Every setup must be torn down")
+            self.assertEqual(read_lines(TEARDOWNS), ["scale=2"] * teardowns, "The setup value was not torn down")
+
+        # The setup value is kept between calls on the same worker
+        os.system(f"rm -f {SETUPS} {TEARDOWNS}")
+        for _ in range(3):
+            outputs = setup_pipe.run_once({"raw_signals": {"id": "a", "signal": [1, 2]}})
+            self.assertEqual(outputs["offset_signals"]["data"]["signal"], [2, 4])
+        self.assertEqual(len(read_lines(SETUPS)), 1)
+        setup_pipe._worker_stop()
+
+        # Clean up
+        os.system(f"rm -f {SETUPS} {TEARDOWNS}")
+        os.system("rm -rf data/raw_signals")
+        os.system("rm -rf data/offset_signals")
+        os.system("rm -rf data/substracted_signals")
+        os.system("rm -rf data/split_signals1")
+        os.system("rm -rf data/split_signals2")
+
+    def test_system_fuse(self):
+        """
+        Test fusing connected pipelines of a system so intermediate datasets are kept in memory
+        """
+        double_pipe = Pipeline("fuse_double_test", [
+            Node(func=double, input=["raw_signals"], output=["offset_signals"], name="fuse_double"),
+        ], max_workers=2, error_tolerant=False)
+        add_one_pipe = Pipeline("fuse_add_one_test", [
+            Node(func=add_one, input=["offset_signals", "raw_signals"], output=["substracted_signals"], name="fuse_add_one"),
+        ], error_tolerant=False)
+        data_gen_pipeline = pipelines.data_generation.data_gen
+
+        fused_sys = System("fuse_test_sys", [data_gen_pipeline, double_pipe, add_one_pipe], fuse=True)
+        self.assertEqual([stage.name for stage in fused_sys._stages()], ["data_generation", "fuse_double_test+fuse_add_one_test"])
+        fused_sys.run()
+
+        # The intermediate dataset is not saved
+        raw_signals = os.listdir("data/raw_signals")
+        self.assertEqual(len(os.listdir("data/offset_signals")), 0, "The intermediate dataset was saved")
+        self.assertEqual(len(os.listdir("data/substracted_signals")), len(raw_signals))
+        for filename in raw_signals:
+            with open(os.path.join("data/raw_signals", filename)) as f:
+                raw = json.load(f)
+            with open(os.path.join("data/substracted_signals", f"{raw['id']}.json")) as f:
+                self.assertEqual(json.load(f)["signal"], [2 * x + 1 for x in raw["signal"]])
+
+        # Persisted intermediate datasets are saved too
+        persist_sys = System("fuse_persist_test_sys", [data_gen_pipeline, double_pipe, add_one_pipe], fuse=True, persist=["offset_signals"])
+        persist_sys.run()
+        self.assertEqual(len(os.listdir("data/offset_signals")), len(raw_signals))
+        self.assertEqual(len(os.listdir("data/substracted_signals")), len(raw_signals))
+
+        # Pipelines caching their nodes differently are not fused
+        cached_pipe = Pipeline("fuse_add_one_cached_test", add_one_pipe.nodes, cache=True)
+        cached_sys = System("fuse_cached_test_sys", [data_gen_pipeline, double_pipe, cached_pipe], fuse=True)
+        self.assertEqual([stage.name for stage in cached_sys._stages()], ["data_generation", "fuse_double_test", "fuse_add_one_cached_test"])
+
+        # Asyncio pipelines are fused into an asyncio pipeline, but not with pipelines running in other modes
+        double_async_pipe = Pipeline("fuse_double_async_test", [
+            Node(func=double_async, input=["raw_signals"], output=["offset_signals"], name="fuse_double_async"),
+        ], mode="asyncio", max_concurrency=8, error_tolerant=False)
+        add_one_async_pipe = Pipeline("fuse_add_one_async_test", add_one_pipe.nodes, mode="asyncio", error_tolerant=False)
+        mixed_sys = System("fuse_mixed_test_sys", [data_gen_pipeline, double_async_pipe, add_one_pipe], fuse=True)
+        self.assertEqual(len(mixed_sys._stages()), 3)
+        async_sys = System("fuse_async_test_sys", [data_gen_pipeline, double_async_pipe, add_one_async_pipe], fuse=True)
+        fused = async_sys._stages()[1]
+        self.assertEqual((fused.name, fused.mode, fused.max_concurrency), ("fuse_double_async_test+fuse_add_one_async_test", "asyncio", 8))
+        os.system("rm -rf data/substracted_signals")
+        async_sys.run()
+        raw_signals = os.listdir("data/raw_signals")
+        self.assertEqual(len(os.listdir("data/substracted_signals")), len(raw_signals))
+        for filename in raw_signals:
+            with open(os.path.join("data/raw_signals", filename)) as f:
+                raw = json.load(f)
+            with open(os.path.join("data/substracted_signals", f"{raw['id']}.json")) as f:
+                self.assertEqual(json.load(f)["signal"], [2 * x + 1 for x in raw["signal"]])
+
+        # Clean up
+        os.system("rm -rf data/raw_signals")
+        os.system("rm -rf data/offset_signals")
+        os.system("rm -rf data/substracted_signals")
+        os.system("rm -rf data/split_signals1")
+        os.system("rm -rf data/split_signals2")
+
+    def test_system_parallel(self):
+        """
+        Test running independent pipelines of a system at the same time
+        """
+        # Independent pipelines run concurrently
+        wait_pipes = [Pipeline(f"parallel_sys_wait_{i}", [
+            Node(func=wait, input=[], output=[f"parallel_sys_waited_{i}"], name=f"parallel_sys_wait_{i}"),
+        ], error_tolerant=False) for i in range(3)]
+        start = time.perf_counter()
+        System("parallel_wait_sys", wait_pipes, parallel=True, max_workers=4).run()
+        self.assertLess(time.perf_counter() - start, 1.2, "Independent pipelines did not run concurrently")
+
+        # Dependencies are found from the catalog datasets
+        copy_pipe = Pipeline("parallel_sys_copy", [
+            Node(func=copy_signal, input=["raw_signals"], output=["offset_signals"], name="parallel_sys_copy"),
+        ], max_workers=2, error_tolerant=False)
+        copy_again_pipe = Pipeline("parallel_sys_copy_again", [
+            Node(func=copy_signal, input=["offset_signals"], output=["substracted_signals"], name="parallel_sys_copy_again"),
+        ], max_workers=2, error_tolerant=False)
+        split_pipe = Pipeline("parallel_sys_split", [
+            Node(func=copy_signal, input=["raw_signals"], output=["split_signals1"], name="parallel_sys_split"),
+        ], max_workers=2, error_tolerant=False)
+        parallel_sys = System("parallel_dag_sys", [copy_pipe, copy_again_pipe, split_pipe], parallel=True, max_workers=4)
+        self.assertEqual(parallel_sys._dependencies(parallel_sys._stages()), [set(), {0}, set()])
+
+        pipelines.data_generation.data_gen.run()
+        parallel_sys.run()
+        raw_signals = os.listdir("data/raw_signals")
+        for dataset in ["offset_signals", "substracted_signals", "split_signals1"]:
+            self.assertEqual(len(os.listdir(f"data/{dataset}")), len(raw_signals), f"Dataset {dataset} is incomplete")
+        self.assertEqual(copy_pipe.max_workers, 2, "Pipeline settings were not restored")
+
+        # Errors stop the system
+        fail_pipe = Pipeline("parallel_sys_fail", [
+            Node(func=fail, input=[], output=["parallel_sys_failed"], name="parallel_sys_fail"),
+        ], error_tolerant=False)
+        with self.assertRaises(RuntimeError):
+            System("parallel_fail_sys", [fail_pipe] + wait_pipes[:1], parallel=True).run()
+
+        # Clean up
+        os.system("rm -rf data/raw_signals")
+        os.system("rm -rf data/offset_signals")
+        os.system("rm -rf data/substracted_signals")
+        os.system("rm -rf data/split_signals1")
+        os.system("rm -rf data/split_signals2")
+
+    def test_node_executors(self):
+        """
+        Test placing nodes on inline, thread and process executors
+        """
+        placement_pipe = Pipeline("node_executors_test", [
+            Node(func=where_it_runs, input=["x"], output=["inline"], name="node_executors_inline", executor="inline"),
+            Node(func=where_it_runs, input=["x"], output=["thread"], name="node_executors_thread", executor="thread"),
+            Node(func=where_it_runs, input=["x"], output=["process"], name="node_executors_process", executor="process"),
+        ], max_workers=2)
+
+        for parallel_nodes in [False, True]:
+            placement_pipe.parallel_nodes = parallel_nodes
+            outputs = placement_pipe.run_once({"x": 1})
+            self.assertEqual(outputs["inline"], (os.getpid(), threading.get_ident()))
+            self.assertEqual(outputs["thread"][0], os.getpid())
+            self.assertNotEqual(outputs["thread"][1], threading.get_ident())
+            self.assertNotEqual(outputs["process"][0], os.getpid())
+        placement_pipe._worker_stop()
+        placement_pipe._shutdown_process_executor()
+
+        # Process nodes run in a pool shared by the worker threads
+        scale_pipe = Pipeline("node_executors_run_test", [
+            Node(func=scale_signal, input=["raw_signals"], output=["offset_signals"], name="node_executors_scale", executor="process"),
+        ], max_workers=2, multiprocessing=False, error_tolerant=False)
+        pipelines.data_generation.data_gen.run()
+        scale_pipe.run()
+        self.assertEqual(len(os.listdir("data/raw_signals")), len(os.listdir("data/offset_signals")), "Not every item was processed")
+
+        with self.assertRaises(ValueError):
+            Node(func=where_it_runs, input=["x"], output=["y"], name="node_executors_invalid", executor="gpu")
+
+        # Clean up
+        os.system("rm -rf data/raw_signals")
+        os.system("rm -rf data/offset_signals")
+        os.system("rm -rf data/substracted_signals")
+        os.system("rm -rf data/split_signals1")
+        os.system("rm -rf data/split_signals2")
+
+    def test_pipeline_asyncio(self):
+        """
+        Test running a pipeline with coroutine nodes on an event loop
+        """
+        in_flight = [0, 0] # Current and maximum number of items waiting at once
+
+        async def slow_copy(signal):
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+            await asyncio.sleep(0.05)
+            in_flight[0] -= 1
+            return {"filename": signal["id"], "data": signal}
+
+        async_pipe = Pipeline("asyncio_test", [
+            Node(func=slow_copy, input=["raw_signals"], output=["offset_signals"], name="asyncio_slow_copy"),
+        ], mode="asyncio", max_concurrency=50, error_tolerant=False)
+
+        pipelines.data_generation.data_gen.run()
+        start = time.perf_counter()
+        async_pipe.run()
+        elapsed = time.perf_counter() - start
+
+        raw_signals = os.listdir("data/raw_signals")
+        self.assertEqual(len(raw_signals), len(os.listdir("data/offset_signals")), "Not every item was processed")
+        self.assertLess(elapsed, 0.05 * len(raw_signals) / 4, "Items did not wait concurrently")
+        self.assertLessEqual(in_flight[1], 50, "The concurrency limit was exceeded")
+        self.assertGreater(in_flight[1], 10, "Items did not wait concurrently")
+
+        # Coroutine nodes also run outside asyncio mode
+        outputs = async_pipe.run_once({"raw_signals": {"id": "a", "signal": [1]}})
+        self.assertEqual(outputs["offset_signals"], {"filename": "a", "data": {"id": "a", "signal": [1]}})
+
+        with self.assertRaises(ValueError):
+            Pipeline("asyncio_invalid_test", [], mode="fibers")
+
+        # Clean up
+        os.system("rm -rf data/raw_signals")
+        os.system("rm -rf data/offset_signals")
+        os.system("rm -rf data/substracted_signals")
+        os.system("rm -rf data/split_signals1")
+        os.system("rm -rf data/split_signals2")
+
+    def test_pipeline_cache(self):
+        """
+        Test skipping the nodes whose code and inputs did not change
+        """
+        cached_calls.clear()
+        cache_pipe = Pipeline("cache_test", [
+            Node(func=cached_sum, input=["raw_signals"], output=["signal_sum"], name="cache_sum"),
+            Node(func=lambda total: total * 2, input=["signal_sum"], output=["double_sum"], name="cache_double", cache=False),
+        ], cache=True)
+
+        outputs = cache_pipe.run_once({"raw_signals": {"id": "a", "signal": [1, 2, 3]}})
+        self.assertEqual(outputs["double_sum"], 12)
+        outputs = cache_pipe.run_once({"raw_signals": {"id": "a", "signal": [1, 2, 3]}})
+        self.assertEqual(outputs["double_sum"], 12)
+        self.assertEqual(cached_calls, ["a"], "The cached outputs were not used")
+
+        # A different input runs the node again
+        outputs = cache_pipe.run_once({"raw_signals": {"id": "a", "signal": [1, 2, 4]}})
+        self.assertEqual(outputs["double_sum"], 14)
+        self.assertEqual(cached_calls, ["a", "a"])
+
+        # So does a different function
+        changed_pipe = Pipeline("cache_changed_test", [
+            Node(func=lambda signal: sum(signal["signal"]) + 1, input=["raw_signals"], output=["signal_sum"], name="cache_changed_sum"),
+        ], cache=True)
+        outputs = changed_pipe.run_once({"raw_signals": {"id": "a", "signal": [1, 2, 3]}})
+        self.assertEqual(outputs["signal_sum"], 7)
+
+        # Clean up
+        os.system("rm -rf data/.cache")
+
+    def test_pipeline_resume(self):
+        """
+        Test resuming a pipeline run from its checkpoint journal
+        """
+        processed = []
+        failing = [True]
+
+        def flaky_copy(signal):
+            # Fails for every other signal until fixed
+            if failing[0] and int(signal["id"][-1], 16) % 2 == 1:
+                raise RuntimeError("Flaky node")
+            processed.append(signal["id"])
+            return {"filename": signal["id"], "data": signal}
+
+        resume_pipe = Pipeline("resume_test", [
+            Node(func=flaky_copy, input=["raw_signals"], output=["offset_signals"], name="resume_flaky_copy"),
+        ], multiprocessing=False, max_workers=2, chunksize=3, checkpoint=True)
+
+        pipelines.data_generation.data_gen.run()
+        raw_signals = os.listdir("data/raw_signals")
+        resume_pipe.run()
+        self.assertTrue(os.path.isfile("data/.checkpoints/resume_test.journal"), "The journal was removed after a failed run")
+        first_run = len(processed)
+        self.assertLess(first_run, len(raw_signals))
+
+        # Only the failed items run again
+        failing[0] = False
+        resume_pipe.run(resume=True)
+        self.assertEqual(len(processed), len(raw_signals), "Processed items were run again")
+        self.assertEqual(len(os.listdir("data/offset_signals")), len(raw_signals))
+        self.assertFalse(os.path.isfile("data/.checkpoints/resume_test.journal"), "The journal was not removed")
+
+        # Without resume every item runs
+        resume_pipe.run()
+        self.assertEqual(len(processed), 2 * len(raw_signals))
+
+        # Clean up
+        os.system("rm -rf data/raw_signals")
+        os.system("rm -rf data/offset_signals")
+        os.system("rm -rf data/substracted_signals")
+        os.system("rm -rf data/split_signals1")
+        os.system("rm -rf data/split_signals2")
+        os.system("rm -rf data/.checkpoints")
+
+    def test_pipeline_partial_execution(self):
+        """
+        Test pruning the nodes that do not contribute to the requested outputs
+        """
+        dead_node = Node(func=lambda signal: len(signal["signal"]), input=["raw_signals"], output=["signal_length"], name="prune_dead_node")
+        prune_pipe = Pipeline("prune_test", pipelines.offsets_pipeline.offset_nodes + [dead_node], prune=True, multiprocessing=False)
+
+        pipelines.data_generation.data_gen.run()
+        raw_signals = os.listdir("data/raw_signals")
+        prune_pipe.run()
+        self.assertNotIn("prune_dead_node", [node.name for node in prune_pipe._exec_order], "The dead node was not pruned")
+        self.assertEqual(len(os.listdir("data/split_signals1")), len(raw_signals))
+
+        # Only compute one output
+        pipelines.data_generation.data_gen.run()
+        prune_pipe.to_outputs = ["substracted_signals"]
+        prune_pipe.run()
+        self.assertEqual([node.name for node in prune_pipe._exec_order], ["create_offsets", "update_signal_2", "split_signal", "substract_signals"])
+        self.assertEqual(len(os.listdir("data/substracted_signals")), len(raw_signals))
+        self.assertEqual(len(os.listdir("data/offset_signals")), 0, "Unrequested outputs were saved")
+
+        prune_pipe.to_outputs = ["not_an_output"]
+        with self.assertRaises(ValueError):
+            prune_pipe.run()
+
+        # Start from a node. Its in-memory inputs are still computed, other branches are skipped
+        pipelines.data_generation.data_gen.run()
+        prune_pipe.to_outputs = None
+        prune_pipe.from_nodes = ["split_signal"]
+        prune_pipe.run()
+        self.assertEqual([node.name for node in prune_pipe._exec_order], ["create_offsets", "update_signal_2", "split_signal", "substract_signals"])
+        self.assertEqual(len(os.listdir("data/substracted_signals")), len(raw_signals))
+        self.assertEqual(len(os.listdir("data/split_signals1")), 0, "Nodes not downstream were run")
+
+        prune_pipe.from_nodes = ["not_a_node"]
+        with self.assertRaises(ValueError):
+            prune_pipe.run()
+
+        # Clean up
+        os.system("rm -rf data/raw_signals")
+        os.system("rm -rf data/offset_signals")
+        os.system("rm -rf data/substracted_signals")
+        os.system("rm -rf data/split_signals1")
+        os.system("rm -rf data/split_signals2")
+
+    def test_pipeline_plan_optimization(self):
+        """
+        Test binding identity nodes to their input and fusing chains of nodes
+        """
+        optimized_pipe = Pipeline("optimize_test", [
+            Node(func=lambda x: x, input=["raw_signals"], output=["raw_copy"], name="optimize_identity"),
+            Node(func=scale_signal, input=["raw_copy"], output=["scaled_signal"], name="optimize_scale"),
+            Node(func=lambda s: {"filename": s["filename"], "data": {"signal": [x + 1 for x in s["data"]["signal"]]}},
+                 input=["scaled_signal"], output=["offset_signals"], name="optimize_add"),
+        ], multiprocessing=False, max_workers=2)
+
+        pipelines.data_generation.data_gen.run()
+        optimized_pipe.run()
+        self.assertEqual([node.name for node in optimized_pipe._plan_order], ["optimize_identity", "optimize_scale+optimize_add"])
+        self.assertEqual(len(optimized_pipe._exec_order), 3, "The execution order was rewritten")
+
+        # The outputs match those of the unoptimized pipeline
+        raw_signals = os.listdir("data/raw_signals")
+        self.assertEqual(len(os.listdir("data/offset_signals")), len(raw_signals))
+        with open(os.path.join("data/raw_signals", raw_signals[0])) as f:
+            raw = json.load(f)
+        with open(os.path.join("data/offset_signals", f"{raw['id']}.json")) as f:
+            self.assertEqual(json.load(f)["signal"], [2 * x + 1 for x in raw["signal"]])
+
+        # Running once after a run still returns the outputs of every node
+        outputs = optimized_pipe.run_once({"raw_signals": {"id": "a", "signal": [1, 2]}})
+        self.assertEqual(outputs["scaled_signal"]["data"]["signal"], [2, 4])
+        self.assertEqual(outputs["offset_signals"]["data"]["signal"], [3, 5])
+
+        optimized_pipe.optimize = False
+        optimized_pipe.run()
+        self.assertEqual(len(optimized_pipe._plan_order), 3)
+
+        # Identity nodes with a timeout are not bound to their input
+        timeout_pipe = Pipeline("optimize_timeout_test", [
+            Node(func=lambda x: x, input=["raw_signals"], output=["raw_copy"], name="optimize_timeout_identity", timeout=10),
+            Node(func=scale_signal, input=["raw_copy"], output=["offset_signals"], name="optimize_timeout_scale"),
+        ], multiprocessing=False, max_workers=2)
+        timeout_pipe._calc_exec_order()
+        timeout_pipe._optimize_plan()
+        self.assertEqual([type(node).__name__ for node in timeout_pipe._plan_order], ["Node", "Node"])
+
+        # Clean up
+        os.system("rm -rf data/raw_signals")
+        os.system("rm -rf data/offset_signals")
+        os.system("rm -rf data/substracted_signals")
+        os.system("rm -rf data/split_signals1")
+        os.system("rm -rf data/split_signals2")
+
+    def test_pipeline_autoscaling(self):
+        """
+        Test running a pipeline with a number of workers adjusted during the run
+        """
+        auto_pipe = Pipeline("autoscaling_test", [
+            Node(func=lambda signal: time.sleep(0.002) or {"filename": signal["id"], "data": signal}, input=["raw_signals"],
+                 output=["offset_signals"], name="autoscaling_copy"),
+        ], multiprocessing=False, max_workers="auto", min_workers=2, error_tolerant=False)
+
+        pipelines.data_generation.data_gen.run()
+        auto_pipe.run()
+        self.assertEqual(len(os.listdir("data/offset_signals")), len(os.listdir("data/raw_signals")), "Not every item was processed")
+        self.assertEqual(auto_pipe.max_workers, "auto")
+
+        auto_pipe.min_workers = 0
+        with self.assertRaises(ValueError):
+            auto_pipe.run()
+
+        # Clean up
+        os.system("rm -rf data/raw_signals")
+        os.system("rm -rf data/offset_signals")
+        os.system("rm -rf data/substracted_signals")
+        os.system("rm -rf data/split_signals1")
+        os.system("rm -rf data/split_signals2")
+
+    def test_pipeline_memory_budget(self):
+        """
+        Test running a pipeline with a limit on the memory of the items in flight
+        """
+        budget_pipe = Pipeline("memory_budget_test", [
+            Node(func=scale_signal, input=["raw_signals"], output=["offset_signals"], name="memory_budget_scale"),
+        ], max_workers=4, memory_budget="64MB", error_tolerant=False)
+        self.assertEqual(budget_pipe.memory_budget, 64 * 10**6)
+
+        pipelines.data_generation.data_gen.run()
+        budget_pipe.run()
+        self.assertEqual(len(os.listdir("data/offset_signals")), len(os.listdir("data/raw_signals")), "Not every item was processed")
+
+        with self.assertRaises(ValueError):
+            Pipeline("memory_budget_invalid_test", [], memory_budget="lots")
+
+        # Clean up
+        os.system("rm -rf data/raw_signals")
+        os.system("rm -rf data/offset_signals")
+        os.system("rm -rf data/substracted_signals")
+        os.system("rm -rf data/split_signals1")
+        os.system("rm -rf data/split_signals2")
+
+    def test_pipeline_timeouts(self):
+        """
+        Test stopping the workers stuck on an item past its timeout
+        """
+        pipelines.data_generation.data_gen.run()
+        raw_signals = os.listdir("data/raw_signals")
+        expected = 0
+        for file in raw_signals:
+            with open(f"data/raw_signals/{file}") as f:
+                expected += not hangs(json.load(f))
+
+        # Worker processes are killed and replaced, the other items finish
+        start = time.perf_counter()
+        Pipeline("item_timeout_test", [
+            Node(func=hang_some, input=["raw_signals"], output=["offset_signals"], name="item_timeout_copy"),
+        ], max_workers=4, chunksize=5, item_timeout=0.3, checkpoint=True).run()
+        self.assertLess(time.perf_counter() - start, 60, "The pipeline waited for the stuck items")
+        self.assertEqual(len(os.listdir("data/offset_signals")), expected)
+        self.assertEqual(multiprocessing.active_children(), [], "Worker processes were left behind")
+        self.assertTrue(os.path.isfile("data/.checkpoints/item_timeout_test.journal"), "Timed out items were journaled")
+        with open("data/.checkpoints/item_timeout_test.journal") as f:
+            # The items processed before a timed out item in its chunk are processed again, not counted as failures
+            self.assertEqual(len(f.read().splitlines()), expected, "Not every item that finished was journaled")
+        os.system("rm -rf data/offset_signals")
+
+        # Worker threads are abandoned and replaced
+        def hang_briefly(signal):
+            if hangs(signal):
+                time.sleep(2)
+            return {"filename": signal["id"], "data": signal}
+
+        Pipeline("node_timeout_test", [
+            Node(func=hang_briefly, input=["raw_signals"], output=["offset_signals"], name="node_timeout_copy", timeout=0.3),
+        ], multiprocessing=False, max_workers=4, chunksize=5).run()
+        self.assertEqual(len(os.listdir("data/offset_signals")), expected)
+
+        # A timeout stops a pipeline that is not error tolerant
+        with self.assertRaises(TimeoutError):
+            Pipeline("timeout_not_tolerant_test", [
+                Node(func=hang_some, input=["raw_signals"], output=["offset_signals"], name="timeout_not_tolerant_copy", timeout=0.3),
+            ], max_workers=1, error_tolerant=False).run()
+        self.assertEqual(multiprocessing.active_children(), [], "Worker processes were left behind")
+
+        with self.assertRaises(ValueError):
+            Pipeline("timeout_invalid_test", [], item_timeout=0)
+
+        # Clean up
+        os.system("rm -rf data/raw_signals")
+        os.system("rm -rf data/offset_signals")
+        os.system("rm -rf data/substracted_signals")
+        os.system("rm -rf data/split_signals1")
+        os.system("rm -rf data/split_signals2")
+        os.system("rm -rf data/.checkpoints")
+
+    def test_pipeline_distributed(self):
+        """
+        Test distributing a pipeline run to worker processes, some of which are lost during the run
+        """
+        lost = multiprocessing.Value("i", 0)
+        stopped = multiprocessing.Value("i", 0)
+
+        def unreliable_copy(sig):
+            # The first worker stops responding and the second one crashes, their items are leased again
+            with lost.get_lock():
+                stage = lost.value
+                lost.value = min(stage + 1, 2)
+            if stage == 0:
+                stopped.value = os.getpid()
+                os.kill(os.getpid(), signal.SIGSTOP)
+            elif stage == 1:
+                os._exit(1)
+            return {"filename": sig["id"], "data": sig}
+
+        distributed_pipe = Pipeline("distributed_test", [
+            Node(func=unreliable_copy, input=["raw_signals"], output=["offset_signals"], name="distributed_copy"),
+        ], chunksize=10, error_tolerant=False)
+
+        pipelines.data_generation.data_gen.run()
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            address = f"127.0.0.1:{s.getsockname()[1]}"
+
+        workers = [multiprocessing.Process(target=run_worker, args=(address,)) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        try:
+            distributed_pipe.run(listen=address)
+        finally:
+            for worker in workers:
+                if worker.pid == stopped.value:
+                    worker.kill()
+                worker.join(timeout=10)
+
+        self.assertEqual(lost.value, 2)
+        self.assertEqual(len(os.listdir("data/offset_signals")), len(os.listdir("data/raw_signals")), "Not every item was processed")
+        self.assertEqual(sorted(worker.exitcode for worker in workers), [-signal.SIGKILL, 0, 1])
+
+        with self.assertRaises(ValueError):
+            run_worker("localhost")
+
+        # Clean up
+        os.system("rm -rf data/raw_signals")
+        os.system("rm -rf data/offset_signals")
+        os.system("rm -rf data/substracted_signals")
+        os.system("rm -rf data/split_signals1")
+        os.system("rm -rf data/split_signals2")
+
+    def test_pipeline_distributed_last_chunk(self):
+        """
+        Test that the last chunk is leased again when its worker is lost while the other workers wait for the run to end
+        """
+        crashed = multiprocessing.Value("i", 0)
+
+        def crashing_copy(sig):
+            # The worker holding the only chunk crashes once the other worker was told to wait
+            with crashed.get_lock():
+                crash = crashed.value == 0
+                crashed.value = 1
+            if crash:
+                time.sleep(1)
+                os._exit(1)
+            return {"filename": sig["id"], "data": sig}
+
+        distributed_pipe = Pipeline("distributed_last_chunk_test", [
+            Node(func=crashing_copy, input=["raw_signals"], output=["offset_signals"], name="distributed_crashing_copy"),
+        ], chunksize=1000, error_tolerant=False)
+
+        pipelines.data_generation.data_gen.run()
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            address = f"127.0.0.1:{s.getsockname()[1]}"
+
+        workers = [multiprocessing.Process(target=run_worker, args=(address,)) for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        try:
+            distributed_pipe.run(listen=address)
+        finally:
+            for worker in workers:
+                worker.join(timeout=10)
+
+        self.assertEqual(len(os.listdir("data/offset_signals")), len(os.listdir("data/raw_signals")), "The lost chunk was not processed")
+        self.assertEqual(sorted(worker.exitcode for worker in workers), [0, 1])
+
+        # Clean up
+        os.system("rm -rf data/raw_signals")
+        os.system("rm -rf data/offset_signals")
+        os.system("rm -rf data/substracted_signals")
+        os.system("rm -rf data/split_signals1")
+        os.system("rm -rf data/split_signals2")
+
+    def test_pipeline_shards(self):
+        """
+        Test splitting the master items between independent sharded runs
+        """
+        processed = []
+
+        def tracked_copy(sig):
+            processed.append(sig["id"])
+            return {"filename": sig["id"], "data": sig}
+
+        shard_pipe = Pipeline("shard_test", [
+            Node(func=tracked_copy, input=["raw_signals"], output=["offset_signals"], name="shard_copy"),
+        ], multiprocessing=False, max_workers=2)
+
+        pipelines.data_generation.data_gen.run()
+        raw_signals = os.listdir("data/raw_signals")
+        sizes = []
+        for index in range(3):
+            shard_pipe.run(shard=(index, 3))
+            sizes.append(len(processed) - sum(sizes))
+        self.assertEqual(sorted(processed), sorted(set(processed)), "An item was processed by several shards")
+        self.assertEqual(len(os.listdir("data/offset_signals")), len(raw_signals))
+        self.assertTrue(all(size > 0 for size in sizes), "A shard got no items")
+
+        # The partition is stable
+        self.assertEqual([canonada.pipeline._sharding.shard_of(key, 3) for key in ["signal_0", "signal_2", "signal_8"]], [1, 0, 2])
+
+        with self.assertRaises(ValueError):
+            shard_pipe.run(shard=(3, 3))
+
+        # Clean up
+        os.system("rm -rf data/raw_signals")
+        os.system("rm -rf data/offset_signals")
+        os.system("rm -rf data/substracted_signals")
+        os.system("rm -rf data/split_signals1")
+        os.system("rm -rf data/split_signals2")
+
+    def test_pipeline_reducer(self):
+        """
+        Test aggregating every master item with a reducer node, combining the partial aggregates of the workers
+        """
+
+        pipelines.data_generation.data_gen.run()
+        signals = []
+        for file in os.listdir("data/raw_signals"):
+            with open(os.path.join("data/raw_signals", file)) as f:
+                signals.append(json.load(f))
+        failing = signals[0]["id"]
+        # Items that fail are not aggregated
+        expected = {"max": max(max(sig["signal"]) for sig in signals[1:]), "count": len(signals) - 1}
+
+        def signal_max(sig):
+            if sig["id"] == failing:
+                raise ValueError("Failing item")
+            return max(sig["signal"])
+
+        reduce_pipe = Pipeline("reducer_test", [
+            Node(func=signal_max, input=["raw_signals"], output=["signal_max"], name="reducer_signal_max"),
+            Reducer(
+                init=lambda: (float("-inf"), 0),
+                accumulate=lambda partial, value: (max(partial[0], value), partial[1] + 1),
+                combine=lambda a, b: (max(a[0], b[0]), a[1] + b[1]),
+                finalize=lambda partial: {"max": partial[0], "count": partial[1]},
+                input=["signal_max"], output=["signal_stats"], name="reducer_stats",
+            ),
+            # Runs once with the aggregate
+            Node(func=lambda stats: {"filename": "stats", "data": stats}, input=["signal_stats"], output=["offset_signals"], name="reducer_save"),
+        ], max_workers=2, chunksize=7)
+
+        for mode in ("process", "thread", "asyncio"):
+            reduce_pipe.mode = mode
+            reduce_pipe.run()
+            self.assertEqual(os.listdir("data/offset_signals"), ["stats.json"], f"The aggregate was saved per item in {mode} mode")
+            with open("data/offset_signals/stats.json") as f:
+                self.assertEqual(json.load(f), expected, f"Wrong aggregate in {mode} mode")
+            os.remove("data/offset_signals/stats.json")
+
+        # Nodes reading the aggregate can not read per item values
+        mixed_pipe = Pipeline("reducer_mixed_test", [
+            Reducer(init=lambda: 0, accumulate=lambda total, sig: total + 1, combine=lambda a, b: a + b,
+                    input=["raw_signals"], output=["signal_count"], name="reducer_count"),
+            Node(func=lambda count, sig: sig, input=["signal_count", "raw_signals"], output=["offset_signals"], name="reducer_mixed"),
+        ], multiprocessing=False)
+        with self.assertRaises(ValueError):
+            mixed_pipe.run()
+        with self.assertRaises(ValueError):
+            reduce_pipe.run(shard=(0, 2))
+
+        # Clean up
+        os.system("rm -rf data/raw_signals")
+        os.system("rm -rf data/offset_signals")
+        os.system("rm -rf data/substracted_signals")
+        os.system("rm -rf data/split_signals1")
+        os.system("rm -rf data/split_signals2")
+
+    def test_pipeline_prefetch(self):
+        """
+        Test loading the inputs of the next items on a background thread while the current item runs
+        """
+
+        def slow_copy(sig):
+            time.sleep(0.002)
+            return {"filename": sig["id"], "data": sig}
+
+        prefetch_pipe = Pipeline("prefetch_test", [
+            Node(func=slow_copy, input=["raw_signals"], output=["offset_signals"], name="prefetch_copy"),
+        ], max_workers=2, prefetch=4)
+
+        pipelines.data_generation.data_gen.run()
+        raw_signals = os.listdir("data/raw_signals")
+        for mode in ("process", "thread"):
+            prefetch_pipe.mode = mode
+            prefetch_pipe.run()
+            self.assertEqual(len(os.listdir("data/offset_signals")), len(raw_signals), f"Items were lost in {mode} mode")
+            stats = prefetch_pipe.prefetch_stats
+            self.assertEqual(stats["hits"] + stats["misses"], len(raw_signals))
+            self.assertGreater(stats["hits"], 0, f"No inputs were loaded ahead in {mode} mode")
+            os.system("rm -rf data/offset_signals/*")
+
+        with self.assertRaises(ValueError):
+            Pipeline("prefetch_invalid_test", [], prefetch=-1)
+
+        # Clean up
+        os.system("rm -rf data/raw_signals")
+        os.system("rm -rf data/offset_signals")
+        os.system("rm -rf data/substracted_signals")
+        os.system("rm -rf data/split_signals1")
+        os.system("rm -rf data/split_signals2")
+
     def test_mix_pipeline_threading(self):
         """
         Test running a pipeline with no datahandler or specified Node output, and a datahandler pipeline with output to disk. (Using threading)
@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+from canonada.pipeline._workers import _Autoscaler, _ThreadPool
+
+
+class _SumPipeline():
+    """
+    Minimal pipeline run by the worker pools
+    """
+    def _run_chunk(self, chunk, params, watchdog=None):
+        time.sleep(0.01)
+        return sum(chunk)
+
+    def _has_timeouts(self):
+        return False
+
+    def _worker_stop(self):
+        pass
+
+
+class TestAutoscaler(unittest.TestCase):
+    """
+    Test the hill-climbing controller of the number of workers
+    """
+
+    def measure(self, autoscaler, processed, waited=0.1):
+        """
+        Record a steady throughput during one interval and let the controller decide
+        """
+        autoscaler.record(processed, waited)
+        time.sleep(0.1)
+        return autoscaler.step()
+
+    def test_hill_climbing(self):
+        """
+        Test growing while the throughput improves and turning around otherwise
+        """
+        autoscaler = _Autoscaler("autoscaler_test", 1, 8, 2, interval=0.05, max_load=float("inf"))
+        self.assertEqual(self.measure(autoscaler, 100), 3, "Did not grow after the first measurement")
+        self.assertEqual(self.measure(autoscaler, 200), 4, "Did not keep growing while the throughput improved")
+        self.assertEqual(self.measure(autoscaler, 200), 3, "Did not shrink when more workers did not help")
+        self.assertEqual(self.measure(autoscaler, 50), 4, "Did not turn around when the throughput dropped")
+        self.assertEqual(self.measure(autoscaler, 400, waited=0.0), 4, "Grew while the workers were waiting for tasks")
+
+    def test_bounds(self):
+        """
+        Test that the number of workers stays within bounds
+        """
+        autoscaler = _Autoscaler("autoscaler_bounds_test", 2, 3, 3, interval=0.05, max_load=float("inf"))
+        self.assertEqual(self.measure(autoscaler, 100), 3)
+        self.assertEqual(self.measure(autoscaler, 100), 2)
+        self.assertEqual(self.measure(autoscaler, 100), 2)
+
+        # Decisions are only taken once per interval
+        autoscaler.interval = 60
+        self.assertEqual(self.measure(autoscaler, 1000), 2)
+
+    def test_resize_pool(self):
+        """
+        Test growing and shrinking a pool of worker threads while it runs tasks
+        """
+        pool = _ThreadPool(_SumPipeline(), {}, 2)
+        pool.submit([1, 2])
+        pool.resize(4)
+        self.assertEqual(len(pool.workers), 4)
+        self.assertEqual(len(pool.idle()), 3)
+
+        # Idle workers are stopped right away, busy ones once they finish
+        for task in ([3], [4], [5]):
+            pool.submit(task)
+        pool.resize(1)
+        self.assertEqual(len(pool.workers), 4)
+        results = []
+        while len(pool.busy()) > 0:
+            results.extend(result for _, result in pool.wait())
+        self.assertEqual(sorted(results), [3, 3, 4, 5])
+        self.assertEqual(len(pool.workers), 1)
+        pool.close()
@@ -0,0 +1,120 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+from canonada.cache import Cache, fingerprint_function
+
+
+class TestCache(unittest.TestCase):
+    """
+    Test the node result cache
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_put_get(self):
+        """
+        Test storing and retrieving values
+        """
+        cache = Cache(self.tmp.name)
+        self.assertEqual(cache.get("a" * 40), (False, None))
+        cache.put("a" * 40, {"signal": [1, 2, 3]}, "node")
+        self.assertEqual(cache.get("a" * 40), (True, {"signal": [1, 2, 3]}))
+        cache.close()
+
+        # Entries persist between runs
+        cache = Cache(self.tmp.name)
+        self.assertEqual(cache.get("a" * 40), (True, {"signal": [1, 2, 3]}))
+        stats = cache.stats()
+        self.assertEqual(stats["entries"], 1)
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 1)
+
+        cache.clear()
+        self.assertEqual(cache.get("a" * 40), (False, None))
+        self.assertEqual(cache.stats()["entries"], 0)
+        cache.close()
+
+    def test_eviction(self):
+        """
+        Test evicting the least recently used entries when the cache is full
+        """
+        cache = Cache(self.tmp.name, max_size=2500)
+        cache.put("a" * 40, bytes(1000))
+        cache.put("b" * 40, bytes(1000))
+        cache.get("a" * 40) # "b" is now the least recently used
+        cache.put("c" * 40, bytes(1000))
+
+        self.assertTrue(cache.get("a" * 40)[0])
+        self.assertFalse(cache.get("b" * 40)[0])
+        self.assertTrue(cache.get("c" * 40)[0])
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertLessEqual(cache.stats()["size"], 2500)
+        cache.close()
+
+    def test_size_total(self):
+        """
+        Test keeping the total size of the entries as they are added, replaced and removed
+        """
+        cache = Cache(self.tmp.name, max_size=2500)
+        cache.put("a" * 40, bytes(1000))
+        cache.put("b" * 40, bytes(500))
+        cache.put("a" * 40, bytes(200)) # Replaced
+        size = cache.stats()["size"]
+        self.assertLess(size, 1000)
+        cache.put("c" * 40, bytes(1500))
+        self.assertEqual(cache.stats()["evictions"], 0, "The replaced entry is still counted")
+        cache.close()
+
+        cache = Cache(self.tmp.name, max_size=2500)
+        self.assertGreater(cache.stats()["size"], size)
+        cache.clear()
+        self.assertEqual(cache.stats()["size"], 0)
+        cache.put("d" * 40, bytes(1000))
+        self.assertGreater(cache.stats()["size"], 1000)
+        cache.close()
+
+    def test_fingerprint_sets(self):
+        """
+        Test that the fingerprint of a value with sets does not change between runs (hash randomization)
+        """
+        script = ("import sys; sys.path.append(sys.argv[1]); from canonada.pipeline._inputs import fingerprint; "
+                  "print(fingerprint({'tags': {'alpha', 'beta', 'gamma', 'delta'}, 'ids': frozenset({'a', 'b', 1})}).hex())")
+        src = os.path.join(os.path.dirname(__file__), "../src")
+        fingerprints = {subprocess.run([sys.executable, "-c", script, src], env=dict(os.environ, PYTHONHASHSEED=str(seed)),
+                                       capture_output=True, text=True, check=True).stdout for seed in range(4)}
+        self.assertEqual(len(fingerprints), 1)
+
+    def test_fingerprint_function(self):
+        """
+        Test that the fingerprint changes with the code and captured values of a function
+        """
+        def make(offset):
+            return lambda x: x + offset
+
+        self.assertEqual(fingerprint_function(make(1)), fingerprint_function(make(1)))
+        self.assertNotEqual(fingerprint_function(make(1)), fingerprint_function(make(2)))
+        self.assertNotEqual(fingerprint_function(lambda x: x + 1), fingerprint_function(lambda x: x - 1))
+
+    def test_fingerprint_function_globals(self):
+        """
+        Test that the fingerprint changes with the helper functions and constants a function references
+        """
+        namespace = {"os": os}
+        exec("def helper(x):\n    return x + 1\nSCALE = 2\ndef node(x):\n    return helper(os.sep) * SCALE\n", namespace)
+        before = fingerprint_function(namespace["node"])
+        self.assertEqual(fingerprint_function(namespace["node"]), before)
+
+        exec("def helper(x):\n    return x + 2\n", namespace)
+        after_helper = fingerprint_function(namespace["node"])
+        self.assertNotEqual(after_helper, before)
+
+        namespace["SCALE"] = 3
+        self.assertNotEqual(fingerprint_function(namespace["node"]), after_helper)
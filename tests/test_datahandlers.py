@@ -1,5 +1,7 @@
+import json
 import os
 import sys
+import tempfile
 import unittest
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
@@ -230,5 +232,75 @@ class TestCSVDatahandlers(unittest.TestCase):
         self.assertEqual(row["ARR_TIME"], "19.483334", "ARR_TIME is not correct")
 
 
+    def test_csv_rows_shards(self):
+        """
+        Test saving the rows of sharded runs to per-shard files and merging them into the dataset
+        """
+
+        with tempfile.TemporaryDirectory() as path:
+            kwargs = {"path": os.path.join(path, "rows.csv"), "headers": ["id", "value"]}
+            csv_rows_dh = catalog.available_datahandlers["canonada.csv_rows"](name="test_csv_rows_shards", keys=[], kwargs=kwargs)
+            for shard in range(2):
+                csv_rows_dh.set_shard(shard, 2)
+                for i in range(3):
+                    csv_rows_dh.save({"id": f"{shard}-{i}", "value": i})
+            self.assertEqual(sorted(os.listdir(path)), ["rows.csv", "rows.shard-0-of-2.csv", "rows.shard-1-of-2.csv"])
+
+            # Rows are merged once, the shard files are removed
+            self.assertEqual(csv_rows_dh.merge_shards(), 2)
+            self.assertEqual(csv_rows_dh.merge_shards(), 0)
+            self.assertEqual(os.listdir(path), ["rows.csv"])
+
+            merged = catalog.available_datahandlers["canonada.csv_rows"](name="test_csv_rows_merged", keys=["id"], kwargs=kwargs)
+            self.assertEqual(len(merged), 6)
+            self.assertEqual(merged[("1-2",)], {"id": "1-2", "value": "2"})
+
+
+    def test_csv_rows_as_loaded(self):
+        """
+        Test that rows passed in memory (fused pipelines) match the rows saved and loaded again
+        """
+
+        with tempfile.TemporaryDirectory() as path:
+            kwargs = {"path": os.path.join(path, "rows.csv"), "headers": ["id", "value", "note"]}
+            csv_rows_dh = catalog.available_datahandlers["canonada.csv_rows"](name="test_csv_rows_as_loaded", keys=[], kwargs=kwargs)
+            row = {"id": 1, "value": 2.5, "note": "a, \"quoted\" note"}
+            csv_rows_dh.save(row)
+
+            loaded = catalog.available_datahandlers["canonada.csv_rows"](name="test_csv_rows_as_loaded_saved", keys=[], kwargs=kwargs)
+            self.assertEqual(csv_rows_dh.as_loaded(row), loaded[0])
+            self.assertEqual(csv_rows_dh.as_loaded(row), {"id": "1", "value": "2.5", "note": "a, \"quoted\" note"})
+
+class TestJsonDatahandlers(unittest.TestCase):
+    """
+    Test built in JSON datahandlers
+    """
+
+    def test_json_multi_iter_keys(self):
+        """
+        Test that iterating over the keys of a json_multi datahandler does not load any file
+        """
+
+        with tempfile.TemporaryDirectory() as path:
+            for i in range(5):
+                with open(os.path.join(path, f"item_{i}.json"), "w") as f:
+                    json.dump({"id": i}, f)
+
+            json_multi_dh = catalog.available_datahandlers["canonada.json_multi"](name="test_json_multi", keys=[], kwargs={"path": path})
+
+            # Count the number of loaded files
+            loaded = []
+            load = json_multi_dh._load
+            json_multi_dh._load = lambda file: loaded.append(file) or load(file)
+
+            keys = list(json_multi_dh.iter_keys())
+            self.assertEqual(sorted(keys), [f"item_{i}" for i in range(5)], "Keys of json_multi datahandler are not correct")
+            self.assertEqual(len(loaded), 0, "Iterating over the keys should not load any file")
+
+            # Items are loaded on request
+            self.assertEqual(json_multi_dh["item_3"], {"id": 3}, "Item loaded by key is not correct")
+            self.assertEqual(len(loaded), 1, "Only the requested item should be loaded")
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+import canonada.catalog as catalog
+from canonada.exceptions import SkipItem
+from canonada.pipeline._join import _Join
+
+
+class TestJoin(unittest.TestCase):
+    """
+    Test joining the master dataset of a pipeline with its other input datasets
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def json_multi(self, name, items, keys=[]):
+        """
+        Create a json_multi datahandler with one file per item
+        """
+
+        path = os.path.join(self.tmp.name, name)
+        os.makedirs(path)
+        for filename, data in items.items():
+            with open(os.path.join(path, f"{filename}.json"), "w") as f:
+                json.dump(data, f)
+
+        return catalog.available_datahandlers["canonada.json_multi"](name=name, keys=keys, kwargs={"path": path})
+
+    def test_inner_merge_join(self):
+        """
+        Test that an inner join of datasets with ordered keys streams them side by side
+        """
+
+        datahandlers = {
+            "signals": self.json_multi("signals", {f"item_{i}": {"id": i} for i in range(6)}),
+            "labels": self.json_multi("labels", {f"item_{i}": {"label": i} for i in (1, 2, 4, 7)}),
+        }
+        join = _Join("signals", datahandlers, "inner", "error")
+        self.assertEqual(join.strategy, "merge")
+        self.assertEqual(list(join.keys(datahandlers["signals"].iter_keys())), ["item_1", "item_2", "item_4"])
+        self.assertEqual(join.load("labels", "item_4"), {"label": 4})
+
+    def test_inner_hash_join(self):
+        """
+        Test that an inner join projects the master keys on the keys of the other datasets and looks them up
+        """
+
+        datahandlers = {
+            "readings": self.json_multi("readings", {
+                f"reading_{i}": {"site": i % 3, "day": i} for i in range(6)
+            }, keys=["site", "day"]),
+            "sites": self.json_multi("sites", {f"site_{i}": {"site": i} for i in (0, 2)}, keys=["site"]),
+        }
+        join = _Join("readings", datahandlers, "inner", "error")
+        self.assertEqual(join.strategy, "hash")
+        self.assertEqual(join.key("sites", (2, 5)), (2,))
+        self.assertEqual(sorted(join.keys(datahandlers["readings"].iter_keys())), [(0, 0), (0, 3), (2, 2), (2, 5)])
+        self.assertEqual(join.load("sites", (2, 5)), {"site": 2})
+
+    def test_inner_join_mixed_key_types(self):
+        """
+        Test that an inner join of ordered datasets with keys of different types falls back to a hash join
+        """
+
+        path = os.path.join(self.tmp.name, "labels.csv")
+        with open(path, "w") as f:
+            f.write("label\n0\n1\n")
+        datahandlers = {
+            "signals": self.json_multi("signals", {f"item_{i}": {"id": i} for i in range(3)}),
+            "labels": catalog.available_datahandlers["canonada.csv_rows"](name="labels", keys=[], kwargs={"path": path}),
+        }
+        join = _Join("signals", datahandlers, "inner", "error")
+        self.assertEqual(join.strategy, "hash")
+        # Filenames never match row numbers
+        self.assertEqual(list(join.keys(datahandlers["signals"].iter_keys())), [])
+
+    def test_left_join_missing(self):
+        """
+        Test the policies for the keys missing from the other datasets of a left join
+        """
+
+        datahandlers = {
+            "signals": self.json_multi("signals", {f"item_{i}": {"id": i} for i in range(3)}),
+            "labels": self.json_multi("labels", {"label_0": {"label": 0}}),
+        }
+        key_map = {"labels": lambda key: key.replace("item", "label")}
+        keys = list(datahandlers["signals"].iter_keys())
+
+        join = _Join("signals", datahandlers, "left", "none", key_map)
+        self.assertEqual(join.strategy, "hash")
+        self.assertEqual(list(join.keys(keys)), keys)
+        self.assertEqual(join.load("labels", "item_0"), {"label": 0})
+        self.assertIsNone(join.load("labels", "item_1"))
+        self.assertIsNone(asyncio.run(join.aload("labels", "item_2")))
+
+        with self.assertRaises(SkipItem):
+            _Join("signals", datahandlers, "left", "skip", key_map).load("labels", "item_1")
+        with self.assertRaises(KeyError):
+            _Join("signals", datahandlers, "left", "error", key_map).load("labels", "item_1")
+
+        # Only the other input datasets can be mapped
+        with self.assertRaises(ValueError):
+            _Join("signals", datahandlers, "left", "none", {"signals": lambda key: key})
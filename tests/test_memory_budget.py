@@ -0,0 +1,80 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+from canonada._utils.size import parse_size
+from canonada.pipeline._workers import _Chunker, _MemoryBudget, peak_rss, reset_peak_rss, rss
+
+
+class TestMemoryBudget(unittest.TestCase):
+    """
+    Test holding back chunks of items that do not fit in the memory budget
+    """
+
+    def test_parse_size(self):
+        """
+        Test parsing sizes with units
+        """
+        self.assertEqual(parse_size(1024), 1024)
+        self.assertEqual(parse_size("8GB"), 8 * 10**9)
+        self.assertEqual(parse_size("512 MiB"), 512 * 2**20)
+        self.assertEqual(parse_size("1.5kb"), 1500)
+        for invalid in ("8 parsecs", "GB", "0", -1):
+            with self.assertRaises(ValueError):
+                parse_size(invalid)
+
+    def test_admission(self):
+        """
+        Test that chunks are admitted while they fit and oversized chunks run one at a time
+        """
+        sizes = {"a": 100, "b": 200, "c": 200, "d": 100}
+        chunker = _Chunker(sizes.keys(), len(sizes), 1, 2)
+        budget = _MemoryBudget("budget_test", 250, 2, sizes.get, expansion=1.0)
+
+        a = budget.next(chunker)
+        self.assertEqual(a, ["a"])
+        self.assertIsNone(budget.next(chunker), "A chunk over the budget was admitted")
+        budget.done(a, None)
+        b = budget.next(chunker)
+        self.assertEqual(b, ["b"], "A chunk was not admitted with nothing in flight")
+        self.assertIsNone(budget.next(chunker), "Two oversized chunks ran at once")
+
+        budget.done(b, None)
+        c = budget.next(chunker)
+        self.assertEqual(c, ["c"])
+        budget.done(c, None)
+        d = budget.next(chunker)
+        self.assertEqual(d, ["d"])
+        budget.done(d, None)
+        self.assertEqual(budget.next(chunker), [])
+        self.assertEqual(budget.in_flight, 0)
+
+    def test_learning(self):
+        """
+        Test learning the memory used per stored byte from the reported peaks
+        """
+        sizes = {"a": 100, "b": None}
+        chunker = _Chunker(sizes.keys(), len(sizes), 1, 2)
+        budget = _MemoryBudget("budget_learning_test", 10**6, 2, sizes.get, expansion=1.0)
+
+        chunk = budget.next(chunker)
+        budget.done(chunk, 1000)
+        self.assertGreater(budget.expansion, 1.0)
+        self.assertEqual(budget.next(chunker), ["b"])
+        self.assertEqual(budget.in_flight, 1000, "Items without a stored size were not estimated from the reported peaks")
+
+    @unittest.skipUnless(os.path.exists("/proc/self/clear_refs"), "Resetting the peak memory is only supported on Linux")
+    def test_peak_reset(self):
+        """
+        Test that the peak memory of a chunk does not include the peaks of previous chunks
+        """
+        large = bytearray(200 << 20)
+        large[::4096] = b"x" * len(large[::4096]) # Touch every page
+        del large
+
+        self.assertTrue(reset_peak_rss())
+        before = rss()
+        small = bytearray(1 << 20)
+        self.assertLess(peak_rss() - before, 100 << 20, "The peak of a previous chunk was reported")
+        del small
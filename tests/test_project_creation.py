@@ -93,6 +93,23 @@ class TestProjectCLI(unittest.TestCase):
         os.chdir("..")
         os.system("rm -rf test_empty_project_commands")
 
+    def test_parse_options(self):
+        """
+        Test splitting command line arguments into names and options
+        """
+        names, options = cli.parse_options(["pipe_a", "--chunksize", "8", "pipe_b"], {"--chunksize"})
+        self.assertEqual(names, ["pipe_a", "pipe_b"])
+        self.assertEqual(options, {"--chunksize": "8"})
+
+        names, options = cli.parse_options(["--chunksize=auto", "pipe_a"], {"--chunksize"})
+        self.assertEqual(names, ["pipe_a"])
+        self.assertEqual(options, {"--chunksize": "auto"})
+
+        with self.assertRaises(ValueError):
+            cli.parse_options(["pipe_a", "--unknown", "1"], {"--chunksize"})
+        with self.assertRaises(ValueError):
+            cli.parse_options(["pipe_a", "--chunksize"], {"--chunksize"})
+
 
 if __name__ == '__main__':
     unittest.main()
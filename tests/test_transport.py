@@ -0,0 +1,71 @@
+import multiprocessing
+import os
+import pickle
+import sys
+import unittest
+from multiprocessing import shared_memory
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+from canonada.pipeline import _transport
+
+
+def _echo(conn, threshold, prefix):
+    """
+    Send back every object received
+    """
+    while True:
+        obj = _transport.recv(conn)
+        if obj is None:
+            break
+        _transport.send(conn, obj, threshold, prefix)
+
+def _leftovers(prefix):
+    """
+    List the shared memory segments starting with prefix
+    """
+    return [name for name in os.listdir("/dev/shm") if name.startswith(prefix)]
+
+
+@unittest.skipUnless(os.path.isdir("/dev/shm"), "Shared memory segments are not listed in /dev/shm")
+class TestSharedMemoryTransport(unittest.TestCase):
+    """
+    Test the transport used between the parent and the worker processes
+    """
+
+    def test_large_buffers_use_shared_memory(self):
+        """
+        Test that large buffers are sent through shared memory and the segments are removed once received
+        """
+        prefix = f"cndtest{os.getpid()}_"
+        parent_conn, child_conn = multiprocessing.Pipe()
+        child = multiprocessing.Process(target=_echo, args=(child_conn, 1024, prefix + "c_"))
+        child.start()
+
+        data = bytearray(os.urandom(4 << 20))
+        segments = _transport.send(parent_conn, {"array": pickle.PickleBuffer(data), "small": [1, 2, 3]}, 1024, prefix + "p_")
+        self.assertEqual(len(segments), 1, "The large buffer was not sent through shared memory")
+        echoed = _transport.recv(parent_conn)
+        self.assertEqual(bytes(echoed["array"]), bytes(data))
+        self.assertEqual(echoed["small"], [1, 2, 3])
+
+        # Small buffers and disabled shared memory go through the pipe
+        self.assertEqual(_transport.send(parent_conn, pickle.PickleBuffer(bytearray(10)), 1024, prefix + "p_"), [])
+        self.assertEqual(bytes(_transport.recv(parent_conn)), bytes(10))
+        self.assertEqual(_transport.send(parent_conn, pickle.PickleBuffer(data), None, prefix + "p_"), [])
+        _transport.recv(parent_conn)
+
+        _transport.send(parent_conn, None, None, prefix + "p_")
+        child.join()
+        self.assertEqual(_leftovers(prefix), [], "Shared memory segments were not removed")
+
+    def test_cleanup(self):
+        """
+        Test removing the segments left behind by a dead worker
+        """
+        prefix = f"cndtest{os.getpid()}w_"
+        shm = shared_memory.SharedMemory(name=prefix + "leftover", create=True, size=16)
+        shm.close()
+        self.assertEqual(_leftovers(prefix), [prefix + "leftover"])
+
+        _transport.cleanup(prefix)
+        self.assertEqual(_leftovers(prefix), [])